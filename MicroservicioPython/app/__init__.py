@@ -6,23 +6,33 @@ from typing import AsyncIterator
 from fastapi import FastAPI
 
 from .config import get_settings
+from .db import dispose_async_engine
 from .routes.analysis import router as analysis_router
 from .routes.coins import router as coins_router
+from .routes.export import router as export_router
 from .routes.health import router as health_router
+from .routes.metrics import router as metrics_router
 from .routes.prices import router as prices_router
+from .routes.stream import router as stream_router
 from .routes.sync import router as sync_router
 from .routes.tables import router as tables_router
 from .services import ensure_initial_sync, start_background_sync, stop_background_sync
+from .services.freshness import start_freshness_tracking, stop_freshness_tracking
+from .services.stream import get_broadcaster
 
 
 @asynccontextmanager
 async def lifespan(_: FastAPI) -> AsyncIterator[None]:
     await ensure_initial_sync()
+    await start_freshness_tracking()
     task = await start_background_sync()
     try:
         yield
     finally:
+        get_broadcaster().close_all()
         await stop_background_sync(task)
+        await stop_freshness_tracking()
+        await dispose_async_engine()
 
 
 def create_app() -> FastAPI:
@@ -38,7 +48,10 @@ def create_app() -> FastAPI:
     application.include_router(prices_router, prefix="/api", tags=["prices"])
     application.include_router(coins_router, prefix="/api", tags=["coins"])
     application.include_router(analysis_router, prefix="/api", tags=["analysis"])
+    application.include_router(export_router, prefix="/api", tags=["export"])
+    application.include_router(stream_router, prefix="/api", tags=["stream"])
     application.include_router(tables_router)
+    application.include_router(metrics_router)
     return application
 
 
@@ -1,10 +1,16 @@
 from __future__ import annotations
 
-from contextlib import contextmanager
-from typing import Generator
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncGenerator, Dict, Generator
 
 from sqlalchemy import create_engine
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, Session, scoped_session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 from .config import get_settings
 
@@ -13,16 +19,130 @@ class Base(DeclarativeBase):
     """Base declarativa para todos los modelos ORM."""
 
 
+_CHECKOUT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+class PoolMetrics:
+    """Contadores de checkout de un pool: latencia, desbordamientos y timeouts."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Any] = {
+            "checkouts": 0,
+            "connections_created": 0,
+            "overflow_events": 0,
+            "timeouts": 0,
+            "wait_ms_total": 0.0,
+            "wait_ms_max": 0.0,
+            "wait_ms_buckets": {str(bound): 0 for bound in _CHECKOUT_BUCKETS_MS} | {"+Inf": 0},
+        }
+
+    def record_checkout(self, wait_ms: float) -> None:
+        with self._lock:
+            stats = self._stats
+            stats["checkouts"] += 1
+            stats["wait_ms_total"] += wait_ms
+            stats["wait_ms_max"] = max(stats["wait_ms_max"], wait_ms)
+            bucket = next((str(bound) for bound in _CHECKOUT_BUCKETS_MS if wait_ms <= bound), "+Inf")
+            stats["wait_ms_buckets"][bucket] += 1
+
+    def record_created(self, overflowed: bool) -> None:
+        with self._lock:
+            self._stats["connections_created"] += 1
+            self._stats["overflow_events"] += int(overflowed)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self._stats["timeouts"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["wait_ms_buckets"] = dict(self._stats["wait_ms_buckets"])
+        snapshot["wait_ms_avg"] = snapshot["wait_ms_total"] / snapshot["checkouts"] if snapshot["checkouts"] else None
+        return snapshot
+
+
+class _InstrumentedPoolMixin:
+    """Mide cada checkout del ``QueuePool`` subyacente (tiempo de espera y desbordamiento)."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+        # ``QueuePool._do_get`` se llama a si mismo al reintentar; solo se mide la llamada externa.
+        self._measuring = threading.local()
+
+    def _do_get(self) -> Any:
+        if getattr(self._measuring, "active", False):
+            return super()._do_get()
+        self._measuring.active = True
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except sa_exc.TimeoutError:
+            self.metrics.record_timeout()
+            raise
+        finally:
+            self._measuring.active = False
+        self.metrics.record_checkout((time.perf_counter() - started) * 1000)
+        return connection
+
+    def _create_connection(self) -> Any:
+        connection = super()._create_connection()
+        # ``_overflow`` ya se ha incrementado: por encima de cero es una conexion de desbordamiento.
+        self.metrics.record_created(overflowed=self._overflow > 0)
+        return connection
+
+    def stats(self) -> Dict[str, Any]:
+        """Estado actual del pool mas las metricas acumuladas."""
+        return dict(
+            self.metrics.snapshot(),
+            pool_size=self.size(),
+            max_overflow=self._max_overflow,
+            checked_out=self.checkedout(),
+            idle=self.checkedin(),
+            overflow=max(self.overflow(), 0),
+        )
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    """``QueuePool`` con metricas de checkout para el motor sincrono."""
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    """``AsyncAdaptedQueuePool`` con metricas de checkout para el motor ``asyncpg``."""
+
+
+def _pool_options() -> Dict[str, Any]:
+    settings = get_settings()
+    return {
+        "pool_size": settings.database_pool_size,
+        "max_overflow": settings.database_max_overflow,
+        "pool_timeout": settings.database_pool_timeout,
+        "pool_recycle": settings.database_pool_recycle,
+        "pool_pre_ping": settings.database_pool_pre_ping,
+    }
+
+
 _engine = None
 _SessionFactory: sessionmaker | None = None
+_ScopedSession: scoped_session | None = None
+_async_engine: AsyncEngine | None = None
+_AsyncSessionFactory: async_sessionmaker | None = None
 
 
 def get_engine():
     """Construye (o reutiliza) la instancia del motor SQLAlchemy."""
-    global _engine, _SessionFactory
+    global _engine, _SessionFactory, _ScopedSession
     if _engine is None:
         settings = get_settings()
-        _engine = create_engine(settings.database_url, echo=settings.database_echo, future=True)
+        _engine = create_engine(
+            settings.database_url,
+            echo=settings.database_echo,
+            future=True,
+            poolclass=InstrumentedQueuePool,
+            **_pool_options(),
+        )
         _SessionFactory = sessionmaker(
             bind=_engine,
             autoflush=False,
@@ -30,6 +150,7 @@ def get_engine():
             expire_on_commit=False,
             future=True,
         )
+        _ScopedSession = scoped_session(_SessionFactory)
         # Garantiza que todas las tablas declaradas existen antes de usar la base.
         # Importar aqui evita dependencias circulares en tiempo de carga.
         from . import models  # noqa: F401
@@ -39,18 +160,24 @@ def get_engine():
 
 
 def get_session() -> scoped_session:
-    """Devuelve una sesión configurada."""
-    global _SessionFactory
-    if _SessionFactory is None:
+    """Devuelve el registro de sesiones por hilo (creado una sola vez)."""
+    if _ScopedSession is None:
         get_engine()
-    assert _SessionFactory is not None  # Para el tipo estático
-    return scoped_session(_SessionFactory)
+    assert _ScopedSession is not None  # Para el tipo estático
+    return _ScopedSession
 
 
 @contextmanager
 def session_scope() -> Generator[Session, None, None]:
-    """Context manager que abre y cierra una sesión automática."""
-    session = get_session()
+    """Context manager que abre y cierra una sesión automática.
+
+    Cada bloque usa su propia sesion, de modo que los ``session_scope``
+    anidados no comparten transaccion.
+    """
+    if _SessionFactory is None:
+        get_engine()
+    assert _SessionFactory is not None  # Para el tipo estático
+    session = _SessionFactory()
     try:
         yield session
         session.commit()
@@ -58,4 +185,69 @@ def session_scope() -> Generator[Session, None, None]:
         session.rollback()
         raise
     finally:
-        session.remove()
+        session.close()
+
+
+def _async_url(url: str) -> str:
+    """Traduce la URL de PostgreSQL configurada al driver ``asyncpg``."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "postgresql":
+        raise ValueError("El modo asincrono solo esta soportado con PostgreSQL")
+    return parsed.set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+
+def get_async_engine() -> AsyncEngine:
+    """Construye (o reutiliza) el motor asincrono sobre ``asyncpg``."""
+    global _async_engine, _AsyncSessionFactory
+    if _async_engine is None:
+        settings = get_settings()
+        # El motor sincrono sigue siendo el responsable de crear las tablas.
+        get_engine()
+        _async_engine = create_async_engine(
+            _async_url(settings.database_url),
+            echo=settings.database_echo,
+            poolclass=InstrumentedAsyncQueuePool,
+            **_pool_options(),
+        )
+        _AsyncSessionFactory = async_sessionmaker(
+            bind=_async_engine,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+    return _async_engine
+
+
+@asynccontextmanager
+async def async_session_scope() -> AsyncGenerator[AsyncSession, None]:
+    """Equivalente asincrono de ``session_scope``."""
+    if _AsyncSessionFactory is None:
+        get_async_engine()
+    assert _AsyncSessionFactory is not None  # Para el tipo estático
+    session = _AsyncSessionFactory()
+    try:
+        yield session
+        await session.commit()
+    except Exception:
+        await session.rollback()
+        raise
+    finally:
+        await session.close()
+
+
+async def dispose_async_engine() -> None:
+    """Cierra las conexiones del motor asincrono (al apagar la aplicacion)."""
+    global _async_engine, _AsyncSessionFactory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    _async_engine = None
+    _AsyncSessionFactory = None
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Metricas de los pools de conexiones ya creados (sincrono y asincrono)."""
+    stats: Dict[str, Any] = {}
+    if _engine is not None:
+        stats["sync"] = _engine.pool.stats()
+    if _async_engine is not None:
+        stats["async"] = _async_engine.sync_engine.pool.stats()
+    return stats
@@ -1,5 +1,8 @@
 from .coin import Coin
 from .snapshot import CoinSnapshot
 from .coin_series import CoinSeries
+from .coin_latest import CoinLatest
+from .price_rollup import CoinPriceRollup, CoinPriceRollupDaily
+from .indicator_state import CoinIndicatorState
 
-__all__ = ["Coin", "CoinSnapshot", "CoinSeries"]
+__all__ = ["Coin", "CoinSnapshot", "CoinSeries", "CoinLatest", "CoinPriceRollup", "CoinPriceRollupDaily", "CoinIndicatorState"]
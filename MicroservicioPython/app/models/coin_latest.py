@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, Numeric, String
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.db import Base
+
+
+class CoinLatest(Base):
+    """Ultimo snapshot conocido de cada moneda por divisa.
+
+    Se mantiene en la misma transaccion que inserta los snapshots, de modo que
+    el listado de precios se resuelve con una lectura indexada en lugar de
+    buscar el maximo ``recorded_at`` sobre todo el historico.
+    """
+
+    __tablename__ = "coin_latest"
+    __table_args__ = (
+        Index(
+            "ix_coin_latest_ranking",
+            "vs_currency",
+            "market_cap",
+            "market_cap_rank",
+            postgresql_ops={"market_cap": "DESC NULLS LAST", "market_cap_rank": "ASC NULLS LAST"},
+        ),
+    )
+
+    coin_id: Mapped[int] = mapped_column(ForeignKey("coins.id", ondelete="CASCADE"), primary_key=True)
+    vs_currency: Mapped[str] = mapped_column(String(16), primary_key=True)
+    recorded_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    market_cap_rank: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    price: Mapped[Decimal | None] = mapped_column(Numeric(20, 8), nullable=True)
+    market_cap: Mapped[Decimal | None] = mapped_column(Numeric(24, 2), nullable=True)
+    total_volume: Mapped[Decimal | None] = mapped_column(Numeric(24, 2), nullable=True)
+    change_1h: Mapped[Decimal | None] = mapped_column(Numeric(10, 4), nullable=True)
+    change_24h: Mapped[Decimal | None] = mapped_column(Numeric(10, 4), nullable=True)
+    change_7d: Mapped[Decimal | None] = mapped_column(Numeric(10, 4), nullable=True)
+    ath: Mapped[Decimal | None] = mapped_column(Numeric(20, 8), nullable=True)
+
+    coin: Mapped["Coin"] = relationship("Coin")
+
+    def __repr__(self) -> str:
+        return f"CoinLatest(coin_id={self.coin_id!r}, vs={self.vs_currency!r})"
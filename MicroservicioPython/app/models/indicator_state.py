@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import DateTime, Float, ForeignKey, Integer, String
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.db import Base
+
+
+class CoinIndicatorState(Base):
+    """Estado incremental de los indicadores tecnicos de una moneda por divisa.
+
+    Guarda las medias exponenciales y de Wilder y una ventana corta de
+    precios, de modo que cada snapshot nuevo actualiza EMA, MACD, RSI, ATR y
+    Bollinger en tiempo constante (ver ``app.services.indicators``).
+    """
+
+    __tablename__ = "coin_indicator_state"
+
+    coin_id: Mapped[int] = mapped_column(ForeignKey("coins.id", ondelete="CASCADE"), primary_key=True)
+    vs_currency: Mapped[str] = mapped_column(String(16), primary_key=True)
+    last_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    last_price: Mapped[float] = mapped_column(Float, nullable=False)
+    sample_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    ema_fast: Mapped[float] = mapped_column(Float, nullable=False)
+    ema_slow: Mapped[float] = mapped_column(Float, nullable=False)
+    macd_signal: Mapped[float] = mapped_column(Float, nullable=False)
+    avg_gain: Mapped[float] = mapped_column(Float, nullable=False)
+    avg_loss: Mapped[float] = mapped_column(Float, nullable=False)
+    avg_range: Mapped[float] = mapped_column(Float, nullable=False)
+    recent_prices: Mapped[List[float]] = mapped_column(ARRAY(Float), nullable=False)
+
+    coin: Mapped["Coin"] = relationship("Coin")
+
+    def __repr__(self) -> str:
+        return (
+            f"CoinIndicatorState(coin_id={self.coin_id!r}, vs={self.vs_currency!r}, "
+            f"last_at={self.last_at.isoformat() if self.last_at else None})"
+        )
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import DateTime, Float, ForeignKey, Index, Integer, Numeric, String
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.db import Base
+
+
+class _RollupColumns:
+    """Columnas comunes a los agregados horarios y diarios."""
+
+    coin_id: Mapped[int] = mapped_column(ForeignKey("coins.id", ondelete="CASCADE"), primary_key=True)
+    vs_currency: Mapped[str] = mapped_column(String(16), primary_key=True)
+    bucket_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    sample_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    price_sum: Mapped[float] = mapped_column(Float, nullable=False)
+    price_sq_sum: Mapped[float] = mapped_column(Float, nullable=False)
+    price_min: Mapped[Decimal] = mapped_column(Numeric(20, 8), nullable=False)
+    price_max: Mapped[Decimal] = mapped_column(Numeric(20, 8), nullable=False)
+    # Apertura y cierre (OHLC); nulos en buckets anteriores a su introduccion sin snapshots de origen.
+    open_price: Mapped[Decimal | None] = mapped_column(Numeric(20, 8), nullable=True)
+    open_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    close_price: Mapped[Decimal | None] = mapped_column(Numeric(20, 8), nullable=True)
+    close_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    market_cap_sum: Mapped[float] = mapped_column(Float, nullable=False, server_default="0")
+    market_cap_count: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    total_volume_sum: Mapped[float] = mapped_column(Float, nullable=False, server_default="0")
+    total_volume_count: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(coin_id={self.coin_id!r}, vs={self.vs_currency!r}, "
+            f"bucket_start={self.bucket_start.isoformat() if self.bucket_start else None})"
+        )
+
+
+class CoinPriceRollup(_RollupColumns, Base):
+    """Agregado horario de los snapshots de una moneda.
+
+    Guarda conteo, suma, suma de cuadrados, minimo y maximo del precio para
+    cada hora, de forma que medias, extremos y desviacion tipica de cualquier
+    ventana se obtienen combinando buckets en lugar de recorrer los snapshots.
+    Tambien conserva apertura/cierre y las sumas de volumen y capitalizacion,
+    suficientes para sustituir a los snapshots una vez compactados.
+    """
+
+    __tablename__ = "coin_price_rollups"
+    __table_args__ = (Index("ix_rollups_bucket_start", "bucket_start"),)
+
+    coin: Mapped["Coin"] = relationship("Coin")
+
+
+class CoinPriceRollupDaily(_RollupColumns, Base):
+    """Agregado diario: los buckets horarios antiguos se fusionan aqui al compactar.
+
+    Un mismo snapshot esta en un solo nivel (horario o diario), asi que las
+    ventanas largas se calculan sumando ambos sin contar muestras dos veces.
+    """
+
+    __tablename__ = "coin_price_rollups_daily"
@@ -10,21 +10,27 @@ from app.db import Base
 
 
 class CoinSnapshot(Base):
-    """Almacena la fotografía de métricas de una moneda en un instante determinado."""
+    """Almacena la fotografía de métricas de una moneda en un instante determinado.
+
+    La tabla esta particionada por rango mensual de ``recorded_at`` (ver
+    ``app.services.partitions``); por eso ``recorded_at`` forma parte de la
+    clave primaria.
+    """
 
     __tablename__ = "coin_snapshots"
     __table_args__ = (
         UniqueConstraint("coin_id", "vs_currency", "recorded_at", name="uq_snapshots_coin_timestamp"),
         Index("ix_snapshots_vs_recorded", "vs_currency", "recorded_at"),
+        {"postgresql_partition_by": "RANGE (recorded_at)"},
     )
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     coin_id: Mapped[int] = mapped_column(
         ForeignKey("coins.id", ondelete="CASCADE"),
         nullable=False,
         index=True,
     )
-    recorded_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    recorded_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
     vs_currency: Mapped[str] = mapped_column(String(16), nullable=False)
     price: Mapped[Decimal | None] = mapped_column(Numeric(20, 8), nullable=True)
     market_cap: Mapped[Decimal | None] = mapped_column(Numeric(24, 2), nullable=True)
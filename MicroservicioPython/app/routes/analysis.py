@@ -1,22 +1,165 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException, Path, Query
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Path, Query, Request, Response
+from pydantic import BaseModel, Field
+
+from ..schemas import AnalysisBatchResult, AnalysisResult, CorrelationResult, IndicatorResult
+from ..services import (
+    analyse_symbol,
+    analyse_symbol_async,
+    analyse_symbols,
+    analyse_symbols_async,
+    ensure_recent_market_data_async,
+    get_correlation_matrix,
+    get_correlation_matrix_async,
+    symbol_indicators,
+    symbol_indicators_async,
+    MarketDataUnavailable,
+)
+from ..services.conditional import conditional_headers, is_not_modified
+from ..services.encoding import json_response, negotiate_encoding
+from ..services.response_cache import resolve_json
+
+
+class AnalysisBatchRequest(BaseModel):
+    symbols: List[str] = Field(..., min_length=1, max_length=250, description="Simbolos a analizar")
+    vs_currency: str = Field("usd", description="Divisa de referencia")
+    days: int = Field(7, ge=1, le=90, description="Ventana temporal (dias) para los KPIs")
 
-from ..schemas import AnalysisResult
-from ..services import analyse_symbol, MarketDataUnavailable
 
 router = APIRouter()
 
 
+async def _require_recent_data(vs: str) -> None:
+    """503 sin snapshots recientes; se comprueba siempre, tambien cuando el cuerpo esta cacheado."""
+    if not await ensure_recent_market_data_async(vs_currency=vs):
+        raise HTTPException(
+            status_code=503,
+            detail="No hay datos sincronizados. Ejecuta la actualizacion manual antes de consultar el analisis.",
+        )
+
+
+@router.post("/analysis/batch", response_model=AnalysisBatchResult)
+async def analyse_batch(payload: AnalysisBatchRequest) -> Response:
+    """Analiza varias monedas en una sola peticion (consultas agrupadas por moneda)."""
+    try:
+        vs = payload.vs_currency.lower()
+        await _require_recent_data(vs)
+        symbols = tuple(payload.symbols)
+
+        def render() -> bytes:
+            data = analyse_symbols(symbols, vs_currency=vs, days=payload.days)
+            return AnalysisBatchResult(**data).model_dump_json().encode()
+
+        async def render_async() -> bytes:
+            data = await analyse_symbols_async(symbols, vs_currency=vs, days=payload.days)
+            return AnalysisBatchResult(**data).model_dump_json().encode()
+
+        key = (tuple(symbol.strip().upper() for symbol in symbols), vs, payload.days)
+        body = await resolve_json("analysis_batch", key, render, render_async)
+        return Response(content=body, media_type="application/json")
+    except HTTPException:
+        raise
+    except MarketDataUnavailable as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+
+# Declarada antes de /analysis/{symbol}, que tambien coincidiria con "correlation".
+@router.get("/analysis/correlation", response_model=CorrelationResult)
+async def correlation(
+    ids: Optional[str] = Query(None, description="Identificadores (CoinGecko) separados por comas"),
+    top: int = Query(20, ge=2, le=200, description="Sin ids: numero de monedas por capitalizacion"),
+    vs: str = Query("usd", description="Divisa de referencia"),
+    days: int = Query(30, ge=1, le=365, description="Ventana temporal (dias)"),
+    benchmark: str = Query("bitcoin", description="Moneda de referencia para las betas"),
+) -> Response:
+    """Matrices de correlacion y beta de los rendimientos de ``coin_series`` en una rejilla comun."""
+    try:
+        vs = vs.lower()
+        coin_ids = tuple(coin_id.strip().lower() for coin_id in ids.split(",") if coin_id.strip()) if ids else None
+
+        def render() -> bytes:
+            data = get_correlation_matrix(coin_ids, top=top, vs_currency=vs, days=days, benchmark=benchmark)
+            return CorrelationResult(**data).model_dump_json().encode()
+
+        async def render_async() -> bytes:
+            data = await get_correlation_matrix_async(coin_ids, top=top, vs_currency=vs, days=days, benchmark=benchmark)
+            return CorrelationResult(**data).model_dump_json().encode()
+
+        key = (coin_ids, top if coin_ids is None else None, vs, days, benchmark.strip().lower())
+        body = await resolve_json("correlation", key, render, render_async)
+        return Response(content=body, media_type="application/json")
+    except MarketDataUnavailable as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+
+@router.get("/analysis/{symbol}/indicators", response_model=IndicatorResult)
+async def indicators(
+    symbol: str = Path(..., description="Simbolo de la criptomoneda"),
+    vs: str = Query("usd", description="Divisa de referencia"),
+) -> Response:
+    """EMA, MACD, RSI, Bollinger y ATR leidos del estado incremental de la moneda."""
+    try:
+        vs = vs.lower()
+        await _require_recent_data(vs)
+
+        def render() -> bytes:
+            return IndicatorResult(**symbol_indicators(symbol=symbol, vs_currency=vs)).model_dump_json().encode()
+
+        async def render_async() -> bytes:
+            data = await symbol_indicators_async(symbol=symbol, vs_currency=vs)
+            return IndicatorResult(**data).model_dump_json().encode()
+
+        body = await resolve_json("indicators", (symbol.strip().upper(), vs), render, render_async)
+        return Response(content=body, media_type="application/json")
+    except HTTPException:
+        raise
+    except MarketDataUnavailable as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+
 @router.get("/analysis/{symbol}", response_model=AnalysisResult)
-def analyse(
+async def analyse(
+    request: Request,
     symbol: str = Path(..., description="Simbolo de la criptomoneda"),
     vs: str = Query("usd", description="Divisa de referencia"),
     days: int = Query(7, ge=1, le=90, description="Ventana temporal (dias) para los KPIs"),
-) -> AnalysisResult:
+) -> Response:
     try:
-        data = analyse_symbol(symbol=symbol, vs_currency=vs, days=days)
-        return AnalysisResult(**data)
+        vs = vs.lower()
+        # Antes que el 304 y la cache: con datos caducados se responde 503.
+        await _require_recent_data(vs)
+        key = (symbol.strip().upper(), vs, days)
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+        headers = conditional_headers("analysis", key, vs, encoding)
+        if is_not_modified(request, headers):
+            return Response(status_code=304, headers=headers)
+
+        def render() -> bytes:
+            return AnalysisResult(**analyse_symbol(symbol=symbol, vs_currency=vs, days=days)).model_dump_json().encode()
+
+        async def render_async() -> bytes:
+            data = await analyse_symbol_async(symbol=symbol, vs_currency=vs, days=days)
+            return AnalysisResult(**data).model_dump_json().encode()
+
+        body = await resolve_json("analysis", key, render, render_async, encoding)
+        return json_response(body, headers, encoding)
+    except HTTPException:
+        raise
     except MarketDataUnavailable as exc:
         raise HTTPException(status_code=503, detail=str(exc)) from exc
     except ValueError as exc:
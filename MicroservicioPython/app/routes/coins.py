@@ -1,21 +1,43 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException, Path, Query
+from typing import Literal
 
-from ..schemas import CoinDetail
-from ..services import ensure_recent_market_data, get_coin_detail_from_db
+from fastapi import APIRouter, HTTPException, Path, Query, Request, Response
+
+from ..schemas import CoinCandles, CoinDetail, CoinDetailColumnar
+from ..services import (
+    ensure_recent_market_data_async,
+    get_coin_candles,
+    get_coin_candles_async,
+    get_coin_detail_from_db,
+    get_coin_detail_from_db_async,
+)
+from ..services.conditional import conditional_headers, is_not_modified
+from ..services.encoding import json_response, negotiate_encoding
+from ..services.response_cache import resolve_json
+from ..services.series_format import BINARY_MEDIA_TYPE, binary_series, columnar_series
 
 router = APIRouter()
 
 
 @router.get("/coin/{coin_id}", response_model=CoinDetail)
-def get_coin_detail(
+async def get_coin_detail(
+    request: Request,
     coin_id: str = Path(..., description="Identificador de la moneda"),
     vs: str = Query("usd", description="Divisa de referencia"),
     days: str = Query("7", description="Dias de historico a devolver"),
-) -> CoinDetail:
+    downsample: Literal["m4", "latest"] = Query(
+        "m4",
+        description="Reduccion de la serie: 'm4' cubre todo el rango (primero/ultimo/min/max por intervalo), 'latest' devuelve los puntos mas recientes",
+    ),
+    series_format: Literal["json", "columnar", "binary"] = Query(
+        "json",
+        alias="format",
+        description="Codificacion de prices_series: 'json' ([[ts, precio], ...]), 'columnar' (inicio, paso/deltas y precios) o 'binary' (solo la serie, deltas int32 y precios float32)",
+    ),
+) -> Response:
     try:
-        has_data = ensure_recent_market_data(vs_currency=vs)
+        has_data = await ensure_recent_market_data_async(vs_currency=vs)
         if not has_data:
             raise HTTPException(
                 status_code=503,
@@ -28,8 +50,65 @@ def get_coin_detail(
             raise HTTPException(status_code=400, detail="El parametro 'days' debe ser numerico") from exc
 
         window = days_int if days_int > 0 else None
-        raw = get_coin_detail_from_db(coin_id, vs_currency=vs, days=window)
-        return CoinDetail(**raw)
+        vs = vs.lower()
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+        key = (coin_id, vs, window, downsample, series_format)
+        headers = conditional_headers("coin", key, vs, encoding)
+        if is_not_modified(request, headers):
+            return Response(status_code=304, headers=headers)
+
+        def encode(raw: dict) -> bytes:
+            if series_format == "binary":
+                return binary_series(raw["prices_series"])
+            if series_format == "columnar":
+                return CoinDetailColumnar(**dict(raw, prices_series=columnar_series(raw["prices_series"]))).model_dump_json().encode()
+            return CoinDetail(**raw).model_dump_json().encode()
+
+        def render() -> bytes:
+            return encode(get_coin_detail_from_db(coin_id, vs_currency=vs, days=window, downsample=downsample))
+
+        async def render_async() -> bytes:
+            return encode(await get_coin_detail_from_db_async(coin_id, vs_currency=vs, days=window, downsample=downsample))
+
+        body = await resolve_json("coin", key, render, render_async, encoding)
+        if series_format == "binary":
+            return json_response(body, headers, encoding, media_type=BINARY_MEDIA_TYPE)
+        return json_response(body, headers, encoding)
+    except HTTPException:
+        raise
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    except Exception as exc:
+        raise HTTPException(status_code=502, detail=str(exc)) from exc
+
+
+@router.get("/coin/{coin_id}/candles", response_model=CoinCandles)
+async def get_coin_candles_route(
+    coin_id: str = Path(..., description="Identificador de la moneda"),
+    vs: str = Query("usd", description="Divisa de referencia"),
+    interval: Literal["1h", "4h", "1d"] = Query("1h", description="Duracion de cada vela"),
+    limit: int = Query(200, ge=1, le=1000, description="Numero de velas (las mas recientes)"),
+) -> Response:
+    """Velas OHLC calculadas en PostgreSQL a partir de snapshots, series y agregados."""
+    try:
+        has_data = await ensure_recent_market_data_async(vs_currency=vs)
+        if not has_data:
+            raise HTTPException(
+                status_code=503,
+                detail="No hay datos sincronizados. Ejecuta la actualizacion manual antes de consultar las velas.",
+            )
+        vs = vs.lower()
+
+        def render() -> bytes:
+            raw = get_coin_candles(coin_id, vs_currency=vs, interval=interval, limit=limit)
+            return CoinCandles(**raw).model_dump_json().encode()
+
+        async def render_async() -> bytes:
+            raw = await get_coin_candles_async(coin_id, vs_currency=vs, interval=interval, limit=limit)
+            return CoinCandles(**raw).model_dump_json().encode()
+
+        body = await resolve_json("candles", (coin_id, vs, interval, limit), render, render_async)
+        return Response(content=body, media_type="application/json")
     except HTTPException:
         raise
     except ValueError as exc:
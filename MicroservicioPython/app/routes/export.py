@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from ..services.export import EXPORT_MEDIA_TYPES, ExportFormatUnavailable, prepare_export, stream_export
+
+ExportFormat = Literal["csv", "ndjson", "arrow", "parquet"]
+
+router = APIRouter()
+
+
+def _export(
+    kind: str,
+    ids: Optional[str],
+    vs: Optional[str],
+    start: Optional[datetime],
+    end: Optional[datetime],
+    fmt: str,
+) -> StreamingResponse:
+    coin_ids = [coin_id.strip().lower() for coin_id in ids.split(",") if coin_id.strip()] if ids else None
+    try:
+        stmt, names = prepare_export(kind, fmt, coin_ids=coin_ids, vs_currency=vs, start=start, end=end)
+    except ExportFormatUnavailable as exc:
+        raise HTTPException(status_code=501, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+    extension = "arrows" if fmt == "arrow" else fmt
+    return StreamingResponse(
+        stream_export(stmt, names, kind, fmt),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{kind}.{extension}"'},
+    )
+
+
+@router.get("/export/series")
+def export_series(
+    ids: Optional[str] = Query(None, description="Identificadores (CoinGecko) separados por comas; por defecto todas"),
+    vs: Optional[str] = Query(None, description="Divisa de referencia; por defecto todas"),
+    start: Optional[datetime] = Query(None, description="Inicio del rango (incluido, UTC si no lleva zona)"),
+    end: Optional[datetime] = Query(None, description="Fin del rango (excluido, UTC si no lleva zona)"),
+    format: ExportFormat = Query("csv", description="csv, ndjson, arrow (IPC stream) o parquet"),
+) -> StreamingResponse:
+    """Exporta ``coin_series`` en streaming, sin limite de filas."""
+    return _export("series", ids, vs, start, end, format)
+
+
+@router.get("/export/snapshots")
+def export_snapshots(
+    ids: Optional[str] = Query(None, description="Identificadores (CoinGecko) separados por comas; por defecto todas"),
+    vs: Optional[str] = Query(None, description="Divisa de referencia; por defecto todas"),
+    start: Optional[datetime] = Query(None, description="Inicio del rango (incluido, UTC si no lleva zona)"),
+    end: Optional[datetime] = Query(None, description="Fin del rango (excluido, UTC si no lleva zona)"),
+    format: ExportFormat = Query("csv", description="csv, ndjson, arrow (IPC stream) o parquet"),
+) -> StreamingResponse:
+    """Exporta ``coin_snapshots`` en streaming, sin limite de filas."""
+    return _export("snapshots", ids, vs, start, end, format)
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Dict
+
+from fastapi import APIRouter, HTTPException, Path
+
+from ..db import pool_stats
+from ..services.candles import get_candle_cache
+from ..services.correlation import get_correlation_cache
+from ..services.external import get_external_cache
+from ..services.freshness import get_registry
+from ..services.http_client import get_client
+from ..services.stream import get_broadcaster
+from ..services.response_cache import current_generation, current_history_generation, get_response_cache
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+
+def _sections() -> Dict[str, Callable[[], Dict[str, Any]]]:
+    return {
+        "coingecko": lambda: get_client().stats(),
+        "external_cache": lambda: get_external_cache().stats(),
+        "response_cache": lambda: dict(
+            get_response_cache().stats(),
+            generation=current_generation(),
+            history_generation=current_history_generation(),
+        ),
+        "candle_cache": lambda: get_candle_cache().stats(),
+        "correlation_cache": lambda: get_correlation_cache().stats(),
+        "freshness": lambda: get_registry().snapshot(),
+        "stream": lambda: get_broadcaster().stats(),
+        "db_pool": pool_stats,
+    }
+
+
+@router.get("/metrics")
+def get_metrics() -> Dict[str, Any]:
+    """Devuelve las metricas internas del microservicio agrupadas por componente."""
+    return {name: collect() for name, collect in _sections().items()}
+
+
+@router.get("/metrics/{section}")
+def get_metrics_section(
+    section: str = Path(..., description="Componente a consultar"),
+) -> Dict[str, Any]:
+    collect = _sections().get(section)
+    if collect is None:
+        raise HTTPException(status_code=404, detail="Seccion de metricas no encontrada")
+    return collect()
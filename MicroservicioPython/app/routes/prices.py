@@ -2,29 +2,47 @@ from __future__ import annotations
 
 from typing import List
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 
 from ..schemas import PriceItem
-from ..services import ensure_recent_market_data, get_latest_prices
+from ..services import ensure_recent_market_data_async, get_latest_prices, get_latest_prices_async
+from ..services.conditional import conditional_headers, is_not_modified
+from ..services.encoding import dumps, json_response, negotiate_encoding
+from ..services.response_cache import resolve_json
 
 router = APIRouter()
 
 
 @router.get("/prices", response_model=List[PriceItem])
-def list_prices(
+async def list_prices(
+    request: Request,
     vs: str = Query("usd", description="Divisa de referencia"),
     per_page: int = Query(50, ge=1, le=250, description="Resultados por pagina"),
     page: int = Query(1, ge=1, description="Numero de pagina"),
-) -> List[PriceItem]:
+) -> Response:
     try:
-        has_data = ensure_recent_market_data(vs_currency=vs)
+        has_data = await ensure_recent_market_data_async(vs_currency=vs)
         if not has_data:
             raise HTTPException(
                 status_code=503,
                 detail="No hay datos sincronizados. Ejecuta la actualizacion manual antes de consultar precios.",
             )
-        data = get_latest_prices(vs_currency=vs, per_page=per_page, page=page)
-        return [PriceItem(**item) for item in data]
+        vs = vs.lower()
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+        headers = conditional_headers("prices", (vs, per_page, page), vs, encoding)
+        if is_not_modified(request, headers):
+            return Response(status_code=304, headers=headers)
+
+        # ``get_latest_prices`` ya devuelve los campos de ``PriceItem`` con sus
+        # tipos finales: se serializa directamente, sin validar con Pydantic.
+        def render() -> bytes:
+            return dumps(get_latest_prices(vs_currency=vs, per_page=per_page, page=page))
+
+        async def render_async() -> bytes:
+            return dumps(await get_latest_prices_async(vs_currency=vs, per_page=per_page, page=page))
+
+        body = await resolve_json("prices", (vs, per_page, page), render, render_async, encoding)
+        return json_response(body, headers, encoding)
     except HTTPException:
         raise
     except Exception as exc:
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import asyncio
+from typing import AsyncIterator
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from ..config import get_settings
+from ..services.stream import StreamUnavailable, Subscription, get_broadcaster
+
+router = APIRouter()
+
+
+async def _events(subscription: Subscription, keepalive: float) -> AsyncIterator[bytes]:
+    broadcaster = get_broadcaster()
+    try:
+        yield b"retry: 5000\n\n"
+        while True:
+            try:
+                frame = await asyncio.wait_for(subscription.get(), timeout=keepalive)
+            except asyncio.TimeoutError:
+                # Comentario SSE: mantiene viva la conexion a traves de proxies.
+                yield b": keep-alive\n\n"
+                continue
+            if frame is None:
+                break
+            yield frame
+    finally:
+        broadcaster.unsubscribe(subscription)
+
+
+@router.get("/stream/prices")
+async def stream_prices(vs: str = Query("usd", description="Divisa de referencia")) -> StreamingResponse:
+    """Server-Sent Events: un evento ``snapshot`` con todos los precios y despues ``prices`` con los que cambian."""
+    try:
+        subscription = await get_broadcaster().subscribe(vs.lower())
+    except StreamUnavailable as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+    return StreamingResponse(
+        _events(subscription, get_settings().stream_keepalive_seconds),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache, no-transform", "X-Accel-Buffering": "no"},
+    )
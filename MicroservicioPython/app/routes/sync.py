@@ -1,13 +1,20 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
-from typing import List, Optional
+from typing import Any, Dict, List, Literal, Optional
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, status
 from pydantic import BaseModel, Field
 
 from ..config import get_settings
-from ..services import sync_market_data, sync_historical_series
+from ..services import (
+    backfill_coin_descriptions,
+    compact_snapshots,
+    recompute_indicator_states,
+    sync_market_data,
+    sync_historical_series,
+)
+from ..services.partitions import maintain_snapshot_partitions
 
 
 class SyncRequest(BaseModel):
@@ -17,6 +24,11 @@ class SyncRequest(BaseModel):
     days: Optional[int] = Field(None, ge=1, le=365, description="Ventana de dias para la sincronizacion historica")
     coin_id: Optional[str] = Field(None, description="Identificador (CoinGecko) de la moneda a sincronizar")
     coin_ids: Optional[List[str]] = Field(None, description="Lista de monedas a sincronizar")
+    limit: Optional[int] = Field(None, ge=1, le=1000, description="Maximo de monedas a completar con descripcion")
+    mode: Literal["incremental", "full"] = Field(
+        "incremental",
+        description="Series: 'incremental' anade solo los puntos nuevos, 'full' reescribe la ventana completa",
+    )
 
 
 class SyncResponse(BaseModel):
@@ -72,7 +84,12 @@ def trigger_sync_series(payload: SyncRequest) -> SyncResponse:
         coin_filter = [payload.coin_id]
 
     try:
-        processed, coins, coin_ids = sync_historical_series(vs_currency=vs, days=target_days, coin_ids=coin_filter)
+        processed, coins, coin_ids = sync_historical_series(
+            vs_currency=vs,
+            days=target_days,
+            coin_ids=coin_filter,
+            mode=payload.mode,
+        )
     except Exception as exc:  # pragma: no cover
         raise HTTPException(status_code=502, detail=str(exc)) from exc
 
@@ -85,3 +102,52 @@ def trigger_sync_series(payload: SyncRequest) -> SyncResponse:
         coins=coins,
         coin_ids=coin_ids,
     )
+
+
+@router.post("/admin/sync-descriptions", response_model=SyncResponse, status_code=status.HTTP_202_ACCEPTED)
+def trigger_sync_descriptions(payload: SyncRequest) -> SyncResponse:
+    """Completa las descripciones pendientes (monedas con description a NULL)."""
+    settings = get_settings()
+    limit = payload.limit or settings.sync_description_limit
+
+    try:
+        processed = backfill_coin_descriptions(limit=limit)
+    except Exception as exc:  # pragma: no cover
+        raise HTTPException(status_code=502, detail=str(exc)) from exc
+
+    return SyncResponse(
+        processed=processed,
+        vs_currency=settings.sync_vs_currency,
+        per_page=limit,
+        pages=1,
+        synced_at=datetime.now(timezone.utc),
+    )
+
+
+@router.post("/admin/maintenance/partitions")
+def trigger_partition_maintenance() -> Dict[str, List[str]]:
+    """Crea las particiones futuras de coin_snapshots y elimina las caducadas segun la retencion."""
+    try:
+        return maintain_snapshot_partitions()
+    except Exception as exc:  # pragma: no cover
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+
+@router.post("/admin/maintenance/compaction")
+def trigger_compaction() -> Dict[str, Any]:
+    """Borra los snapshots ya agregados y compacta los buckets horarios antiguos en diarios."""
+    try:
+        return compact_snapshots()
+    except Exception as exc:  # pragma: no cover
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+
+@router.post("/admin/maintenance/indicators")
+def trigger_indicator_recompute(
+    vs_currency: Optional[str] = Query(None, description="Divisa a recalcular (por defecto todas)"),
+) -> Dict[str, int]:
+    """Reconstruye el estado de los indicadores tecnicos desde los snapshots almacenados."""
+    try:
+        return {"states": recompute_indicator_states(vs_currency=vs_currency)}
+    except Exception as exc:  # pragma: no cover
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+from typing import Dict, List
+
+from pydantic import BaseModel, Field
+
+from .AnalysisResult import AnalysisResult
+
+
+class AnalysisBatchResult(BaseModel):
+    results: List[AnalysisResult] = Field(default_factory=list, description="KPIs de cada simbolo analizado")
+    errors: Dict[str, str] = Field(
+        default_factory=dict, description="Simbolos sin resultado y el motivo (sin datos, sin snapshots recientes)"
+    )
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class Candle(BaseModel):
+    time: int = Field(..., description="Inicio del intervalo (epoch en milisegundos, UTC)")
+    open: float = Field(..., description="Primer precio del intervalo")
+    high: float = Field(..., description="Precio maximo del intervalo")
+    low: float = Field(..., description="Precio minimo del intervalo")
+    close: float = Field(..., description="Ultimo precio del intervalo")
+    volume: Optional[float] = Field(None, description="Volumen medio de 24h reportado en el intervalo")
+
+
+class CoinCandles(BaseModel):
+    id: str
+    symbol: str
+    vs_currency: str
+    interval: str = Field(..., description="Duracion de cada vela (1h, 4h o 1d)")
+    candles: List[Candle] = Field(default_factory=list)
@@ -16,4 +16,15 @@ class CoinDetail(BaseModel):
     price_change_percentage_1h: Optional[float] = None
     price_change_percentage_24h: Optional[float] = None
     price_change_percentage_7d: Optional[float] = None
-    prices_series: List[List[float]] = Field(default_factory=list)
\ No newline at end of file
+    prices_series: List[List[float]] = Field(default_factory=list)
+
+
+class ColumnarSeries(BaseModel):
+    start: Optional[int] = Field(None, description="Epoch en milisegundos del primer punto")
+    step: Optional[int] = Field(None, description="Separacion fija entre puntos en ms, si es uniforme")
+    deltas: Optional[List[int]] = Field(None, description="Diferencia en ms con el punto anterior cuando no hay 'step'")
+    prices: List[float] = Field(default_factory=list)
+
+
+class CoinDetailColumnar(CoinDetail):
+    prices_series: ColumnarSeries = Field(default_factory=ColumnarSeries)
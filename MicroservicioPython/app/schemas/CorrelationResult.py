@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class CorrelationResult(BaseModel):
+    vs_currency: str
+    days: int = Field(..., description="Ventana solicitada (dias)")
+    interval: str = Field(..., description="Paso de la rejilla comun (1h o 1d)")
+    start: datetime = Field(..., description="Inicio de la ventana comun a todas las monedas")
+    end: datetime = Field(..., description="Ultimo intervalo con datos")
+    observations: int = Field(..., description="Numero de rendimientos usados por moneda")
+    benchmark: Optional[str] = Field(None, description="Moneda de referencia para las betas")
+    ids: List[str] = Field(default_factory=list, description="Orden de filas y columnas de las matrices")
+    volatility: List[float] = Field(default_factory=list, description="Desviacion de los rendimientos logaritmicos por intervalo")
+    correlation: List[List[Optional[float]]] = Field(default_factory=list, description="Correlacion de Pearson entre rendimientos")
+    beta: List[List[Optional[float]]] = Field(
+        default_factory=list, description="beta[i][j]: sensibilidad de la moneda i a la moneda j"
+    )
+    benchmark_beta: Dict[str, Optional[float]] = Field(default_factory=dict, description="Beta de cada moneda frente a la referencia")
+    excluded: Dict[str, str] = Field(default_factory=dict, description="Monedas descartadas y motivo")
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class IndicatorResult(BaseModel):
+    symbol: str = Field(..., description="Ticker analizado")
+    vs_currency: str = Field(..., description="Divisa de referencia")
+    last_price: float = Field(..., description="Precio del ultimo snapshot incorporado")
+    last_updated: datetime = Field(..., description="Marca temporal del ultimo snapshot incorporado")
+    sample_count: int = Field(..., description="Numero de snapshots acumulados en el estado")
+    ema_fast: Optional[float] = Field(None, description="EMA de 12 snapshots")
+    ema_slow: Optional[float] = Field(None, description="EMA de 26 snapshots")
+    macd: Optional[float] = Field(None, description="MACD (EMA 12 - EMA 26)")
+    macd_signal: Optional[float] = Field(None, description="Senal del MACD (EMA 9 del MACD)")
+    macd_histogram: Optional[float] = Field(None, description="MACD menos su senal")
+    rsi: Optional[float] = Field(None, description="RSI de Wilder de 14 periodos")
+    bollinger_middle: Optional[float] = Field(None, description="Media de los ultimos 20 precios")
+    bollinger_upper: Optional[float] = Field(None, description="Banda superior (media + 2 desviaciones)")
+    bollinger_lower: Optional[float] = Field(None, description="Banda inferior (media - 2 desviaciones)")
+    bollinger_percent_b: Optional[float] = Field(None, description="Posicion del precio entre las bandas (%B)")
+    bollinger_bandwidth: Optional[float] = Field(None, description="Anchura relativa de las bandas")
+    atr: Optional[float] = Field(None, description="Rango medio de Wilder de 14 periodos entre snapshots")
+    atr_pct: Optional[float] = Field(None, description="ATR como porcentaje del ultimo precio")
@@ -1,19 +1,26 @@
 """Modelos Pydantic utilizados para serializar y validar las respuestas.
 
-Este paquete expone los modelos ``PriceItem``, ``CoinDetail`` y ``AnalysisResult``
+Este paquete expone los modelos ``PriceItem``, ``CoinDetail``, ``CoinDetailColumnar``, ``CoinCandles``, ``AnalysisResult``, ``AnalysisBatchResult``,
+``IndicatorResult`` y ``CorrelationResult``
 para que se puedan importar fácilmente desde ``app.schemas``.  En particular,
 algunos módulos de rutas utilizan ``from ..schemas import PriceItem`` para
 referenciar el modelo de respuesta.  Sin este archivo de inicialización,
 ``app.schemas`` se consideraría un paquete implícito sin atributos y la
 importación fallaría.
 
-Cada modelo se define en su propio módulo (``PriceItem.py``, ``CoinDetail.py``
-y ``AnalysisResult.py``).  Aquí los volvemos a exportar y declaramos
+Cada modelo se define en su propio módulo (``PriceItem.py``, ``CoinDetail.py``,
+``CoinCandles.py``, ``AnalysisResult.py``,
+``AnalysisBatchResult.py``, ``IndicatorResult.py`` y
+``CorrelationResult.py``).  Aquí los volvemos a exportar y declaramos
 ``__all__`` para documentar la API pública del paquete.
 """
 
 from .PriceItem import PriceItem
-from .CoinDetail import CoinDetail
+from .CoinDetail import CoinDetail, CoinDetailColumnar, ColumnarSeries
+from .CoinCandles import Candle, CoinCandles
 from .AnalysisResult import AnalysisResult
+from .AnalysisBatchResult import AnalysisBatchResult
+from .IndicatorResult import IndicatorResult
+from .CorrelationResult import CorrelationResult
 
-__all__ = ["PriceItem", "CoinDetail", "AnalysisResult"]
+__all__ = ["PriceItem", "CoinDetail", "CoinDetailColumnar", "ColumnarSeries", "Candle", "CoinCandles", "AnalysisResult", "AnalysisBatchResult", "IndicatorResult", "CorrelationResult"]
@@ -10,12 +10,31 @@ exportar aquí para simplificar las importaciones en los módulos de rutas.
 """
 
 from .external import fetch_prices
-from .market import get_latest_prices, get_coin_detail_from_db
-from .analytics import analyse_symbol, MarketDataUnavailable
+from .market import (
+    get_latest_prices,
+    get_latest_prices_async,
+    get_coin_detail_from_db,
+    get_coin_detail_from_db_async,
+)
+from .candles import get_coin_candles, get_coin_candles_async
+from .analytics import (
+    analyse_symbol,
+    analyse_symbol_async,
+    analyse_symbols,
+    analyse_symbols_async,
+    symbol_indicators,
+    symbol_indicators_async,
+    MarketDataUnavailable,
+)
+from .indicators import recompute_indicator_states
+from .correlation import get_correlation_matrix, get_correlation_matrix_async
 from .sync import (
     sync_market_data,
     sync_historical_series,
+    backfill_coin_descriptions,
+    compact_snapshots,
     ensure_recent_market_data,
+    ensure_recent_market_data_async,
     start_background_sync,
     stop_background_sync,
     ensure_initial_sync,
@@ -24,12 +43,27 @@ from .sync import (
 __all__ = [
     "fetch_prices",
     "get_latest_prices",
+    "get_latest_prices_async",
     "get_coin_detail_from_db",
+    "get_coin_detail_from_db_async",
+    "get_coin_candles",
+    "get_coin_candles_async",
     "analyse_symbol",
+    "analyse_symbol_async",
+    "analyse_symbols",
+    "analyse_symbols_async",
+    "symbol_indicators",
+    "symbol_indicators_async",
+    "recompute_indicator_states",
+    "get_correlation_matrix",
+    "get_correlation_matrix_async",
     "MarketDataUnavailable",
     "sync_market_data",
     "sync_historical_series",
+    "backfill_coin_descriptions",
+    "compact_snapshots",
     "ensure_recent_market_data",
+    "ensure_recent_market_data_async",
     "start_background_sync",
     "stop_background_sync",
     "ensure_initial_sync",
@@ -1,68 +1,114 @@
 from __future__ import annotations
 
-import statistics
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict
+from typing import Any, Dict, List, Sequence
 
 from sqlalchemy import select
+from sqlalchemy.orm import Session
 
-from ..db import session_scope
-from ..models import Coin, CoinSnapshot
-from .sync import ensure_recent_market_data
+from ..db import async_session_scope, session_scope
+from ..models import Coin, CoinIndicatorState, CoinLatest
+from .indicators import indicators_from_state, state_values
+from .rollups import window_stats, window_stats_many
+from .sync import ensure_recent_market_data, ensure_recent_market_data_async
 
 
 class MarketDataUnavailable(Exception):
     """Se lanza cuando no hay snapshots recientes y se requiere una sincronizacion previa."""
 
 
-def analyse_symbol(symbol: str, vs_currency: str = "usd", days: int = 7) -> Dict[str]:
-    """Calcula KPIs basicos para una moneda a partir de los snapshots almacenados."""
+def _normalize(symbol: str, vs_currency: str) -> tuple[str, str]:
     symbol_norm = symbol.strip().upper()
     if not symbol_norm:
         raise ValueError("El simbolo no puede estar vacio")
+    return symbol_norm, vs_currency.lower()
+
 
-    vs = vs_currency.lower()
-    has_data = ensure_recent_market_data(vs_currency=vs)
+def _require_data(has_data: bool) -> None:
     if not has_data:
         raise MarketDataUnavailable(
             "No hay datos sincronizados para el simbolo solicitado. Ejecuta la actualizacion manual."
         )
 
+
+def _prepare(symbol: str, vs_currency: str) -> tuple[str, str]:
+    """Normaliza simbolo y divisa y comprueba que haya datos frescos."""
+    symbol_norm, vs = _normalize(symbol, vs_currency)
+    _require_data(ensure_recent_market_data(vs_currency=vs))
+    return symbol_norm, vs
+
+
+async def _prepare_async(symbol: str, vs_currency: str) -> tuple[str, str]:
+    """Como ``_prepare`` pero sin bloquear el event loop."""
+    symbol_norm, vs = _normalize(symbol, vs_currency)
+    _require_data(await ensure_recent_market_data_async(vs_currency=vs))
+    return symbol_norm, vs
+
+
+def analyse_symbol(symbol: str, vs_currency: str = "usd", days: int = 7) -> Dict[str]:
+    """Calcula KPIs basicos para una moneda a partir de los snapshots almacenados.
+
+    Media, extremos, volatilidad y precio de apertura de la ventana se
+    combinan desde los agregados horarios y diarios (ver ``rollup_source``),
+    de modo que la ventana no depende de que sigan existiendo los snapshots
+    en bruto; el ultimo valor se lee de ``coin_latest``.
+    """
+    symbol_norm, vs = _prepare(symbol, vs_currency)
     with session_scope() as session:
-        coin = (
-            session.execute(select(Coin).where(Coin.symbol == symbol_norm))
-            .scalar_one_or_none()
-        )
-        if coin is None:
-            raise ValueError(f"No hay datos almacenados para el simbolo {symbol_norm}")
-
-        since = datetime.now(timezone.utc) - timedelta(days=days)
-        snapshots = (
-            session.execute(
-                select(CoinSnapshot)
-                .where(CoinSnapshot.coin_id == coin.id)
-                .where(CoinSnapshot.vs_currency == vs)
-                .where(CoinSnapshot.recorded_at >= since)
-                .order_by(CoinSnapshot.recorded_at.asc())
-            )
-            .scalars()
-            .all()
-        )
+        return _analyse(session, symbol_norm, vs, days)
+
+
+async def analyse_symbol_async(symbol: str, vs_currency: str = "usd", days: int = 7) -> Dict[str, Any]:
+    """Variante asincrona de ``analyse_symbol`` sobre el motor ``asyncpg``."""
+    symbol_norm, vs = await _prepare_async(symbol, vs_currency)
+    async with async_session_scope() as session:
+        return await session.run_sync(_analyse, symbol_norm, vs, days)
+
+
+def _coins_by_symbol(session: Session, symbols_norm: Sequence[str]) -> Dict[str, Coin]:
+    """Moneda de cada simbolo; si varias lo comparten, la de mayor capitalizacion."""
+    coins: Dict[str, Coin] = {}
+    for coin in session.execute(
+        select(Coin)
+        .where(Coin.symbol.in_(symbols_norm))
+        .order_by(Coin.market_cap_rank.asc().nulls_last(), Coin.id.asc())
+    ).scalars():
+        coins.setdefault(coin.symbol, coin)
+    return coins
+
 
-    if not snapshots:
+def _analyse(session: Session, symbol_norm: str, vs: str, days: int) -> Dict[str, Any]:
+    coin = _coins_by_symbol(session, [symbol_norm]).get(symbol_norm)
+    if coin is None:
+        raise ValueError(f"No hay datos almacenados para el simbolo {symbol_norm}")
+
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    last_snapshot = session.get(CoinLatest, (coin.id, vs))
+    stats = window_stats(session, coin.id, vs, hours=days * 24)
+    return _kpis(symbol_norm, vs, days, since, last_snapshot, stats)
+
+
+def _kpis(
+    symbol_norm: str,
+    vs: str,
+    days: int,
+    since: datetime,
+    last_snapshot: CoinLatest | None,
+    stats: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Construye el resultado del analisis a partir del ultimo snapshot y las estadisticas de la ventana."""
+    if last_snapshot is None or last_snapshot.recorded_at < since or not stats["sample_size"]:
         raise ValueError(f"No hay snapshots recientes para {symbol_norm} en {vs}")
 
-    prices = [float(s.price) for s in snapshots if s.price is not None]
-    last_snapshot = snapshots[-1]
     last_price = float(last_snapshot.price) if last_snapshot.price is not None else None
     change_24h = float(last_snapshot.change_24h) if last_snapshot.change_24h is not None else None
     change_7d = float(last_snapshot.change_7d) if last_snapshot.change_7d is not None else None
-    avg_price = sum(prices) / len(prices) if prices else None
-    min_price = min(prices) if prices else None
-    max_price = max(prices) if prices else None
-    volatility = statistics.pstdev(prices) if len(prices) > 1 else 0.0 if prices else None
+    avg_price = float(stats["average_price"]) if stats["average_price"] is not None else None
+    min_price = float(stats["min_price"]) if stats["min_price"] is not None else None
+    max_price = float(stats["max_price"]) if stats["max_price"] is not None else None
+    volatility = float(stats["volatility"]) if stats["volatility"] is not None else None
 
-    first_price = prices[0] if prices else None
+    first_price = float(stats["first_price"]) if stats["first_price"] is not None else None
     trend = "sin datos"
     variation_pct = None
     if first_price and last_price and first_price != 0:
@@ -86,7 +132,94 @@ def analyse_symbol(symbol: str, vs_currency: str = "usd", days: int = 7) -> Dict
         "change_24h": change_24h,
         "change_7d": change_7d,
         "last_updated": last_snapshot.recorded_at,
-        "sample_size": len(prices),
+        "sample_size": stats["sample_size"],
         "period_days": days,
         "vs_currency": vs,
     }
+
+
+def analyse_symbols(symbols: Sequence[str], vs_currency: str = "usd", days: int = 7) -> Dict[str, Any]:
+    """Analiza varias monedas a la vez con un numero fijo de consultas.
+
+    Devuelve ``{"results": [...], "errors": {simbolo: motivo}}``; los
+    resultados siguen el orden de ``symbols`` y tienen el mismo formato que
+    ``analyse_symbol``.
+    """
+    symbols_norm, vs = _prepare_many(symbols, vs_currency)
+    with session_scope() as session:
+        return _analyse_many(session, symbols_norm, vs, days)
+
+
+async def analyse_symbols_async(symbols: Sequence[str], vs_currency: str = "usd", days: int = 7) -> Dict[str, Any]:
+    """Variante asincrona de ``analyse_symbols`` sobre el motor ``asyncpg``."""
+    symbols_norm = _normalize_many(symbols)
+    _, vs = await _prepare_async(symbols_norm[0], vs_currency)
+    async with async_session_scope() as session:
+        return await session.run_sync(_analyse_many, symbols_norm, vs, days)
+
+
+def _normalize_many(symbols: Sequence[str]) -> List[str]:
+    symbols_norm = list(dict.fromkeys(symbol.strip().upper() for symbol in symbols if symbol.strip()))
+    if not symbols_norm:
+        raise ValueError("La lista de simbolos no puede estar vacia")
+    return symbols_norm
+
+
+def _prepare_many(symbols: Sequence[str], vs_currency: str) -> tuple[List[str], str]:
+    symbols_norm = _normalize_many(symbols)
+    _, vs = _prepare(symbols_norm[0], vs_currency)
+    return symbols_norm, vs
+
+
+def _analyse_many(session: Session, symbols_norm: List[str], vs: str, days: int) -> Dict[str, Any]:
+    coins = _coins_by_symbol(session, symbols_norm)
+    coin_ids = [coin.id for coin in coins.values()]
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    latest = session.execute(
+        select(CoinLatest).where(CoinLatest.coin_id.in_(coin_ids), CoinLatest.vs_currency == vs)
+    ).scalars()
+    latest_by_coin = {row.coin_id: row for row in latest}
+    stats = window_stats_many(session, coin_ids, vs, hours=days * 24)
+
+    results: List[Dict[str, Any]] = []
+    errors: Dict[str, str] = {}
+    for symbol_norm in symbols_norm:
+        coin = coins.get(symbol_norm)
+        if coin is None:
+            errors[symbol_norm] = f"No hay datos almacenados para el simbolo {symbol_norm}"
+            continue
+        try:
+            results.append(_kpis(symbol_norm, vs, days, since, latest_by_coin.get(coin.id), stats[coin.id]))
+        except ValueError as exc:
+            errors[symbol_norm] = str(exc)
+    return {"results": results, "errors": errors}
+
+
+def symbol_indicators(symbol: str, vs_currency: str = "usd") -> Dict[str, Any]:
+    """Devuelve EMA, MACD, RSI, Bollinger y ATR de una moneda.
+
+    Los valores se leen del estado incremental que mantiene la
+    sincronizacion (``coin_indicator_state``), sin recorrer el historico.
+    """
+    symbol_norm, vs = _prepare(symbol, vs_currency)
+    with session_scope() as session:
+        return _indicators(session, symbol_norm, vs)
+
+
+async def symbol_indicators_async(symbol: str, vs_currency: str = "usd") -> Dict[str, Any]:
+    """Variante asincrona de ``symbol_indicators`` sobre el motor ``asyncpg``."""
+    symbol_norm, vs = await _prepare_async(symbol, vs_currency)
+    async with async_session_scope() as session:
+        return await session.run_sync(_indicators, symbol_norm, vs)
+
+
+def _indicators(session: Session, symbol_norm: str, vs: str) -> Dict[str, Any]:
+    coin = _coins_by_symbol(session, [symbol_norm]).get(symbol_norm)
+    if coin is None:
+        raise ValueError(f"No hay datos almacenados para el simbolo {symbol_norm}")
+
+    state = session.get(CoinIndicatorState, (coin.id, vs))
+    if state is None:
+        raise ValueError(f"No hay indicadores calculados para {symbol_norm} en {vs}")
+    values = indicators_from_state(state_values(state))
+    return dict(values, symbol=symbol_norm, vs_currency=vs)
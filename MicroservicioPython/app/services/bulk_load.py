@@ -0,0 +1,279 @@
+"""Carga masiva de ``coin_series`` y ``coin_snapshots`` mediante ``COPY``.
+
+Las filas se vuelcan en streaming a una tabla temporal con ``copy_expert`` y
+despues se fusionan en la tabla destino con ``INSERT ... SELECT ... ON
+CONFLICT DO NOTHING``, de modo que recargar el mismo fichero es idempotente.
+No se construyen objetos ORM ni ``Decimal``: los valores viajan como texto y
+PostgreSQL los convierte directamente a ``numeric``.
+
+Uso desde linea de comandos para cargar volcados archivados::
+
+    python -m app.services.bulk_load series historico.ndjson --vs usd
+    python -m app.services.bulk_load snapshots snapshots.csv.gz
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import gzip
+import io
+import itertools
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterable, Iterator, Mapping, Sequence
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from ..db import session_scope
+from ..models import Coin
+from .freshness import publish_change, publish_latest
+from .partitions import MissingSnapshotPartitions, ensure_snapshot_partitions, require_snapshot_partitions
+from .rollups import ROLLUP_UPSERT_SQL
+
+logger = logging.getLogger(__name__)
+
+SERIES_COLUMNS = ("coin_id", "vs_currency", "recorded_at", "price")
+SNAPSHOT_COLUMNS = (
+    "coin_id",
+    "vs_currency",
+    "recorded_at",
+    "price",
+    "market_cap",
+    "total_volume",
+    "change_1h",
+    "change_24h",
+    "change_7d",
+    "ath",
+)
+
+
+class _CsvStream(io.RawIOBase):
+    """Fichero de solo lectura que codifica filas CSV bajo demanda para ``COPY``."""
+
+    def __init__(self, rows: Iterable[Sequence[Any]], chunk_rows: int = 2000) -> None:
+        self._rows = iter(rows)
+        self._chunk_rows = chunk_rows
+        self._buffer = b""
+        self.rows_written = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def _fill(self) -> bool:
+        out = io.StringIO()
+        writer = csv.writer(out, lineterminator="\n")
+        chunk = list(itertools.islice(self._rows, self._chunk_rows))
+        if not chunk:
+            return False
+        writer.writerows(chunk)
+        self.rows_written += len(chunk)
+        self._buffer += out.getvalue().encode("utf-8")
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        while (size < 0 or len(self._buffer) < size) and self._fill():
+            pass
+        if size < 0:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def _copy_merge(
+    session: Session,
+    table: str,
+    columns: Sequence[str],
+    constraint: str,
+    rows: Iterable[Sequence[Any]],
+    post_merge: Sequence[str] = (),
+    on_inserted: str | None = None,
+    prepare: Callable[[Session, str], None] | None = None,
+) -> int:
+    """Copia ``rows`` a una tabla temporal y las fusiona en ``table``.
+
+    ``post_merge`` son sentencias adicionales que se ejecutan mientras la
+    tabla temporal existe (``{stage}`` se sustituye por su nombre).
+    ``on_inserted`` es una sentencia que se encadena al ``INSERT`` como CTE y
+    recibe solo las filas realmente insertadas (``{inserted}``).  ``prepare``
+    se invoca con la tabla temporal ya cargada y antes de la fusion.
+    Devuelve el numero de filas realmente insertadas (sin contar duplicados).
+    """
+    stage = f"_stage_{table}"
+    column_list = ", ".join(columns)
+    cursor = session.connection().connection.driver_connection.cursor()
+    try:
+        cursor.execute(f"DROP TABLE IF EXISTS {stage}")
+        cursor.execute(
+            f"CREATE TEMP TABLE {stage} ON COMMIT DROP AS "
+            f"SELECT {column_list} FROM {table} WITH NO DATA"
+        )
+        cursor.copy_expert(f"COPY {stage} ({column_list}) FROM STDIN WITH (FORMAT csv)", _CsvStream(rows))
+        if prepare is not None:
+            prepare(session, stage)
+        merge = (
+            f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {stage} "
+            f"ON CONFLICT ON CONSTRAINT {constraint} DO NOTHING"
+        )
+        if on_inserted is None:
+            cursor.execute(merge)
+            inserted = cursor.rowcount
+        else:
+            cursor.execute(
+                f"WITH inserted AS ({merge} RETURNING {column_list}), "
+                f"chained AS ({on_inserted.format(inserted='inserted')}) "
+                "SELECT count(*) FROM inserted"
+            )
+            inserted = cursor.fetchone()[0]
+        for statement in post_merge:
+            cursor.execute(statement.format(stage=stage))
+        cursor.execute(f"DROP TABLE {stage}")
+    finally:
+        cursor.close()
+    return inserted
+
+
+_LATEST_COLUMNS = tuple(column for column in SNAPSHOT_COLUMNS if column not in ("coin_id", "vs_currency"))
+
+# Propaga a coin_latest el snapshot mas reciente de cada moneda cargada.
+_REFRESH_LATEST = (
+    "INSERT INTO coin_latest (" + ", ".join(SNAPSHOT_COLUMNS) + ", market_cap_rank) "
+    "SELECT DISTINCT ON (s.coin_id, s.vs_currency) "
+    + ", ".join(f"s.{column}" for column in SNAPSHOT_COLUMNS)
+    + ", c.market_cap_rank FROM {stage} s JOIN coins c ON c.id = s.coin_id "
+    "ORDER BY s.coin_id, s.vs_currency, s.recorded_at DESC "
+    "ON CONFLICT (coin_id, vs_currency) DO UPDATE SET "
+    + ", ".join(f"{column} = EXCLUDED.{column}" for column in _LATEST_COLUMNS)
+    + " WHERE coin_latest.recorded_at <= EXCLUDED.recorded_at"
+)
+
+
+def _check_snapshot_partitions(session: Session, stage: str) -> None:
+    """Exige que existan las particiones mensuales que cubren el rango de fechas cargado."""
+    first, last = session.execute(text(f"SELECT min(recorded_at), max(recorded_at) FROM {stage}")).one()
+    if first is not None:
+        require_snapshot_partitions(session, first, last)
+
+
+def _as_tuples(rows: Iterable[Mapping[str, Any] | Sequence[Any]], columns: Sequence[str]) -> Iterator[Sequence[Any]]:
+    for row in rows:
+        if isinstance(row, Mapping):
+            yield tuple(row.get(column) for column in columns)
+        else:
+            yield row
+
+
+def copy_series(session: Session, rows: Iterable[Mapping[str, Any] | Sequence[Any]]) -> int:
+    """Carga puntos de serie (dicts o tuplas en el orden de ``SERIES_COLUMNS``)."""
+    return _copy_merge(session, "coin_series", SERIES_COLUMNS, "uq_series_coin_vs_ts", _as_tuples(rows, SERIES_COLUMNS))
+
+
+def copy_snapshots(session: Session, rows: Iterable[Mapping[str, Any] | Sequence[Any]]) -> int:
+    """Carga snapshots (dicts o tuplas en el orden de ``SNAPSHOT_COLUMNS``).
+
+    Lanza ``MissingSnapshotPartitions`` si el rango cargado no tiene
+    particion; se crean fuera de esta transaccion y se repite la carga.
+    """
+    return _copy_merge(
+        session,
+        "coin_snapshots",
+        SNAPSHOT_COLUMNS,
+        "uq_snapshots_coin_timestamp",
+        _as_tuples(rows, SNAPSHOT_COLUMNS),
+        post_merge=(_REFRESH_LATEST,),
+        on_inserted=ROLLUP_UPSERT_SQL.format(source="{inserted}"),
+        prepare=_check_snapshot_partitions,
+    )
+
+
+def _normalize_timestamp(value: Any) -> Any:
+    """Acepta ISO-8601 (se deja tal cual) o epoch en milisegundos."""
+    if isinstance(value, (int, float)) or (isinstance(value, str) and value.isdigit()):
+        return datetime.fromtimestamp(float(value) / 1000, tz=timezone.utc).isoformat()
+    return value
+
+
+def _read_records(path: str, fmt: str) -> Iterator[dict[str, Any]]:
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8", newline="") as handle:
+        if fmt == "csv":
+            yield from csv.DictReader(handle)
+        else:
+            for line in handle:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+def load_dump(path: str, kind: str, fmt: str | None = None, vs_currency: str | None = None, batch_size: int = 100_000) -> int:
+    """Carga un volcado CSV/NDJSON (opcionalmente .gz) en ``coin_series`` o ``coin_snapshots``.
+
+    Cada registro identifica la moneda con ``coin`` (id de CoinGecko) o
+    ``coin_id`` (clave interna) y la fecha con ``recorded_at`` (ISO-8601 o
+    epoch en ms).  Cada lote de ``batch_size`` filas se confirma por separado.
+    """
+    columns = SERIES_COLUMNS if kind == "series" else SNAPSHOT_COLUMNS
+    loader = copy_series if kind == "series" else copy_snapshots
+    fmt = fmt or ("csv" if ".csv" in path else "ndjson")
+
+    with session_scope() as session:
+        coin_ids = dict(session.execute(select(Coin.coingecko_id, Coin.id)).all())
+
+    skipped = 0
+
+    def rows() -> Iterator[tuple[Any, ...]]:
+        nonlocal skipped
+        for record in _read_records(path, fmt):
+            coin_pk = record.get("coin_id") or coin_ids.get(record.get("coin") or "")
+            vs = (record.get("vs_currency") or vs_currency or "").lower()
+            if not coin_pk or not vs or record.get("recorded_at") in (None, ""):
+                skipped += 1
+                continue
+            values = dict(record, coin_id=coin_pk, vs_currency=vs, recorded_at=_normalize_timestamp(record["recorded_at"]))
+            yield tuple(values.get(column) for column in columns)
+
+    def load(batch: list[tuple[Any, ...]]) -> int:
+        with session_scope() as session:
+            inserted = loader(session, batch)
+            if kind == "snapshots":
+                publish_latest(session)
+            else:
+                publish_change(session, None)
+        return inserted
+
+    total = 0
+    stream = rows()
+    while True:
+        # El lote se conserva en memoria por si hay que repetirlo.
+        batch = list(itertools.islice(stream, batch_size))
+        if not batch:
+            break
+        try:
+            total += load(batch)
+        except MissingSnapshotPartitions as exc:
+            # Crear la particion bloquea coin_snapshots: se hace en su propia transaccion corta.
+            ensure_snapshot_partitions(exc.first, exc.last)
+            total += load(batch)
+
+    logger.info("Volcado %s cargado en %s: %s filas nuevas, %s descartadas", path, kind, total, skipped)
+    return total
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Carga volcados de precios con COPY")
+    parser.add_argument("kind", choices=("series", "snapshots"), help="Tabla destino")
+    parser.add_argument("path", help="Fichero CSV o NDJSON (admite .gz)")
+    parser.add_argument("--format", choices=("csv", "ndjson"), default=None, help="Formato del fichero")
+    parser.add_argument("--vs", default=None, help="Divisa a usar si el registro no la incluye")
+    parser.add_argument("--batch-size", type=int, default=100_000, help="Filas por transaccion")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    load_dump(args.path, args.kind, fmt=args.format, vs_currency=args.vs, batch_size=args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Cache en memoria acotada, con TTL por espacio de nombres y coalescencia de peticiones.
+
+``LRUCache`` expulsa las entradas menos usadas cuando se supera el numero
+maximo de entradas o el tamano aproximado en bytes, aplica un TTL distinto
+por espacio de nombres y, mediante ``get_or_load``, garantiza que varios
+hilos que fallan a la vez sobre la misma clave provoquen una unica carga.
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Mapping, Tuple
+
+_MISSING = object()
+
+
+def approx_size(value: Any) -> int:
+    """Estima el tamano en bytes de un valor compuesto de tipos JSON."""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value) + 33
+    total = 0
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set)):
+            stack.extend(item)
+    return total
+
+
+class _Flight:
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.value: Any = None
+        self.error: BaseException | None = None
+
+
+class LRUCache:
+    """Cache LRU segura entre hilos limitada por entradas y por bytes."""
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int,
+        ttls: Mapping[str, float] | None = None,
+        default_ttl: float = 300.0,
+        sizeof: Callable[[Any], int] = approx_size,
+    ) -> None:
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max(1, max_bytes)
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self.sizeof = sizeof
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[float, int, Any]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, Hashable], _Flight] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "coalesced": 0}
+
+    def _pop(self, full_key: Tuple[str, Hashable]) -> None:
+        _, size, _ = self._entries.pop(full_key)
+        self._bytes -= size
+
+    def _lookup(self, full_key: Tuple[str, Hashable]) -> Any:
+        entry = self._entries.get(full_key)
+        if entry is None:
+            return _MISSING
+        expires_at, _, value = entry
+        if expires_at <= time.monotonic():
+            self._pop(full_key)
+            self._stats["expirations"] += 1
+            return _MISSING
+        self._entries.move_to_end(full_key)
+        return value
+
+    def get(self, namespace: str, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            value = self._lookup((namespace, key))
+            if value is _MISSING:
+                self._stats["misses"] += 1
+                return default
+            self._stats["hits"] += 1
+            return value
+
+    def set(self, namespace: str, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        size = self.sizeof(value)
+        if size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.ttls.get(namespace, self.default_ttl))
+        full_key = (namespace, key)
+        with self._lock:
+            if full_key in self._entries:
+                self._pop(full_key)
+            self._entries[full_key] = (expires_at, size, value)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._pop(oldest)
+                self._stats["evictions"] += 1
+
+    def get_or_load(self, namespace: str, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Devuelve el valor cacheado o lo carga una sola vez aunque haya fallos concurrentes."""
+        full_key = (namespace, key)
+        with self._lock:
+            value = self._lookup(full_key)
+            if value is not _MISSING:
+                self._stats["hits"] += 1
+                return value
+            self._stats["misses"] += 1
+            flight = self._inflight.get(full_key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[full_key] = _Flight()
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+            self.set(namespace, key, flight.value)
+            return flight.value
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(full_key, None)
+            flight.event.set()
+
+    def invalidate(self, namespace: str | None = None) -> None:
+        """Vacia la cache completa o solo un espacio de nombres."""
+        with self._lock:
+            for full_key in [k for k in self._entries if namespace is None or k[0] == namespace]:
+                self._pop(full_key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot: Dict[str, Any] = dict(self._stats)
+            snapshot["entries"] = len(self._entries)
+            snapshot["bytes"] = self._bytes
+            namespaces: Dict[str, int] = {}
+            for namespace, _ in self._entries:
+                namespaces[namespace] = namespaces.get(namespace, 0) + 1
+        lookups = snapshot["hits"] + snapshot["misses"]
+        snapshot["hit_ratio"] = snapshot["hits"] / lookups if lookups else None
+        snapshot["max_entries"] = self.max_entries
+        snapshot["max_bytes"] = self.max_bytes
+        snapshot["namespaces"] = namespaces
+        return snapshot
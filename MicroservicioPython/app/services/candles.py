@@ -0,0 +1,203 @@
+"""Velas OHLC calculadas en PostgreSQL.
+
+Los puntos de ``coin_series``, los snapshots en bruto y, donde la
+compactacion ya los borro, los agregados horarios y diarios se tratan como
+"subvelas" ``(apertura, cierre, maximo, minimo, volumen)`` y se agrupan por
+aritmetica de epoch en una unica consulta: apertura y cierre son el primer y
+ultimo valor de cada intervalo, y el volumen es la media del volumen de 24 h
+reportado por los snapshots del intervalo.
+
+Las velas cerradas no cambian mientras no se reescriba el historico, asi que
+se guardan aparte indexadas por la generacion historica
+(``current_history_generation``); cada peticion solo recalcula la vela en curso.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Dict, List
+
+from sqlalchemy import Float, Integer, case, func, literal, or_, select, union_all
+from sqlalchemy.dialects.postgresql import aggregate_order_by, array_agg
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Subquery
+
+from ..config import get_settings
+from ..db import async_session_scope, session_scope
+from ..models import Coin, CoinPriceRollup, CoinPriceRollupDaily, CoinSeries, CoinSnapshot
+from .cache import LRUCache
+from .response_cache import current_history_generation
+
+CANDLE_INTERVALS: Dict[str, int] = {"1h": 3600, "4h": 4 * 3600, "1d": 86400}
+
+# Margen para dar por cerrada una vela: una sincronizacion que empezo antes
+# del cambio de intervalo puede confirmar snapshots de la vela anterior.
+_SETTLE = timedelta(minutes=5)
+_CLOSED_TTL = 24 * 3600.0
+
+
+@lru_cache
+def get_candle_cache() -> LRUCache:
+    """Cache de velas cerradas por ``(generacion historica, moneda, divisa, intervalo, rango)``."""
+    settings = get_settings()
+    return LRUCache(
+        max_entries=settings.candles_cache_max_entries,
+        max_bytes=settings.response_cache_max_bytes,
+        default_ttl=_CLOSED_TTL,
+    )
+
+
+def _floor(moment: datetime, step: int) -> datetime:
+    epoch = int(moment.timestamp())
+    return datetime.fromtimestamp(epoch - epoch % step, tz=timezone.utc)
+
+
+def _price_points(model: Any, coin_pk: int, vs: str, start: datetime, end: datetime | None):
+    """Cada precio como una subvela degenerada (apertura = cierre = maximo = minimo)."""
+    if model is CoinSnapshot:
+        volume_sum = func.coalesce(model.total_volume, 0).cast(Float)
+        volume_count = case((model.total_volume.is_not(None), 1), else_=0)
+    else:
+        volume_sum, volume_count = literal(0.0, Float), literal(0, Integer)
+    stmt = (
+        select(
+            model.recorded_at.label("opened_at"),
+            model.price.label("open"),
+            model.recorded_at.label("closed_at"),
+            model.price.label("close"),
+            model.price.label("high"),
+            model.price.label("low"),
+            volume_sum.label("volume_sum"),
+            volume_count.label("volume_count"),
+        )
+        .where(model.coin_id == coin_pk, model.vs_currency == vs, model.price.is_not(None))
+        .where(model.recorded_at >= start)
+    )
+    if end is not None:
+        stmt = stmt.where(model.recorded_at < end)
+    return stmt
+
+
+def _rollup_points(model: Any, coin_pk: int, vs: str, start: datetime, end: datetime | None, boundary: Any):
+    """Buckets compactados anteriores a ``boundary`` (el primer instante del nivel mas fino)."""
+    stmt = (
+        select(
+            model.open_at.label("opened_at"),
+            model.open_price.label("open"),
+            model.close_at.label("closed_at"),
+            model.close_price.label("close"),
+            model.price_max.label("high"),
+            model.price_min.label("low"),
+            model.total_volume_sum.label("volume_sum"),
+            model.total_volume_count.label("volume_count"),
+        )
+        .where(model.coin_id == coin_pk, model.vs_currency == vs, model.open_at.is_not(None))
+        .where(or_(boundary.is_(None), model.close_at < boundary))
+        .where(model.open_at >= start)
+    )
+    if end is not None:
+        stmt = stmt.where(model.open_at < end)
+    return stmt
+
+
+def _candle_source(coin_pk: int, vs: str, step: int, start: datetime, end: datetime | None) -> Subquery:
+    first_raw = (
+        select(func.min(CoinSnapshot.recorded_at))
+        .where(CoinSnapshot.coin_id == coin_pk, CoinSnapshot.vs_currency == vs)
+        .scalar_subquery()
+    )
+    selects = [
+        _price_points(CoinSeries, coin_pk, vs, start, end),
+        _price_points(CoinSnapshot, coin_pk, vs, start, end),
+        _rollup_points(CoinPriceRollup, coin_pk, vs, start, end, first_raw),
+    ]
+    if step % 86400 == 0:
+        # Los buckets diarios solo encajan en velas de uno o mas dias.
+        first_hourly = (
+            select(func.min(CoinPriceRollup.open_at))
+            .where(CoinPriceRollup.coin_id == coin_pk, CoinPriceRollup.vs_currency == vs)
+            .scalar_subquery()
+        )
+        boundary = func.coalesce(first_hourly, first_raw)
+        selects.append(_rollup_points(CoinPriceRollupDaily, coin_pk, vs, start, end, boundary))
+    return union_all(*selects).subquery()
+
+
+def _query_candles(session: Session, coin_pk: int, vs: str, step: int, start: datetime, end: datetime | None) -> List[Dict[str, Any]]:
+    source = _candle_source(coin_pk, vs, step, start, end)
+    bucket = func.to_timestamp(func.floor(func.extract("epoch", source.c.opened_at) / step) * step).label("bucket")
+    stmt = (
+        select(
+            bucket,
+            array_agg(aggregate_order_by(source.c.open, source.c.opened_at.asc()))[1],
+            func.max(source.c.high),
+            func.min(source.c.low),
+            array_agg(aggregate_order_by(source.c.close, source.c.closed_at.desc()))[1],
+            func.sum(source.c.volume_sum) / func.nullif(func.sum(source.c.volume_count), 0),
+        )
+        .group_by(bucket)
+        .order_by(bucket)
+    )
+    return [
+        {
+            "time": int(started.timestamp() * 1000),
+            "open": float(open_price),
+            "high": float(high),
+            "low": float(low),
+            "close": float(close_price),
+            "volume": float(volume) if volume is not None else None,
+        }
+        for started, open_price, high, low, close_price, volume in session.execute(stmt)
+    ]
+
+
+def get_coin_candles(coin_id: str, vs_currency: str = "usd", interval: str = "1h", limit: int = 200) -> Dict[str, Any]:
+    """Devuelve las ultimas ``limit`` velas de ``interval`` de una moneda."""
+    with session_scope() as session:
+        return _coin_candles(session, coin_id, vs_currency, interval, limit)
+
+
+async def get_coin_candles_async(
+    coin_id: str,
+    vs_currency: str = "usd",
+    interval: str = "1h",
+    limit: int = 200,
+) -> Dict[str, Any]:
+    """Variante asincrona de ``get_coin_candles`` sobre el motor ``asyncpg``."""
+    async with async_session_scope() as session:
+        return await session.run_sync(_coin_candles, coin_id, vs_currency, interval, limit)
+
+
+def _coin_candles(session: Session, coin_id: str, vs_currency: str, interval: str, limit: int) -> Dict[str, Any]:
+    step = CANDLE_INTERVALS.get(interval)
+    if step is None:
+        raise ValueError(f"Intervalo no soportado: {interval}")
+    vs = vs_currency.lower()
+    coin = session.execute(select(Coin).where(Coin.coingecko_id == coin_id)).scalar_one_or_none()
+    if coin is None:
+        raise ValueError(f"No existe la moneda '{coin_id}' en la base sincronizada")
+
+    now = datetime.now(timezone.utc)
+    start = _floor(now, step) - timedelta(seconds=step * (max(1, limit) - 1))
+    if not get_settings().candles_cache_closed:
+        candles = _query_candles(session, coin.id, vs, step, start, None)
+    else:
+        settled = max(start, _floor(now - _SETTLE, step))
+        cache = get_candle_cache()
+        key = (current_history_generation(), coin.id, vs, interval, start, settled)
+        # ``get``/``set`` en lugar de ``get_or_load``: esta funcion tambien se
+        # ejecuta en el event loop (``run_sync``), donde no se puede bloquear.
+        closed = cache.get("closed", key)
+        if closed is None:
+            closed = _query_candles(session, coin.id, vs, step, start, settled) if settled > start else []
+            cache.set("closed", key, closed)
+        candles = closed + _query_candles(session, coin.id, vs, step, settled, None)
+
+    return {
+        "id": coin.coingecko_id,
+        "symbol": coin.symbol.lower(),
+        "vs_currency": vs,
+        "interval": interval,
+        "candles": candles,
+    }
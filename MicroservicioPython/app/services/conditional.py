@@ -0,0 +1,67 @@
+"""Peticiones condicionales (``ETag`` / ``If-None-Match``) para las rutas de lectura.
+
+La etiqueta resume los parametros de la ruta y el ultimo cambio de datos de
+la divisa (``FreshnessRegistry.changed_at``), que ya mantienen en memoria
+las sincronizaciones de este y de los demas procesos.  Comprobar una
+etiqueta no consulta PostgreSQL ni genera el cuerpo, y todos los workers
+calculan la misma etiqueta para los mismos datos.
+
+``Cache-Control`` permite reutilizar la respuesta hasta la siguiente
+sincronizacion programada; sin planificador no se sabe cuando llegara y
+se pide revalidar siempre (``no-cache``), lo que con la etiqueta cuesta un
+304.
+
+Cada codificacion de contenido (``gzip``, ``br``) es una representacion
+distinta y lleva su propia etiqueta.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Hashable
+
+from fastapi import Request
+
+from ..config import get_settings
+from .freshness import get_registry
+
+
+def entity_tag(namespace: str, params: Hashable, vs: str, encoding: str | None = None) -> str | None:
+    """ETag fuerte de la respuesta, o ``None`` si aun no se conoce ningun cambio de ``vs``."""
+    changed_at = get_registry().changed_at(vs)
+    if changed_at is None:
+        return None
+    digest = hashlib.blake2b(repr((namespace, params, vs, changed_at.isoformat(), encoding)).encode(), digest_size=16)
+    return f'"{digest.hexdigest()}"'
+
+
+def cache_control(vs: str) -> str:
+    """``max-age`` hasta la siguiente sincronizacion programada de ``vs``."""
+    settings = get_settings()
+    synced_at = get_registry().synced_at(vs)
+    if not settings.sync_enable_scheduler or synced_at is None:
+        return "no-cache"
+    next_sync = synced_at + timedelta(seconds=settings.sync_interval_seconds)
+    remaining = int((next_sync - datetime.now(timezone.utc)).total_seconds())
+    return f"public, max-age={remaining}" if remaining > 0 else "no-cache"
+
+
+def conditional_headers(namespace: str, params: Hashable, vs: str, encoding: str | None = None) -> Dict[str, str]:
+    """Cabeceras ``ETag``, ``Cache-Control`` y ``Vary`` de la respuesta (sin etiqueta, solo ``Vary``)."""
+    headers = {"Vary": "Accept-Encoding"} if get_settings().response_compression else {}
+    etag = entity_tag(namespace, params, vs, encoding)
+    if etag is not None:
+        headers.update({"ETag": etag, "Cache-Control": cache_control(vs)})
+    return headers
+
+
+def is_not_modified(request: Request, headers: Dict[str, str]) -> bool:
+    """``True`` si ``If-None-Match`` contiene la etiqueta actual (comparacion debil, RFC 9110)."""
+    etag = headers.get("ETag")
+    candidates = request.headers.get("if-none-match")
+    if etag is None or not candidates:
+        return False
+    if candidates.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in candidates.split(","))
@@ -0,0 +1,254 @@
+"""Matrices de correlacion y beta entre monedas a partir de ``coin_series``.
+
+PostgreSQL alinea las series en una rejilla comun (ultimo precio de cada
+dia, o de cada hora si todas las series de la ventana estan guardadas con
+resolucion horaria y la ventana no pasa de 90 dias) con una unica consulta
+agrupada.  El paso se deduce del espaciado almacenado: la sincronizacion
+historica guarda puntos diarios y una rejilla mas fina solo anadiria
+rendimientos nulos.  Los huecos se
+rellenan con el ultimo precio conocido y la ventana se recorta al primer
+instante en que todas las monedas incluidas tienen precio; las que
+empiezan despues de la mitad de la ventana se excluyen para no acortarla.
+
+Sobre los rendimientos logaritmicos se calcula de una pasada la matriz de
+covarianzas (solo el triangulo superior), de la que salen correlaciones y
+betas.  La ventana termina en el ultimo punto de la serie, no en el reloj,
+asi que el resultado solo cambia cuando cambia el historico y se cachea
+por generacion historica (``current_history_generation``).
+"""
+
+from __future__ import annotations
+
+import math
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from operator import mul
+from typing import Any, Dict, List, Sequence
+
+from sqlalchemy import Float, Integer, func, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by, array_agg
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..db import async_session_scope, session_scope
+from ..models import Coin, CoinSeries
+from .analytics import MarketDataUnavailable
+from .cache import LRUCache
+from .response_cache import current_history_generation
+
+MAX_COINS = 200
+_HOURLY_MAX_DAYS = 90
+# Espaciado medio maximo (s) para considerar horaria una serie.
+_HOURLY_MAX_SPACING = 2 * 3600
+_MATRIX_TTL = 24 * 3600.0
+
+
+@lru_cache
+def get_correlation_cache() -> LRUCache:
+    """Cache de matrices por ``(generacion historica, monedas, divisa, dias, referencia)``."""
+    settings = get_settings()
+    return LRUCache(
+        max_entries=settings.correlation_cache_max_entries,
+        max_bytes=settings.response_cache_max_bytes,
+        default_ttl=_MATRIX_TTL,
+    )
+
+
+def get_correlation_matrix(
+    ids: Sequence[str] | None = None,
+    top: int = 20,
+    vs_currency: str = "usd",
+    days: int = 30,
+    benchmark: str = "bitcoin",
+) -> Dict[str, Any]:
+    """Correlaciones y betas de ``ids`` (o de las ``top`` monedas por capitalizacion) y ``benchmark``."""
+    with session_scope() as session:
+        return _correlation(session, ids, top, vs_currency, days, benchmark)
+
+
+async def get_correlation_matrix_async(
+    ids: Sequence[str] | None = None,
+    top: int = 20,
+    vs_currency: str = "usd",
+    days: int = 30,
+    benchmark: str = "bitcoin",
+) -> Dict[str, Any]:
+    """Variante asincrona de ``get_correlation_matrix`` sobre el motor ``asyncpg``."""
+    async with async_session_scope() as session:
+        return await session.run_sync(_correlation, ids, top, vs_currency, days, benchmark)
+
+
+def _select_coins(session: Session, ids: Sequence[str] | None, top: int, benchmark: str) -> tuple[List[Coin], Dict[str, str]]:
+    excluded: Dict[str, str] = {}
+    if ids:
+        wanted = list(dict.fromkeys(coin_id.strip().lower() for coin_id in ids if coin_id.strip()))
+    else:
+        wanted = list(
+            session.execute(
+                select(Coin.coingecko_id)
+                .order_by(Coin.market_cap_rank.asc().nulls_last(), Coin.id.asc())
+                .limit(top)
+            ).scalars()
+        )
+    if benchmark and benchmark not in wanted:
+        wanted.insert(0, benchmark)
+    if len(wanted) > MAX_COINS:
+        raise ValueError(f"Como maximo se pueden comparar {MAX_COINS} monedas")
+
+    found = {
+        coin.coingecko_id: coin
+        for coin in session.execute(select(Coin).where(Coin.coingecko_id.in_(wanted))).scalars()
+    }
+    coins = []
+    for coin_id in wanted:
+        if coin_id in found:
+            coins.append(found[coin_id])
+        else:
+            excluded[coin_id] = "No existe en la base sincronizada"
+    return coins, excluded
+
+
+def _correlation(
+    session: Session,
+    ids: Sequence[str] | None,
+    top: int,
+    vs_currency: str,
+    days: int,
+    benchmark: str,
+) -> Dict[str, Any]:
+    vs = vs_currency.lower()
+    benchmark = (benchmark or "").strip().lower()
+    coins, excluded = _select_coins(session, ids, top, benchmark)
+    if not coins:
+        raise ValueError("Ninguna de las monedas solicitadas existe en la base sincronizada")
+
+    cache = get_correlation_cache()
+    key = (current_history_generation(), tuple(coin.id for coin in coins), vs, days, benchmark)
+    # ``get``/``set`` en lugar de ``get_or_load``: tambien se ejecuta en el event loop (``run_sync``).
+    result = cache.get("matrix", key)
+    if result is None:
+        result = _compute(session, coins, vs, days, benchmark)
+        cache.set("matrix", key, result)
+    return dict(result, excluded={**result["excluded"], **excluded})
+
+
+def _aligned_prices(session: Session, coin_pks: List[int], vs: str, step: int, start: int) -> Dict[int, Dict[int, float]]:
+    """Ultimo precio de cada moneda en cada intervalo de ``step`` segundos desde ``start`` (epoch).
+
+    Devuelve una fila por moneda con los intervalos y precios en arrays, en
+    lugar de una fila por intervalo.
+    """
+    bucket = (func.floor(func.extract("epoch", CoinSeries.recorded_at) / step) * step).cast(Integer).label("bucket")
+    grouped = (
+        select(
+            CoinSeries.coin_id,
+            bucket,
+            array_agg(aggregate_order_by(CoinSeries.price, CoinSeries.recorded_at.desc()))[1].cast(Float).label("price"),
+        )
+        .where(CoinSeries.coin_id.in_(coin_pks), CoinSeries.vs_currency == vs)
+        .where(CoinSeries.recorded_at >= datetime.fromtimestamp(start, tz=timezone.utc))
+        .group_by(CoinSeries.coin_id, bucket)
+        .subquery()
+    )
+    stmt = select(grouped.c.coin_id, array_agg(grouped.c.bucket), array_agg(grouped.c.price)).group_by(grouped.c.coin_id)
+    return {coin_pk: dict(zip(buckets, prices)) for coin_pk, buckets, prices in session.execute(stmt)}
+
+
+def _grid_step(session: Session, coin_pks: List[int], vs: str, since: datetime, days: int) -> int:
+    """Paso de la rejilla: horario solo si ninguna serie de la ventana es mas gruesa."""
+    if days > _HOURLY_MAX_DAYS:
+        return 86400
+    spacing = (
+        select(
+            (
+                (func.extract("epoch", func.max(CoinSeries.recorded_at)) - func.extract("epoch", func.min(CoinSeries.recorded_at)))
+                / func.nullif(func.count() - 1, 0)
+            ).label("spacing")
+        )
+        .where(CoinSeries.coin_id.in_(coin_pks), CoinSeries.vs_currency == vs, CoinSeries.recorded_at >= since)
+        .group_by(CoinSeries.coin_id)
+        .subquery()
+    )
+    coarsest = session.execute(select(func.max(spacing.c.spacing))).scalar_one_or_none()
+    return 3600 if coarsest is not None and coarsest <= _HOURLY_MAX_SPACING else 86400
+
+
+def _compute(session: Session, coins: List[Coin], vs: str, days: int, benchmark: str) -> Dict[str, Any]:
+    coin_pks = [coin.id for coin in coins]
+    last = session.execute(
+        select(func.max(CoinSeries.recorded_at)).where(CoinSeries.coin_id.in_(coin_pks), CoinSeries.vs_currency == vs)
+    ).scalar_one_or_none()
+    if last is None:
+        raise MarketDataUnavailable(
+            "No hay series historicas para las monedas solicitadas. Ejecuta la sincronizacion historica."
+        )
+    step = _grid_step(session, coin_pks, vs, last - timedelta(days=days), days)
+    end = int(last.timestamp()) // step * step
+    start = end - days * 86400
+    buckets = (end - start) // step + 1
+    points = _aligned_prices(session, coin_pks, vs, step, start)
+
+    excluded: Dict[str, str] = {}
+    filled: List[tuple[Coin, List[float | None], int]] = []
+    for coin in coins:
+        series = points.get(coin.id)
+        if not series:
+            excluded[coin.coingecko_id] = "Sin serie historica en la ventana"
+            continue
+        if min(series.values()) <= 0:
+            excluded[coin.coingecko_id] = "Serie con precios no positivos"
+            continue
+        first = (min(series) - start) // step
+        if first > buckets // 2:
+            excluded[coin.coingecko_id] = "Historico insuficiente para la ventana"
+            continue
+        row: List[float | None] = [None] * buckets
+        price = None
+        for index in range(first, buckets):
+            price = series.get(start + index * step, price)
+            row[index] = price
+        filled.append((coin, row, first))
+    if not filled:
+        raise ValueError("Ninguna moneda tiene historico suficiente en la ventana solicitada")
+
+    common = max(first for _, _, first in filled)
+    deviations: List[List[float]] = []
+    for _, row, _ in filled:
+        returns = [math.log(row[index] / row[index - 1]) for index in range(common + 1, buckets)]
+        mean = sum(returns) / len(returns) if returns else 0.0
+        deviations.append([value - mean for value in returns])
+    observations = buckets - common - 1
+    if observations < 2:
+        raise ValueError("La ventana comun tiene menos de dos rendimientos")
+
+    size = len(filled)
+    cov = [[0.0] * size for _ in range(size)]
+    for i in range(size):
+        left = deviations[i]
+        for j in range(i, size):
+            cov[i][j] = cov[j][i] = sum(map(mul, left, deviations[j])) / (observations - 1)
+    std = [math.sqrt(cov[i][i]) for i in range(size)]
+    correlation = [
+        [cov[i][j] / (std[i] * std[j]) if std[i] and std[j] else None for j in range(size)]
+        for i in range(size)
+    ]
+    # beta[i][j]: pendiente de la regresion de los rendimientos de i sobre los de j.
+    beta = [[cov[i][j] / cov[j][j] if cov[j][j] else None for j in range(size)] for i in range(size)]
+
+    ids = [coin.coingecko_id for coin, _, _ in filled]
+    reference = ids.index(benchmark) if benchmark in ids else None
+    return {
+        "vs_currency": vs,
+        "days": days,
+        "interval": "1h" if step == 3600 else "1d",
+        "start": datetime.fromtimestamp(start + common * step, tz=timezone.utc),
+        "end": datetime.fromtimestamp(end, tz=timezone.utc),
+        "observations": observations,
+        "benchmark": ids[reference] if reference is not None else None,
+        "ids": ids,
+        "volatility": std,
+        "correlation": correlation,
+        "beta": beta,
+        "benchmark_beta": {ids[i]: beta[i][reference] for i in range(size)} if reference is not None else {},
+        "excluded": excluded,
+    }
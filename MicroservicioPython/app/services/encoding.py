@@ -0,0 +1,92 @@
+"""Serializacion JSON rapida y compresion de las respuestas de lectura.
+
+``dumps`` serializa con ``orjson`` los dicts que ya construyen los
+servicios (con los ``Decimal`` convertidos a ``float``), sin instanciar y
+validar de nuevo los modelos de Pydantic.  Las fechas con zona UTC se
+escriben con sufijo ``Z``, igual que hace Pydantic.
+
+Con ``RESPONSE_COMPRESSION`` activado, la respuesta se comprime con la
+mejor codificacion que acepte el cliente (``br`` si ``brotli`` esta
+instalado, si no ``gzip``).  Cada variante comprimida se cachea junto al
+cuerpo original (ver ``app.services.response_cache``), asi que solo se
+comprime una vez por sincronizacion.
+"""
+
+from __future__ import annotations
+
+import gzip
+from decimal import Decimal
+from typing import Any, Dict
+
+import orjson
+from fastapi import Response
+
+from ..config import get_settings
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 8
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Tipo no serializable a JSON: {type(value).__name__}")
+
+
+def dumps(value: Any) -> bytes:
+    """Serializa ``value`` a JSON (bytes UTF-8) con ``orjson``."""
+    return orjson.dumps(value, default=_default, option=orjson.OPT_UTC_Z)
+
+
+def _brotli() -> Any:
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str | None:
+    """Codificacion a aplicar segun ``Accept-Encoding``; ``None`` sin compresion."""
+    if not accept_encoding or not get_settings().response_compression:
+        return None
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    wildcard = accepted.get("*", 0.0)
+    for encoding in ("br", "gzip"):
+        if encoding == "br" and _brotli() is None:
+            continue
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Comprime ``body`` con la codificacion devuelta por ``negotiate_encoding``."""
+    if encoding == "br":
+        return _brotli().compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        # ``mtime=0``: la misma entrada produce siempre los mismos bytes.
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    raise ValueError(f"Codificacion no soportada: {encoding}")
+
+
+def json_response(
+    body: bytes,
+    headers: Dict[str, str],
+    encoding: str | None = None,
+    media_type: str = "application/json",
+) -> Response:
+    """Respuesta con ``body`` ya serializado (y comprimido con ``encoding``); JSON por defecto."""
+    if encoding is not None:
+        headers = {**headers, "Content-Encoding": encoding}
+    return Response(content=body, media_type=media_type, headers=headers)
@@ -0,0 +1,193 @@
+"""Exportacion en streaming de ``coin_series`` y ``coin_snapshots``.
+
+Las filas se leen con un cursor de servidor (``yield_per``) y cada lote se
+codifica y se entrega antes de pedir el siguiente, de modo que la memoria
+usada depende del tamano de lote y no del numero de filas exportadas.
+
+Formatos: CSV y NDJSON (con la misma estructura que acepta
+``app.services.bulk_load``, asi que un volcado se puede volver a cargar) y,
+si ``pyarrow`` esta instalado, Arrow IPC (stream) y Parquet (un row group
+por lote).
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Sequence
+
+from sqlalchemy import Float, select
+from sqlalchemy.sql import Select
+
+from ..config import get_settings
+from ..db import session_scope
+from ..models import Coin, CoinSeries, CoinSnapshot
+from .bulk_load import SERIES_COLUMNS, SNAPSHOT_COLUMNS
+
+EXPORT_MEDIA_TYPES: Dict[str, str] = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+_ARROW_FORMATS = {"arrow", "parquet"}
+_TABLES = {"series": (CoinSeries, SERIES_COLUMNS), "snapshots": (CoinSnapshot, SNAPSHOT_COLUMNS)}
+
+
+class ExportFormatUnavailable(Exception):
+    """El formato pedido necesita una dependencia opcional que no esta instalada."""
+
+
+def export_columns(kind: str) -> List[str]:
+    """Columnas del volcado: ``coin`` (id de CoinGecko) en lugar de la clave interna."""
+    return ["coin", *_TABLES[kind][1][1:]]
+
+
+def _pyarrow() -> Any:
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as exc:
+        raise ExportFormatUnavailable("Los formatos arrow y parquet requieren instalar pyarrow") from exc
+    return pyarrow
+
+
+def prepare_export(
+    kind: str,
+    fmt: str,
+    coin_ids: Sequence[str] | None = None,
+    vs_currency: str | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> tuple[Select, Dict[int, str]]:
+    """Valida los filtros y construye la consulta antes de empezar a responder.
+
+    Devuelve la sentencia y el mapa ``coin_id -> id de CoinGecko``; los
+    errores (moneda inexistente, formato no disponible) se lanzan aqui para
+    que la ruta pueda responder con el codigo adecuado.
+    """
+    if kind not in _TABLES:
+        raise ValueError(f"Tabla de exportacion no soportada: {kind}")
+    if fmt not in EXPORT_MEDIA_TYPES:
+        raise ValueError(f"Formato de exportacion no soportado: {fmt}")
+    if fmt in _ARROW_FORMATS:
+        _pyarrow()
+    # Sin zona horaria se interpreta UTC, como el resto de marcas temporales del servicio.
+    start = start.replace(tzinfo=timezone.utc) if start is not None and start.tzinfo is None else start
+    end = end.replace(tzinfo=timezone.utc) if end is not None and end.tzinfo is None else end
+    if start is not None and end is not None and start >= end:
+        raise ValueError("El inicio del rango debe ser anterior al final")
+
+    with session_scope() as session:
+        names = dict(session.execute(select(Coin.id, Coin.coingecko_id)).all())
+    model, columns = _TABLES[kind]
+    stmt = select(
+        model.coin_id,
+        model.vs_currency,
+        model.recorded_at,
+        # ``float8`` en lugar de ``numeric``: evita construir un ``Decimal`` por valor.
+        *(getattr(model, column).cast(Float) for column in columns[3:]),
+    )
+    if coin_ids:
+        by_name = {name: pk for pk, name in names.items()}
+        missing = [coin_id for coin_id in coin_ids if coin_id not in by_name]
+        if missing:
+            raise ValueError(f"No existen en la base sincronizada: {', '.join(missing)}")
+        stmt = stmt.where(model.coin_id.in_([by_name[coin_id] for coin_id in coin_ids]))
+    if vs_currency:
+        stmt = stmt.where(model.vs_currency == vs_currency.lower())
+    if start is not None:
+        stmt = stmt.where(model.recorded_at >= start)
+    if end is not None:
+        stmt = stmt.where(model.recorded_at < end)
+    # Coincide con los indices unicos (coin_id, vs_currency, recorded_at): no hay ordenacion en memoria.
+    return stmt.order_by(model.coin_id, model.vs_currency, model.recorded_at), names
+
+
+def _batches(stmt: Select, names: Dict[int, str], batch_size: int) -> Iterator[List[tuple]]:
+    with session_scope() as session:
+        result = session.execute(stmt.execution_options(yield_per=batch_size))
+        for partition in result.partitions():
+            yield [(names.get(row[0]), *row[1:]) for row in partition]
+
+
+def _csv_chunks(columns: List[str], batches: Iterator[List[tuple]]) -> Iterator[bytes]:
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(columns)
+    for batch in batches:
+        writer.writerows((row[0], row[1], row[2].isoformat(), *row[3:]) for row in batch)
+        yield out.getvalue().encode("utf-8")
+        out.seek(0)
+        out.truncate()
+    if out.tell():
+        yield out.getvalue().encode("utf-8")
+
+
+def _ndjson_chunks(columns: List[str], batches: Iterator[List[tuple]]) -> Iterator[bytes]:
+    dumps = json.JSONEncoder(separators=(",", ":")).encode
+    for batch in batches:
+        lines = [dumps(dict(zip(columns, (row[0], row[1], row[2].isoformat(), *row[3:])))) for row in batch]
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Fichero de solo escritura que acumula lo escrito por pyarrow hasta ``drain``."""
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+def _arrow_chunks(columns: List[str], batches: Iterator[List[tuple]], fmt: str) -> Iterator[bytes]:
+    pa = _pyarrow()
+    schema = pa.schema(
+        [
+            pa.field("coin", pa.string()),
+            pa.field("vs_currency", pa.string()),
+            pa.field("recorded_at", pa.timestamp("us", tz="UTC")),
+            *(pa.field(column, pa.float64()) for column in columns[3:]),
+        ]
+    )
+    sink = _ChunkSink()
+    writer = pa.parquet.ParquetWriter(sink, schema) if fmt == "parquet" else pa.ipc.new_stream(sink, schema)
+    try:
+        for batch in batches:
+            arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*batch), schema)]
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def stream_export(stmt: Select, names: Dict[int, str], kind: str, fmt: str, batch_size: int | None = None) -> Iterator[bytes]:
+    """Genera el volcado por trozos; pensado para ``StreamingResponse``."""
+    columns = export_columns(kind)
+    batches = _batches(stmt, names, batch_size or get_settings().export_batch_size)
+    if fmt == "csv":
+        return _csv_chunks(columns, batches)
+    if fmt == "ndjson":
+        return _ndjson_chunks(columns, batches)
+    return _arrow_chunks(columns, batches, fmt)
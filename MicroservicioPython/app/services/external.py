@@ -1,56 +1,47 @@
 from __future__ import annotations
 
+from functools import lru_cache
 from typing import Any, Dict, List, Optional
 
-import requests
-
 from ..config import get_settings
+from .cache import LRUCache
+from .http_client import get_client
 
-# Simple in-memory cache to avoid hitting the external API excessively.
-# We use a dictionary mapping cache keys to a tuple of (timestamp, data).
-# When requesting data, we return the cached value if it hasn't expired.
-# This helps prevent 429 "Too Many Requests" errors from the CoinGecko API.
-import time
-
-# Cache dictionary and TTL (time-to-live) in seconds.  Adjust TTL as needed.
-_CACHE: dict[str, tuple[float, Any]] = {}
-_CACHE_TTL: int = 300  # cache entries live for 5 minutes
-
-def _cache_get(key: str) -> Optional[Any]:
-    """Retrieve a cached value if it hasn't expired."""
-    entry = _CACHE.get(key)
-    if not entry:
-        return None
-    timestamp, data = entry
-    # If entry is too old, remove it and return None
-    if (time.time() - timestamp) > _CACHE_TTL:
-        _CACHE.pop(key, None)
-        return None
-    return data
 
-def _cache_set(key: str, data: Any) -> None:
-    """Store a value in the cache with the current timestamp."""
-    _CACHE[key] = (time.time(), data)
+@lru_cache
+def get_external_cache() -> LRUCache:
+    """Cache compartida de respuestas de CoinGecko.
+
+    Acotada por entradas y bytes, con TTL distinto para listados de mercado,
+    detalle de monedas y series; las cargas concurrentes de una misma clave se
+    agrupan en una sola llamada a la API.
+    """
+    settings = get_settings()
+    return LRUCache(
+        max_entries=settings.external_cache_max_entries,
+        max_bytes=settings.external_cache_max_bytes,
+        ttls={
+            "markets": settings.external_cache_ttl_markets,
+            "detail": settings.external_cache_ttl_detail,
+            "chart": settings.external_cache_ttl_chart,
+        },
+    )
 
-def _get_session() -> requests.Session:
-    """Crea una sesión HTTP reutilizable."""
-    return requests.Session()
 
 def fetch_prices(vs_currency: str = "usd", per_page: int = 50, page: int = 1) -> List[Dict[str, Any]]:
     """Obtiene un listado de criptomonedas con sus métricas principales.
 
-    Para evitar saturar el servicio externo de CoinGecko, se utiliza un cache
-    en memoria.  Si existe un valor en la cache para los parámetros
-    especificados y no ha expirado, se devuelve dicho valor.  En caso
-    contrario se realiza la llamada HTTP y se almacena la respuesta en la
-    cache.
+    Para evitar saturar el servicio externo de CoinGecko, la respuesta se
+    guarda en la cache compartida (espacio ``markets``).
     """
-    # Construir una clave de cache basada en los parámetros
-    cache_key = f"prices:{vs_currency}:{per_page}:{page}"
-    cached = _cache_get(cache_key)
-    if cached is not None:
-        return cached
+    return get_external_cache().get_or_load(
+        "markets",
+        (vs_currency, per_page, page),
+        lambda: _download_prices(vs_currency, per_page, page),
+    )
+
 
+def _download_prices(vs_currency: str, per_page: int, page: int) -> List[Dict[str, Any]]:
     settings = get_settings()
     url = f"{settings.coingecko_api_base}/coins/markets"
     params = {
@@ -61,10 +52,7 @@ def fetch_prices(vs_currency: str = "usd", per_page: int = 50, page: int = 1) ->
         "sparkline": "false",
         "price_change_percentage": "1h,24h,7d",
     }
-    session = _get_session()
-    response = session.get(url, params=params, timeout=settings.external_timeout)
-    response.raise_for_status()
-    raw_data = response.json()
+    raw_data = get_client().get_json(url, params)
     data: List[Dict[str, Any]] = []
     for c in raw_data:
         data.append({
@@ -81,10 +69,9 @@ def fetch_prices(vs_currency: str = "usd", per_page: int = 50, page: int = 1) ->
             "price_change_percentage_24h": c.get("price_change_percentage_24h_in_currency") or 0,
             "price_change_percentage_7d": c.get("price_change_percentage_7d_in_currency") or 0,
         })
-    # Guardar en cache antes de devolver
-    _cache_set(cache_key, data)
     return data
 
+
 def fetch_coin_detail(
     coin_id: str,
     vs_currency: str = "usd",
@@ -93,18 +80,19 @@ def fetch_coin_detail(
 ) -> Dict[str, Any]:
     """Obtiene el detalle de una moneda y su serie histórica de precios.
 
-    Al igual que en `fetch_prices`, se utiliza un cache en memoria para
-    almacenar resultados y reducir el número de peticiones hacia el
-    servicio externo.  La clave de cache se construye con el id de la
+    Al igual que en `fetch_prices`, el resultado se guarda en la cache
+    compartida (espacio ``detail``) con una clave formada por el id de la
     moneda y los parámetros relevantes.
     """
-    cache_key = f"coin:{coin_id}:{vs_currency}:{days}:{interval}"
-    cached = _cache_get(cache_key)
-    if cached is not None:
-        return cached
+    return get_external_cache().get_or_load(
+        "detail",
+        ("coin", coin_id, vs_currency, days, interval),
+        lambda: _download_coin_detail(coin_id, vs_currency, days, interval),
+    )
+
 
+def _download_coin_detail(coin_id: str, vs_currency: str, days: str, interval: Optional[str]) -> Dict[str, Any]:
     settings = get_settings()
-    session = _get_session()
     info_url = f"{settings.coingecko_api_base}/coins/{coin_id}"
     info_params = {
         "localization": "false",
@@ -114,16 +102,8 @@ def fetch_coin_detail(
         "developer_data": "false",
         "sparkline": "false",
     }
-    info_resp = session.get(info_url, params=info_params, timeout=settings.external_timeout)
-    info_resp.raise_for_status()
-    coin = info_resp.json()
-    chart_url = f"{settings.coingecko_api_base}/coins/{coin_id}/market_chart"
-    chart_params: Dict[str, Any] = {"vs_currency": vs_currency, "days": days}
-    if interval:
-        chart_params["interval"] = interval
-    chart_resp = session.get(chart_url, params=chart_params, timeout=settings.external_timeout)
-    chart_resp.raise_for_status()
-    ch = chart_resp.json()
+    coin = get_client().get_json(info_url, info_params)
+    prices_series = fetch_market_chart(coin_id, vs_currency=vs_currency, days=days, interval=interval)
     out: Dict[str, Any] = {
         "id": coin.get("id"),
         "symbol": coin.get("symbol"),
@@ -138,8 +118,65 @@ def fetch_coin_detail(
         "price_change_percentage_1h": (coin.get("market_data") or {}).get("price_change_percentage_1h_in_currency", {}).get(vs_currency),
         "price_change_percentage_24h": (coin.get("market_data") or {}).get("price_change_percentage_24h_in_currency", {}).get(vs_currency),
         "price_change_percentage_7d": (coin.get("market_data") or {}).get("price_change_percentage_7d_in_currency", {}).get(vs_currency),
-        "prices_series": ch.get("prices", []),
+        "prices_series": prices_series,
+    }
+    return out
+
+
+def fetch_market_chart(
+    coin_id: str,
+    vs_currency: str = "usd",
+    days: str = "7",
+    interval: Optional[str] = None,
+) -> List[List[float]]:
+    """Descarga solo la serie ``[timestamp_ms, precio]`` de ``/coins/{id}/market_chart``."""
+    return get_external_cache().get_or_load(
+        "chart",
+        (coin_id, vs_currency, days, interval),
+        lambda: _download_market_chart(coin_id, vs_currency, days, interval),
+    )
+
+
+def _download_market_chart(coin_id: str, vs_currency: str, days: str, interval: Optional[str]) -> List[List[float]]:
+    settings = get_settings()
+    url = f"{settings.coingecko_api_base}/coins/{coin_id}/market_chart"
+    params: Dict[str, Any] = {"vs_currency": vs_currency, "days": days}
+    if interval:
+        params["interval"] = interval
+    return get_client().get_json(url, params).get("prices", [])
+
+
+def fetch_coin_metadata(coin_id: str) -> Dict[str, Any]:
+    """Obtiene solo los metadatos descriptivos de una moneda.
+
+    Realiza una unica peticion a ``/coins/{id}`` sin ``market_data`` ni
+    ``market_chart``; es la ruta adecuada para completar descripciones
+    e iconos sin consumir cuota de la API en series que no se usan.
+    """
+    return get_external_cache().get_or_load(
+        "detail",
+        ("meta", coin_id),
+        lambda: _download_coin_metadata(coin_id),
+    )
+
+
+def _download_coin_metadata(coin_id: str) -> Dict[str, Any]:
+    settings = get_settings()
+    url = f"{settings.coingecko_api_base}/coins/{coin_id}"
+    params = {
+        "localization": "false",
+        "tickers": "false",
+        "market_data": "false",
+        "community_data": "false",
+        "developer_data": "false",
+        "sparkline": "false",
+    }
+    coin = get_client().get_json(url, params)
+    out: Dict[str, Any] = {
+        "id": coin.get("id"),
+        "symbol": coin.get("symbol"),
+        "nombre": coin.get("name"),
+        "description": (coin.get("description") or {}).get("en") or "",
+        "image": (coin.get("image") or {}).get("large"),
     }
-    # Guardar en cache
-    _cache_set(cache_key, out)
     return out
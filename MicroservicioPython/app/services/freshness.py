@@ -0,0 +1,256 @@
+"""Registro en memoria de la frescura de los datos por divisa.
+
+Las rutas de lectura necesitan saber si hay snapshots recientes antes de
+responder.  En lugar de ejecutar ``SELECT max(recorded_at)`` en cada peticion,
+el proceso mantiene por divisa:
+
+* ``synced_at``: instante del ultimo snapshot almacenado (frescura).
+* ``changed_at``: ultimo momento en que cambiaron los datos servidos
+  (snapshots, series o metadatos), util para invalidar caches.
+
+El registro se calienta desde ``coin_latest`` al arrancar y lo actualiza el
+propio proceso tras cada sincronizacion.  Para que varios workers o replicas
+vean los cambios de los demas, las sincronizaciones emiten ``NOTIFY`` dentro
+de su transaccion (se entrega al confirmar) y un hilo escucha el canal con
+``LISTEN`` en una conexion dedicada.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import select as select_module
+import threading
+import uuid
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, Optional
+
+from sqlalchemy import event, func, select, text
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..db import get_engine, session_scope
+from ..models import CoinLatest
+from .response_cache import bump_generation
+from .stream import get_broadcaster
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "monitor_crypto_sync"
+# Clave de ``changed_at`` para cambios que afectan a todas las divisas (p. ej. descripciones).
+ALL_CURRENCIES = "*"
+# Identifica las notificaciones de este proceso: ya se aplicaron en ``after_commit``.
+PROCESS_ID = uuid.uuid4().hex
+
+
+class FreshnessRegistry:
+    """Marcas de tiempo por divisa, seguras entre hilos y solo crecientes."""
+
+    def __init__(self) -> None:
+        self._synced_at: Dict[str, datetime] = {}
+        self._changed_at: Dict[str, datetime] = {}
+        self._lock = threading.Lock()
+        self.warmed = False
+
+    @staticmethod
+    def _advance(target: Dict[str, datetime], key: str, moment: datetime) -> bool:
+        current = target.get(key)
+        if current is None or moment > current:
+            target[key] = moment
+            return True
+        return False
+
+    def record(self, vs: str, synced_at: datetime | None = None, changed_at: datetime | None = None) -> bool:
+        """Anota un snapshot nuevo (``synced_at``) y/o un cambio de datos (``changed_at``).
+
+        Devuelve ``True`` si alguna marca ha avanzado.
+        """
+        with self._lock:
+            advanced = synced_at is not None and self._advance(self._synced_at, vs, synced_at)
+            return self._advance(self._changed_at, vs, changed_at or datetime.now(timezone.utc)) or advanced
+
+    def synced_at(self, vs: str) -> Optional[datetime]:
+        with self._lock:
+            return self._synced_at.get(vs)
+
+    def changed_at(self, vs: str) -> Optional[datetime]:
+        """Ultimo cambio de ``vs`` o de todas las divisas, el mas reciente."""
+        with self._lock:
+            candidates = [self._changed_at.get(vs), self._changed_at.get(ALL_CURRENCIES)]
+        return max((moment for moment in candidates if moment is not None), default=None)
+
+    def warm(self, session: Session) -> bool:
+        """Carga el ultimo snapshot de cada divisa desde ``coin_latest``. Devuelve si hubo novedades."""
+        rows = session.execute(
+            select(CoinLatest.vs_currency, func.max(CoinLatest.recorded_at)).group_by(CoinLatest.vs_currency)
+        ).all()
+        advanced = False
+        for vs, last in rows:
+            advanced = self.record(vs, synced_at=last, changed_at=last) or advanced
+        self.warmed = True
+        return advanced
+
+    def snapshot(self) -> Dict[str, Dict[str, str]]:
+        with self._lock:
+            return {
+                "synced_at": {vs: moment.isoformat() for vs, moment in self._synced_at.items()},
+                "changed_at": {vs: moment.isoformat() for vs, moment in self._changed_at.items()},
+            }
+
+
+@lru_cache
+def get_registry() -> FreshnessRegistry:
+    return FreshnessRegistry()
+
+
+def _apply(vs: str, synced_at: datetime | None, changed_at: datetime, history: bool = True) -> None:
+    # Primero la generacion: una peticion concurrente puede emparejar una
+    # etiqueta antigua con un cuerpo nuevo, pero nunca una nueva con uno antiguo.
+    bump_generation(history=history)
+    get_registry().record(vs, synced_at=synced_at, changed_at=changed_at)
+
+
+def publish_change(
+    session: Session,
+    vs: str | None,
+    synced_at: datetime | None = None,
+    history: bool = True,
+) -> None:
+    """Emite ``NOTIFY`` dentro de la transaccion de ``session`` y registra el cambio tras el commit.
+
+    ``vs=None`` indica un cambio que afecta a todas las divisas.
+    ``history=False`` declara que el cambio solo anade datos del instante
+    actual (ver ``current_history_generation``).  Si la transaccion se
+    revierte no se notifica nada.
+    """
+    key = vs or ALL_CURRENCIES
+    changed_at = datetime.now(timezone.utc)
+    payload = {
+        "vs": key,
+        "synced_at": synced_at.isoformat() if synced_at else None,
+        "changed_at": changed_at.isoformat(),
+        "history": history,
+        "origin": PROCESS_ID,
+    }
+    session.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": CHANNEL, "payload": json.dumps(payload)})
+    # El propio proceso no espera a recibir su notificacion: se aplica en after_commit.
+    session.info.setdefault("freshness_changes", []).append((key, synced_at, changed_at, history))
+
+
+def publish_latest(session: Session) -> None:
+    """Publica como sincronizadas las divisas presentes en ``coin_latest`` (p. ej. tras una carga masiva)."""
+    rows = session.execute(
+        select(CoinLatest.vs_currency, func.max(CoinLatest.recorded_at)).group_by(CoinLatest.vs_currency)
+    ).all()
+    for vs, last in rows:
+        publish_change(session, vs, synced_at=last)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed_changes(session: Session) -> None:
+    for change in session.info.pop("freshness_changes", []):
+        _apply(*change)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session: Session) -> None:
+    session.info.pop("freshness_changes", None)
+
+
+def _handle_notification(payload: str) -> None:
+    try:
+        data = json.loads(payload)
+        if data.get("origin") == PROCESS_ID:
+            # Eco propio: aplicarlo otra vez vaciaria de nuevo la cache y cambiaria los ETag.
+            return
+        synced_at = datetime.fromisoformat(data["synced_at"]) if data.get("synced_at") else None
+        _apply(data["vs"], synced_at, datetime.fromisoformat(data["changed_at"]), bool(data.get("history", True)))
+    except (KeyError, TypeError, ValueError) as exc:
+        logger.warning("Notificacion de sincronizacion invalida (%r): %s", payload, exc)
+        return
+    if synced_at is not None and data["vs"] != ALL_CURRENCIES:
+        # Precios escritos por otro proceso: el stream local los lee de coin_latest.
+        try:
+            get_broadcaster().refresh(data["vs"], synced_at)
+        except Exception as exc:  # pragma: no cover - logging de errores
+            logger.warning("No se pudieron difundir los precios de %s: %s", data["vs"], exc)
+
+
+class _Listener(threading.Thread):
+    """Hilo que escucha ``CHANNEL`` y reconecta (recalentando el registro) si se pierde la conexion."""
+
+    def __init__(self, poll_seconds: float = 5.0) -> None:
+        super().__init__(name="freshness-listener", daemon=True)
+        self.poll_seconds = poll_seconds
+        self.stopped = threading.Event()
+
+    def _listen_once(self) -> None:
+        connection = get_engine().raw_connection()
+        driver = connection.driver_connection
+        # La conexion queda fuera del pool: es de uso exclusivo del listener.
+        connection.detach()
+        try:
+            driver.autocommit = True
+            with driver.cursor() as cursor:
+                cursor.execute(f"LISTEN {CHANNEL}")
+            # Lo ocurrido mientras no se escuchaba se recupera desde la base.
+            with session_scope() as session:
+                if get_registry().warm(session):
+                    bump_generation()
+            while not self.stopped.is_set():
+                ready, _, _ = select_module.select([driver], [], [], self.poll_seconds)
+                if not ready:
+                    continue
+                driver.poll()
+                while driver.notifies:
+                    _handle_notification(driver.notifies.pop(0).payload)
+        finally:
+            connection.close()
+
+    def run(self) -> None:
+        delay = 1.0
+        while not self.stopped.is_set():
+            try:
+                self._listen_once()
+            except Exception as exc:  # pragma: no cover - logging de errores
+                logger.warning("Listener de sincronizaciones desconectado: %s; reintento en %.0f s", exc, delay)
+                self.stopped.wait(delay)
+                delay = min(delay * 2, 60.0)
+            else:
+                delay = 1.0
+
+    def stop(self) -> None:
+        self.stopped.set()
+
+
+_listener: _Listener | None = None
+
+
+def _warm_registry() -> None:
+    try:
+        with session_scope() as session:
+            get_registry().warm(session)
+    except Exception as exc:  # pragma: no cover - logging de errores
+        logger.warning("No se pudo calentar el registro de frescura: %s", exc)
+
+
+async def start_freshness_tracking() -> None:
+    """Calienta el registro y, si esta habilitado, arranca el listener de ``NOTIFY``."""
+    global _listener  # pylint: disable=global-statement
+    await asyncio.get_running_loop().run_in_executor(None, _warm_registry)
+    if not get_settings().freshness_listen or (_listener is not None and _listener.is_alive()):
+        return
+    _listener = _Listener()
+    _listener.start()
+    logger.info("Listener de sincronizaciones iniciado en el canal %s.", CHANNEL)
+
+
+async def stop_freshness_tracking() -> None:
+    global _listener  # pylint: disable=global-statement
+    if _listener is None:
+        return
+    _listener.stop()
+    await asyncio.get_running_loop().run_in_executor(None, _listener.join, _listener.poll_seconds + 1)
+    _listener = None
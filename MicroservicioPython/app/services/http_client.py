@@ -0,0 +1,269 @@
+"""Cliente HTTP compartido para la API de CoinGecko.
+
+Mantiene un unico ``requests.Session`` por proceso con un pool de conexiones
+keep-alive, reintenta con backoff exponencial y jitter ante 429/5xx y errores
+de red (respetando ``Retry-After``), corta las llamadas con un circuit breaker
+mientras CoinGecko no responde y contabiliza peticiones, reintentos y latencia
+para poder medir el consumo de cuota.
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ..config import get_settings
+from .ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+_LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class CoinGeckoUnavailable(RuntimeError):
+    """Se lanza sin llamar a la API mientras el circuit breaker esta abierto."""
+
+
+class CircuitBreaker:
+    """Circuit breaker por fallos consecutivos con reapertura tras ``reset_timeout``."""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float) -> None:
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def before_call(self) -> None:
+        """Deja pasar la llamada o lanza ``CoinGeckoUnavailable`` si el circuito esta abierto."""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+            if remaining > 0 or self._probe_in_flight:
+                raise CoinGeckoUnavailable(
+                    f"CoinGecko no disponible; circuito abierto durante {max(remaining, 0):.0f} s mas"
+                )
+            # Semiabierto: se deja pasar una unica llamada de prueba.
+            self._probe_in_flight = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probe_in_flight = False
+
+    def record_neutral(self) -> None:
+        """Cierra una llamada que no prueba ni la salud ni la caida de la API (p. ej. cuota agotada).
+
+        No toca el contador de fallos ni reabre o cierra el circuito; solo
+        libera la llamada de prueba para que otra pueda intentarlo.
+        """
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probe_in_flight or self._failures >= self.failure_threshold:
+                if self._opened_at is None or self._probe_in_flight:
+                    logger.warning("Circuit breaker de CoinGecko abierto tras %s fallos", self._failures)
+                self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+
+def _retry_after_seconds(response: requests.Response) -> Optional[float]:
+    """Interpreta la cabecera ``Retry-After`` (segundos o fecha HTTP)."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class CoinGeckoClient:
+    """GET JSON contra CoinGecko con pool, reintentos, limitador y circuit breaker."""
+
+    def __init__(
+        self,
+        timeout: float,
+        pool_size: int,
+        max_retries: int,
+        backoff_seconds: float,
+        backoff_max_seconds: float,
+        limiter: TokenBucket,
+        breaker: CircuitBreaker,
+    ) -> None:
+        self.timeout = timeout
+        self.max_retries = max(0, max_retries)
+        self.backoff_seconds = backoff_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.limiter = limiter
+        self.breaker = breaker
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Any] = {
+            "calls": 0,
+            "requests": 0,
+            "retries": 0,
+            "failures": 0,
+            "rate_limited": 0,
+            "circuit_rejections": 0,
+            "limiter_wait_seconds": 0.0,
+            "latency_ms_total": 0.0,
+            "latency_ms_max": 0.0,
+            "status": {},
+            "latency_ms_buckets": {str(bound): 0 for bound in _LATENCY_BUCKETS_MS} | {"+Inf": 0},
+        }
+
+    def _record_request(self, latency_ms: float, status: str, waited: float) -> None:
+        with self._lock:
+            stats = self._stats
+            stats["requests"] += 1
+            stats["limiter_wait_seconds"] += waited
+            stats["latency_ms_total"] += latency_ms
+            stats["latency_ms_max"] = max(stats["latency_ms_max"], latency_ms)
+            stats["status"][status] = stats["status"].get(status, 0) + 1
+            bucket = next((str(bound) for bound in _LATENCY_BUCKETS_MS if latency_ms <= bound), "+Inf")
+            stats["latency_ms_buckets"][bucket] += 1
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def _backoff(self, attempt: int) -> float:
+        cap = min(self.backoff_max_seconds, self.backoff_seconds * (2 ** attempt))
+        return random.uniform(cap / 2, cap)
+
+    def get_json(self, url: str, params: Dict[str, Any] | None = None) -> Any:
+        """Realiza el GET y devuelve el JSON, reintentando fallos transitorios."""
+        try:
+            self.breaker.before_call()
+        except CoinGeckoUnavailable:
+            self._count("circuit_rejections")
+            raise
+        self._count("calls")
+
+        try:
+            return self._get_with_retries(url, params)
+        except BaseException:
+            # Libera la llamada de prueba aunque el error no se haya clasificado:
+            # si no, el circuito semiabierto rechazaria todas las llamadas siguientes.
+            self.breaker.record_neutral()
+            raise
+
+    def _get_with_retries(self, url: str, params: Dict[str, Any] | None) -> Any:
+        attempt = 0
+        while True:
+            waited = self.limiter.acquire()
+            started = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                self._record_request((time.perf_counter() - started) * 1000, exc.__class__.__name__, waited)
+                if attempt >= self.max_retries:
+                    self._count("failures")
+                    self.breaker.record_failure()
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning("Error de red contra CoinGecko (%s); reintento en %.1f s", exc, delay)
+            except requests.RequestException as exc:
+                # Errores no transitorios (redirecciones, URL invalida, cuerpo corrupto): sin reintento.
+                self._record_request((time.perf_counter() - started) * 1000, exc.__class__.__name__, waited)
+                self._count("failures")
+                self.breaker.record_failure()
+                raise
+            else:
+                self._record_request((time.perf_counter() - started) * 1000, str(response.status_code), waited)
+                if response.status_code not in _RETRY_STATUS:
+                    # Cualquier respuesta no transitoria (incluido un 404) indica que la API esta viva.
+                    self.breaker.record_success()
+                    response.raise_for_status()
+                    return response.json()
+                if response.status_code == 429:
+                    self._count("rate_limited")
+                if attempt >= self.max_retries:
+                    self._count("failures")
+                    if response.status_code == 429:
+                        # Un 429 no demuestra que la API este sana: no cierra el circuito ni
+                        # reinicia los fallos acumulados, pero tampoco cuenta como caida.
+                        self.breaker.record_neutral()
+                    else:
+                        self.breaker.record_failure()
+                    response.raise_for_status()
+                retry_after = _retry_after_seconds(response)
+                if retry_after is None:
+                    delay = self._backoff(attempt)
+                else:
+                    # Acotado: un ``Retry-After`` desmesurado pararia a todos los hilos.
+                    delay = min(retry_after, self.backoff_max_seconds)
+                logger.warning("CoinGecko devolvio %s para %s; reintento en %.1f s", response.status_code, url, delay)
+                if response.status_code == 429:
+                    # La cuota es global: se frena a todos los hilos, no solo a este.
+                    self.limiter.pause(delay)
+                    delay = 0.0
+
+            self._count("retries")
+            attempt += 1
+            if delay:
+                time.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        """Copia de los contadores acumulados desde el arranque del proceso."""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["status"] = dict(self._stats["status"])
+            snapshot["latency_ms_buckets"] = dict(self._stats["latency_ms_buckets"])
+        requests_done = snapshot["requests"]
+        snapshot["latency_ms_avg"] = snapshot["latency_ms_total"] / requests_done if requests_done else None
+        snapshot["circuit_state"] = self.breaker.state
+        return snapshot
+
+
+@lru_cache
+def get_client() -> CoinGeckoClient:
+    """Cliente unico del proceso (comparte pool, limitador y circuit breaker)."""
+    settings = get_settings()
+    return CoinGeckoClient(
+        timeout=settings.external_timeout,
+        pool_size=settings.coingecko_pool_size,
+        max_retries=settings.external_max_retries,
+        backoff_seconds=settings.external_backoff_seconds,
+        backoff_max_seconds=settings.external_backoff_max_seconds,
+        limiter=TokenBucket(settings.coingecko_rate_limit_per_minute, burst=settings.coingecko_rate_burst),
+        breaker=CircuitBreaker(settings.circuit_failure_threshold, settings.circuit_reset_seconds),
+    )
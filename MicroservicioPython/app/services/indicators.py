@@ -0,0 +1,243 @@
+"""Indicadores tecnicos incrementales (EMA, MACD, RSI, Bollinger y ATR).
+
+Cada indicador se expresa como un estado pequeno que se actualiza en O(1)
+con cada precio nuevo (``advance``):
+
+* EMA rapida/lenta y senal del MACD: medias exponenciales ``alpha = 2 / (n + 1)``.
+  La senal arranca en el primer MACD publicado (muestra ``EMA_SLOW``), no en 0.
+* RSI y ATR: medias de Wilder de subidas, bajadas y rango absoluto entre
+  snapshots consecutivos (sin maximos/minimos intraperiodo, el rango es
+  ``|p_t - p_{t-1}|``).  Hasta completar el periodo se usa la media simple.
+* Bollinger: media y desviacion de los ultimos ``BOLLINGER_PERIOD`` precios,
+  guardados en una ventana circular de tamano fijo.
+
+La sincronizacion avanza el estado con los snapshots nuevos en su misma
+transaccion; ``recompute_indicator_states`` lo reconstruye desde el historico
+(tras cargas masivas fuera de orden o para inicializarlo).
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Mapping, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from ..db import session_scope
+from ..models import CoinIndicatorState, CoinSnapshot
+from .freshness import publish_change
+
+logger = logging.getLogger(__name__)
+
+EMA_FAST = 12
+EMA_SLOW = 26
+MACD_SIGNAL = 9
+RSI_PERIOD = 14
+ATR_PERIOD = 14
+BOLLINGER_PERIOD = 20
+BOLLINGER_K = 2.0
+
+_STATE_COLUMNS = (
+    "last_at",
+    "last_price",
+    "sample_count",
+    "ema_fast",
+    "ema_slow",
+    "macd_signal",
+    "avg_gain",
+    "avg_loss",
+    "avg_range",
+    "recent_prices",
+)
+_UPSERT_CHUNK = 1000
+
+
+def _ema(previous: float, value: float, period: int) -> float:
+    return previous + (value - previous) * (2.0 / (period + 1))
+
+
+def _wilder(previous: float, value: float, count: int, period: int) -> float:
+    """Media simple hasta ``period`` observaciones y suavizado de Wilder despues."""
+    if count <= period:
+        return previous + (value - previous) / count
+    return (previous * (period - 1) + value) / period
+
+
+def advance(state: Mapping[str, Any] | None, price: float, recorded_at: datetime) -> Dict[str, Any]:
+    """Devuelve el estado tras anadir ``price``; no modifica ``state``."""
+    if state is None:
+        return {
+            "last_at": recorded_at,
+            "last_price": price,
+            "sample_count": 1,
+            "ema_fast": price,
+            "ema_slow": price,
+            "macd_signal": 0.0,
+            "avg_gain": 0.0,
+            "avg_loss": 0.0,
+            "avg_range": 0.0,
+            "recent_prices": [price],
+        }
+    changes = state["sample_count"]
+    change = price - state["last_price"]
+    ema_fast = _ema(state["ema_fast"], price, EMA_FAST)
+    ema_slow = _ema(state["ema_slow"], price, EMA_SLOW)
+    macd = ema_fast - ema_slow
+    if changes + 1 < EMA_SLOW:
+        macd_signal = 0.0
+    elif changes + 1 == EMA_SLOW:
+        macd_signal = macd
+    else:
+        macd_signal = _ema(state["macd_signal"], macd, MACD_SIGNAL)
+    return {
+        "last_at": recorded_at,
+        "last_price": price,
+        "sample_count": changes + 1,
+        "ema_fast": ema_fast,
+        "ema_slow": ema_slow,
+        "macd_signal": macd_signal,
+        "avg_gain": _wilder(state["avg_gain"], max(change, 0.0), changes, RSI_PERIOD),
+        "avg_loss": _wilder(state["avg_loss"], max(-change, 0.0), changes, RSI_PERIOD),
+        "avg_range": _wilder(state["avg_range"], abs(change), changes, ATR_PERIOD),
+        "recent_prices": (list(state["recent_prices"]) + [price])[-BOLLINGER_PERIOD:],
+    }
+
+
+def indicators_from_state(state: Mapping[str, Any]) -> Dict[str, Any]:
+    """Valores de los indicadores; ``None`` mientras no hay muestras suficientes para su periodo."""
+    count = state["sample_count"]
+    price = state["last_price"]
+    result: Dict[str, Any] = {
+        "last_price": price,
+        "last_updated": state["last_at"],
+        "sample_count": count,
+        "ema_fast": None,
+        "ema_slow": None,
+        "macd": None,
+        "macd_signal": None,
+        "macd_histogram": None,
+        "rsi": None,
+        "bollinger_middle": None,
+        "bollinger_upper": None,
+        "bollinger_lower": None,
+        "bollinger_percent_b": None,
+        "bollinger_bandwidth": None,
+        "atr": None,
+        "atr_pct": None,
+    }
+    if count >= EMA_FAST:
+        result["ema_fast"] = state["ema_fast"]
+    if count >= EMA_SLOW:
+        macd = state["ema_fast"] - state["ema_slow"]
+        result.update(ema_slow=state["ema_slow"], macd=macd)
+        if count >= EMA_SLOW + MACD_SIGNAL - 1:
+            result.update(macd_signal=state["macd_signal"], macd_histogram=macd - state["macd_signal"])
+    if count - 1 >= RSI_PERIOD:
+        gain, loss = state["avg_gain"], state["avg_loss"]
+        if loss == 0:
+            result["rsi"] = 100.0 if gain > 0 else 50.0
+        else:
+            result["rsi"] = 100.0 - 100.0 / (1.0 + gain / loss)
+    if count - 1 >= ATR_PERIOD:
+        result["atr"] = state["avg_range"]
+        result["atr_pct"] = state["avg_range"] / price * 100 if price else None
+    window = state["recent_prices"]
+    if len(window) >= BOLLINGER_PERIOD:
+        mean = sum(window) / len(window)
+        std = math.sqrt(max(sum((value - mean) ** 2 for value in window) / len(window), 0.0))
+        upper, lower = mean + BOLLINGER_K * std, mean - BOLLINGER_K * std
+        result.update(
+            bollinger_middle=mean,
+            bollinger_upper=upper,
+            bollinger_lower=lower,
+            bollinger_percent_b=(price - lower) / (upper - lower) if upper > lower else None,
+            bollinger_bandwidth=(upper - lower) / mean if mean else None,
+        )
+    return result
+
+
+def state_values(row: CoinIndicatorState) -> Dict[str, Any]:
+    """Estado de una fila ``coin_indicator_state`` en el formato de ``advance``."""
+    return {column: getattr(row, column) for column in _STATE_COLUMNS}
+
+
+def _upsert_states(session: Session, states: Dict[Tuple[int, str], Dict[str, Any]]) -> None:
+    """Guarda los estados sin retroceder nunca a uno anterior (``last_at`` creciente)."""
+    rows = [dict(state, coin_id=coin_id, vs_currency=vs) for (coin_id, vs), state in states.items()]
+    for start in range(0, len(rows), _UPSERT_CHUNK):
+        stmt = pg_insert(CoinIndicatorState).values(rows[start:start + _UPSERT_CHUNK])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CoinIndicatorState.coin_id, CoinIndicatorState.vs_currency],
+            set_={column: stmt.excluded[column] for column in _STATE_COLUMNS},
+            where=CoinIndicatorState.last_at <= stmt.excluded.last_at,
+        )
+        session.execute(stmt)
+
+
+def update_indicator_states(session: Session, rows: Iterable[Mapping[str, Any]]) -> int:
+    """Avanza el estado de cada moneda con los snapshots de ``rows`` posteriores a su ``last_at``.
+
+    Los snapshots repetidos o anteriores al estado se ignoran, asi que se
+    puede llamar con el lote completo aunque parte ya existiera.  Devuelve el
+    numero de estados actualizados.
+    """
+    samples: Dict[Tuple[int, str], List[Tuple[datetime, float]]] = {}
+    for row in rows:
+        if row.get("price") is None:
+            continue
+        samples.setdefault((row["coin_id"], row["vs_currency"]), []).append((row["recorded_at"], float(row["price"])))
+    if not samples:
+        return 0
+
+    existing = session.execute(
+        select(CoinIndicatorState)
+        .where(CoinIndicatorState.coin_id.in_({coin_id for coin_id, _ in samples}))
+        .where(CoinIndicatorState.vs_currency.in_({vs for _, vs in samples}))
+        .with_for_update()
+    ).scalars()
+    states = {(row.coin_id, row.vs_currency): state_values(row) for row in existing}
+
+    updated: Dict[Tuple[int, str], Dict[str, Any]] = {}
+    for key, points in samples.items():
+        state = states.get(key)
+        for recorded_at, price in sorted(points):
+            if state is not None and recorded_at <= state["last_at"]:
+                continue
+            state = advance(state, price, recorded_at)
+            updated[key] = state
+    if updated:
+        _upsert_states(session, updated)
+    return len(updated)
+
+
+def recompute_indicator_states(vs_currency: str | None = None, coin_ids: Sequence[int] | None = None) -> int:
+    """Reconstruye el estado desde los snapshots almacenados, en una sola pasada ordenada.
+
+    Recorre el historico con un cursor de servidor y aplica ``advance`` a
+    cada moneda, de modo que la memoria usada es proporcional al numero de
+    monedas y no al de snapshots.  Devuelve el numero de estados escritos.
+    """
+    stmt = (
+        select(CoinSnapshot.coin_id, CoinSnapshot.vs_currency, CoinSnapshot.recorded_at, CoinSnapshot.price)
+        .where(CoinSnapshot.price.is_not(None))
+        .order_by(CoinSnapshot.coin_id, CoinSnapshot.vs_currency, CoinSnapshot.recorded_at)
+    )
+    if vs_currency:
+        stmt = stmt.where(CoinSnapshot.vs_currency == vs_currency.lower())
+    if coin_ids:
+        stmt = stmt.where(CoinSnapshot.coin_id.in_(coin_ids))
+
+    states: Dict[Tuple[int, str], Dict[str, Any]] = {}
+    with session_scope() as session:
+        for coin_id, vs, recorded_at, price in session.execute(stmt.execution_options(yield_per=10_000)):
+            key = (coin_id, vs)
+            states[key] = advance(states.get(key), float(price), recorded_at)
+    with session_scope() as session:
+        _upsert_states(session, states)
+        publish_change(session, vs_currency.lower() if vs_currency else None, history=False)
+    logger.info("Indicadores recalculados para %s monedas", len(states))
+    return len(states)
@@ -4,10 +4,13 @@ from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 from typing import Any, Dict, List
 
-from sqlalchemy import func, select
+from sqlalchemy import func, or_, select, union_all
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Subquery
 
-from ..db import session_scope
-from ..models import Coin, CoinSnapshot, CoinSeries
+from ..db import async_session_scope, session_scope
+from ..models import Coin, CoinLatest, CoinPriceRollup, CoinPriceRollupDaily, CoinSnapshot, CoinSeries
+from .rollups import window_start, window_stats_columns
 
 
 def _decimal_to_float(value: Decimal | None) -> float | None:
@@ -25,82 +28,58 @@ def _safe_ratio(numerator: Decimal | None, denominator: Decimal | None) -> float
 
 
 def get_latest_prices(vs_currency: str = "usd", per_page: int = 50, page: int = 1) -> List[Dict[str, Any]]:
-    """Devuelve los ultimos precios almacenados en la base de datos junto con KPIs."""
+    """Devuelve los ultimos precios almacenados en la base de datos junto con KPIs.
+
+    La pagina se lee de ``coin_latest`` (lectura indexada por divisa y market
+    cap) y los KPIs se combinan desde los agregados horarios de esa pagina
+    (24 y 168 buckets), sin recorrer los snapshots.
+    """
+    with session_scope() as session:
+        return _latest_prices(session, vs_currency, per_page, page)
+
+
+async def get_latest_prices_async(vs_currency: str = "usd", per_page: int = 50, page: int = 1) -> List[Dict[str, Any]]:
+    """Variante asincrona de ``get_latest_prices`` sobre el motor ``asyncpg``."""
+    async with async_session_scope() as session:
+        return await session.run_sync(_latest_prices, vs_currency, per_page, page)
+
+
+def _latest_prices(session: Session, vs_currency: str, per_page: int, page: int) -> List[Dict[str, Any]]:
     vs = vs_currency.lower()
     per_page = max(1, per_page)
     page = max(1, page)
 
-    with session_scope() as session:
-        now = datetime.now(timezone.utc)
-        day_ago = now - timedelta(hours=24)
-        week_ago = now - timedelta(days=7)
-
-        latest_snapshot = (
-            select(
-                CoinSnapshot.coin_id.label("coin_id"),
-                func.max(CoinSnapshot.recorded_at).label("max_recorded"),
-            )
-            .where(CoinSnapshot.vs_currency == vs)
-            .group_by(CoinSnapshot.coin_id)
-            .subquery()
-        )
-
-        stats_24h = (
-            select(
-                CoinSnapshot.coin_id.label("coin_id"),
-                func.avg(CoinSnapshot.price).label("avg_price_24h"),
-            )
-            .where(CoinSnapshot.vs_currency == vs)
-            .where(CoinSnapshot.recorded_at >= day_ago)
-            .group_by(CoinSnapshot.coin_id)
-            .subquery()
-        )
+    now = datetime.now(timezone.utc)
 
-        stats_7d = (
-            select(
-                CoinSnapshot.coin_id.label("coin_id"),
-                func.avg(CoinSnapshot.price).label("avg_price_7d"),
-                func.min(CoinSnapshot.price).label("min_price_7d"),
-                func.max(CoinSnapshot.price).label("max_price_7d"),
-                func.stddev_pop(CoinSnapshot.price).label("volatility_7d"),
-            )
-            .where(CoinSnapshot.vs_currency == vs)
-            .where(CoinSnapshot.recorded_at >= week_ago)
-            .group_by(CoinSnapshot.coin_id)
-            .subquery()
+    page_stmt = (
+        select(Coin, CoinLatest)
+        .join(CoinLatest, CoinLatest.coin_id == Coin.id)
+        .where(CoinLatest.vs_currency == vs)
+        .order_by(
+            CoinLatest.market_cap.desc().nulls_last(),
+            CoinLatest.market_cap_rank.asc().nulls_last(),
         )
+        .limit(per_page)
+        .offset((page - 1) * per_page)
+    )
+    rows = session.execute(page_stmt).all()
 
-        stmt = (
-            select(
-                Coin,
-                CoinSnapshot,
-                stats_24h.c.avg_price_24h,
-                stats_7d.c.avg_price_7d,
-                stats_7d.c.min_price_7d,
-                stats_7d.c.max_price_7d,
-                stats_7d.c.volatility_7d,
-            )
-            .join(latest_snapshot, Coin.id == latest_snapshot.c.coin_id)
-            .join(
-                CoinSnapshot,
-                (CoinSnapshot.coin_id == latest_snapshot.c.coin_id)
-                & (CoinSnapshot.recorded_at == latest_snapshot.c.max_recorded)
-                & (CoinSnapshot.vs_currency == vs),
-            )
-            .outerjoin(stats_24h, stats_24h.c.coin_id == Coin.id)
-            .outerjoin(stats_7d, stats_7d.c.coin_id == Coin.id)
-            .order_by(
-                func.coalesce(CoinSnapshot.market_cap, 0).desc(),
-                func.coalesce(Coin.market_cap_rank, 1_000_000).asc(),
-            )
-            .limit(per_page)
-            .offset((page - 1) * per_page)
+    kpi_rows: Dict[int, Any] = {}
+    if rows:
+        _, avg_24h, _, _, _ = window_stats_columns(since=window_start(now, 24))
+        _, avg_7d, min_7d, max_7d, stddev_7d = window_stats_columns()
+        stats_stmt = (
+            select(CoinPriceRollup.coin_id, avg_24h, avg_7d, min_7d, max_7d, stddev_7d)
+            .where(CoinPriceRollup.vs_currency == vs)
+            .where(CoinPriceRollup.coin_id.in_([coin.id for coin, _ in rows]))
+            .where(CoinPriceRollup.bucket_start >= window_start(now, 24 * 7))
+            .group_by(CoinPriceRollup.coin_id)
         )
-
-        rows = session.execute(stmt).all()
+        kpi_rows = {row[0]: row[1:] for row in session.execute(stats_stmt)}
 
     results: List[Dict[str, Any]] = []
-    for coin, snapshot, avg_24h, avg_7d, min_7d, max_7d, volatility_7d in rows:
+    for coin, snapshot in rows:
+        avg_24h, avg_7d, min_7d, max_7d, volatility_7d = kpi_rows.get(coin.id, (None,) * 5)
         kpis: Dict[str, Any] = {
             "avg_price_24h": _decimal_to_float(avg_24h),
             "avg_price_7d": _decimal_to_float(avg_7d),
@@ -134,67 +113,177 @@ def get_latest_prices(vs_currency: str = "usd", per_page: int = 50, page: int =
 
 
 
+DOWNSAMPLE_MODES = ("m4", "latest")
+
+
+def _price_source(model: Any, coin_pk: int, vs: str, since: datetime | None) -> Subquery:
+    """Puntos ``(recorded_at, price)`` de una tabla de precios, ya filtrados en SQL."""
+    stmt = (
+        select(model.recorded_at.label("recorded_at"), model.price.label("price"))
+        .where(model.coin_id == coin_pk)
+        .where(model.vs_currency == vs)
+        .where(model.price.is_not(None))
+    )
+    if since is not None:
+        stmt = stmt.where(model.recorded_at >= since)
+    return stmt.subquery()
+
+
+def _snapshot_price_source(coin_pk: int, vs: str, since: datetime | None) -> Subquery:
+    """Historico de snapshots completado con los cierres de los agregados compactados.
+
+    Donde ya no quedan snapshots en bruto (borrados por ``compact_snapshots``)
+    se usa el cierre de cada bucket horario y, antes aun, el de cada bucket
+    diario.  Los niveles se encadenan por el primer instante que cubre el
+    nivel mas fino, asi que no hay puntos solapados.
+    """
+    first_raw = (
+        select(func.min(CoinSnapshot.recorded_at))
+        .where(CoinSnapshot.coin_id == coin_pk, CoinSnapshot.vs_currency == vs)
+        .scalar_subquery()
+    )
+    first_hourly = (
+        select(func.min(CoinPriceRollup.open_at))
+        .where(CoinPriceRollup.coin_id == coin_pk, CoinPriceRollup.vs_currency == vs)
+        .scalar_subquery()
+    )
+    raw = _price_source(CoinSnapshot, coin_pk, vs, since)
+    selects = [select(raw.c.recorded_at, raw.c.price)]
+    for model, boundary in (
+        (CoinPriceRollup, first_raw),
+        (CoinPriceRollupDaily, func.coalesce(first_hourly, first_raw)),
+    ):
+        stmt = (
+            select(model.close_at.label("recorded_at"), model.close_price.label("price"))
+            .where(model.coin_id == coin_pk)
+            .where(model.vs_currency == vs)
+            .where(model.close_price.is_not(None))
+            .where(or_(boundary.is_(None), model.close_at < boundary))
+        )
+        if since is not None:
+            stmt = stmt.where(model.close_at >= since)
+        selects.append(stmt)
+    return union_all(*selects).subquery()
+
+
+def _load_points(session: Session, source: Subquery, max_points: int, downsample: str = "m4") -> List[List[float]]:
+    """Lee una serie ``(recorded_at, price)`` limitada a ``max_points`` puntos.
+
+    Si la ventana cabe entera se devuelve tal cual.  En modo ``latest`` se
+    conservan los ultimos ``max_points`` puntos; en modo ``m4`` el rango se
+    divide en ``max_points // 4`` intervalos de igual duracion y de cada uno
+    se conservan el primer, ultimo, minimo y maximo punto, de modo que la
+    forma de la serie (picos incluidos) cubre todo el rango solicitado.
+    """
+    max_points = max(1, max_points)
+    total, first_at, last_at = session.execute(
+        select(func.count(), func.min(source.c.recorded_at), func.max(source.c.recorded_at))
+    ).one()
+    if not total:
+        return []
+
+    if total <= max_points:
+        stmt = select(source.c.recorded_at, source.c.price).order_by(source.c.recorded_at.asc())
+    elif downsample == "latest":
+        tail = (
+            select(source.c.recorded_at, source.c.price)
+            .order_by(source.c.recorded_at.desc())
+            .limit(max_points)
+            .subquery()
+        )
+        stmt = select(tail.c.recorded_at, tail.c.price).order_by(tail.c.recorded_at.asc())
+    else:
+        buckets = max(1, max_points // 4)
+        span = max((last_at - first_at).total_seconds(), 1e-6)
+        offset = func.extract("epoch", source.c.recorded_at) - first_at.timestamp()
+        bucket = func.least(func.floor(offset * (buckets / span)), buckets - 1)
+        ts, price = source.c.recorded_at, source.c.price
+        ranked = select(
+            ts,
+            price,
+            func.row_number().over(partition_by=bucket, order_by=ts.asc()).label("rn_first"),
+            func.row_number().over(partition_by=bucket, order_by=ts.desc()).label("rn_last"),
+            func.row_number().over(partition_by=bucket, order_by=(price.asc(), ts.asc())).label("rn_min"),
+            func.row_number().over(partition_by=bucket, order_by=(price.desc(), ts.asc())).label("rn_max"),
+        ).subquery()
+        stmt = (
+            select(ranked.c.recorded_at, ranked.c.price)
+            .where(
+                or_(
+                    ranked.c.rn_first == 1,
+                    ranked.c.rn_last == 1,
+                    ranked.c.rn_min == 1,
+                    ranked.c.rn_max == 1,
+                )
+            )
+            .order_by(ranked.c.recorded_at.asc())
+        )
+
+    return [
+        [int(recorded_at.timestamp() * 1000), _decimal_to_float(price) or 0.0]
+        for recorded_at, price in session.execute(stmt)
+    ]
+
 
 def get_coin_detail_from_db(
     coin_id: str,
     vs_currency: str = "usd",
     days: int | None = None,
     max_points: int = 200,
+    downsample: str = "m4",
 ) -> Dict[str, Any]:
-    """Recupera el detalle de una moneda usando la serie almacenada en PostgreSQL."""
-    vs = vs_currency.lower()
+    """Recupera el detalle de una moneda usando la serie almacenada en PostgreSQL.
 
+    La ventana temporal y la reduccion a ``max_points`` se resuelven en SQL
+    (ver ``_load_points``); los datos de mercado se leen de ``coin_latest``.
+    """
     with session_scope() as session:
-        coin = (
-            session.execute(select(Coin).where(Coin.coingecko_id == coin_id))
-            .scalar_one_or_none()
-        )
-        if coin is None:
-            raise ValueError(f"No existe la moneda '{coin_id}' en la base sincronizada")
-
-        series_stmt = (
-            select(CoinSeries)
-            .where(CoinSeries.coin_id == coin.id)
-            .where(CoinSeries.vs_currency == vs)
-            .order_by(CoinSeries.recorded_at.asc())
-        )
-        series_rows = session.execute(series_stmt).scalars().all()
+        return _coin_detail(session, coin_id, vs_currency, days, max_points, downsample)
 
-        snapshots_stmt = (
-            select(CoinSnapshot)
-            .where(CoinSnapshot.coin_id == coin.id)
-            .where(CoinSnapshot.vs_currency == vs)
-            .order_by(CoinSnapshot.recorded_at.asc())
-        )
-        if days is not None and days > 0:
-            since = datetime.now(timezone.utc) - timedelta(days=days)
-            snapshots_stmt = snapshots_stmt.where(CoinSnapshot.recorded_at >= since)
-        snapshot_rows = session.execute(snapshots_stmt).scalars().all()
 
-    now = datetime.now(timezone.utc)
-    since_filter = None
+async def get_coin_detail_from_db_async(
+    coin_id: str,
+    vs_currency: str = "usd",
+    days: int | None = None,
+    max_points: int = 200,
+    downsample: str = "m4",
+) -> Dict[str, Any]:
+    """Variante asincrona de ``get_coin_detail_from_db`` sobre el motor ``asyncpg``."""
+    async with async_session_scope() as session:
+        return await session.run_sync(_coin_detail, coin_id, vs_currency, days, max_points, downsample)
+
+
+def _coin_detail(
+    session: Session,
+    coin_id: str,
+    vs_currency: str,
+    days: int | None,
+    max_points: int,
+    downsample: str,
+) -> Dict[str, Any]:
+    vs = vs_currency.lower()
+    since = None
     if days is not None and days > 0:
-        since_filter = now - timedelta(days=days)
-
-    filtered_series = [s for s in series_rows if since_filter is None or s.recorded_at >= since_filter]
-    if filtered_series:
-        limited_series = filtered_series[-max_points:]
-        prices_series = [
-            [int(s.recorded_at.timestamp() * 1000), _decimal_to_float(s.price) or 0.0]
-            for s in limited_series
-        ]
-    else:
-        limited_snapshots = snapshot_rows[-max_points:]
-        prices_series = [
-            [int(s.recorded_at.timestamp() * 1000), _decimal_to_float(s.price) or 0.0]
-            for s in limited_snapshots
-            if s.price is not None
-        ]
+        since = datetime.now(timezone.utc) - timedelta(days=days)
+
+    coin = (
+        session.execute(select(Coin).where(Coin.coingecko_id == coin_id))
+        .scalar_one_or_none()
+    )
+    if coin is None:
+        raise ValueError(f"No existe la moneda '{coin_id}' en la base sincronizada")
+
+    prices_series = _load_points(session, _price_source(CoinSeries, coin.id, vs, since), max_points, downsample)
+    if not prices_series:
+        prices_series = _load_points(session, _snapshot_price_source(coin.id, vs, since), max_points, downsample)
+
+    last_snapshot = session.get(CoinLatest, (coin.id, vs))
+    if last_snapshot is not None and since is not None and last_snapshot.recorded_at < since:
+        last_snapshot = None
 
     if not prices_series:
         raise ValueError(f"No hay serie almacenada para '{coin_id}' en {vs}.")
 
-    last_snapshot = snapshot_rows[-1] if snapshot_rows else None
     if last_snapshot is not None:
         current_price = _decimal_to_float(last_snapshot.price)
         market_cap = _decimal_to_float(last_snapshot.market_cap)
@@ -203,17 +292,14 @@ def get_coin_detail_from_db(
         change_1h = _decimal_to_float(last_snapshot.change_1h)
         change_24h = _decimal_to_float(last_snapshot.change_24h)
         change_7d = _decimal_to_float(last_snapshot.change_7d)
-    elif filtered_series:
-        last_series = filtered_series[-1]
-        current_price = _decimal_to_float(last_series.price)
+    else:
+        current_price = prices_series[-1][1]
         market_cap = None
         total_volume = None
         ath = None
         change_1h = None
         change_24h = None
         change_7d = None
-    else:
-        raise ValueError(f"No hay informacion reciente para '{coin_id}' en {vs}.")
 
     return {
         "id": coin.coingecko_id,
@@ -0,0 +1,209 @@
+"""Gestion de las particiones mensuales de ``coin_snapshots``.
+
+``coin_snapshots`` esta particionada por rango de ``recorded_at`` con una
+particion por mes (``coin_snapshots_pYYYYMM``, limites en UTC).  Las consultas
+que filtran por ``recorded_at`` solo recorren las particiones afectadas y la
+retencion se aplica desenganchando y borrando particiones completas en lugar
+de ejecutar ``DELETE`` masivos.
+
+Crear una particion bloquea brevemente la tabla padre, asi que se crean por
+adelantado (``maintain_snapshot_partitions``) y en una conexion propia en
+autocommit; la sincronizacion solo comprueba una cache en memoria.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..db import get_engine, session_scope
+from .freshness import publish_change
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "coin_snapshots"
+_NAME_RE = re.compile(rf"^{PARENT_TABLE}_p(\d{{4}})(\d{{2}})$")
+
+_known: set[str] = set()
+_known_lock = threading.Lock()
+
+
+def month_start(moment: datetime) -> datetime:
+    """Primer instante (UTC) del mes de ``moment``."""
+    moment = moment.astimezone(timezone.utc)
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(moment: datetime, months: int) -> datetime:
+    index = moment.year * 12 + moment.month - 1 + months
+    return moment.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(start: datetime) -> str:
+    return f"{PARENT_TABLE}_p{start.year:04d}{start.month:02d}"
+
+
+def _months(start: datetime, end: datetime) -> Iterator[datetime]:
+    current = month_start(start)
+    while current <= end:
+        yield current
+        current = add_months(current, 1)
+
+
+def _existing(connection: Connection) -> Dict[str, datetime]:
+    """Particiones enganchadas a ``coin_snapshots`` (nombre -> inicio del mes)."""
+    rows = connection.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :parent"
+        ),
+        {"parent": PARENT_TABLE},
+    ).scalars()
+    existing: Dict[str, datetime] = {}
+    for name in rows:
+        match = _NAME_RE.match(name)
+        if match:
+            existing[name] = datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)
+    return existing
+
+
+def _create(connection: Connection, start: datetime) -> str:
+    name = partition_name(start)
+    connection.execute(
+        text(
+            f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF {PARENT_TABLE} '
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{add_months(start, 1).isoformat()}')"
+        )
+    )
+    return name
+
+
+def _create_missing(connection: Connection, start: datetime, end: datetime) -> List[str]:
+    existing = _existing(connection)
+    return [_create(connection, month) for month in _months(start, end) if partition_name(month) not in existing]
+
+
+def ensure_snapshot_partitions(start: datetime, end: datetime | None = None) -> List[str]:
+    """Garantiza que existen las particiones de ``start`` a ``end`` (en autocommit).
+
+    No debe llamarse desde una transaccion que ya haya tocado ``coin_snapshots``.
+    Devuelve los nombres de las particiones creadas.
+    """
+    end = end or start
+    wanted = {partition_name(month) for month in _months(start, end)}
+    with _known_lock:
+        if wanted <= _known:
+            return []
+    with get_engine().connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        created = _create_missing(connection, start, end)
+        existing = _existing(connection)
+    with _known_lock:
+        _known.update(existing)
+    if created:
+        logger.info("Particiones de %s creadas: %s", PARENT_TABLE, ", ".join(created))
+    return created
+
+
+class MissingSnapshotPartitions(Exception):
+    """Faltan particiones para el rango ``first``..``last`` de una carga ya iniciada."""
+
+    def __init__(self, first: datetime, last: datetime) -> None:
+        super().__init__(f"Faltan particiones de {PARENT_TABLE} entre {first.isoformat()} y {last.isoformat()}")
+        self.first = first
+        self.last = last
+
+
+def require_snapshot_partitions(session: Session, start: datetime, end: datetime) -> None:
+    """Comprueba, sin crearlas, que existen las particiones de ``start`` a ``end``.
+
+    La usa la carga masiva, que solo conoce el rango de fechas cuando los
+    datos ya estan en la tabla temporal: crear la particion dentro de esa
+    transaccion retendria el bloqueo exclusivo de ``coin_snapshots`` hasta
+    el commit.  Si falta alguna lanza ``MissingSnapshotPartitions`` para que
+    el llamador la cree con ``ensure_snapshot_partitions`` y repita el lote.
+    """
+    wanted = {partition_name(month) for month in _months(start, end)}
+    with _known_lock:
+        if wanted <= _known:
+            return
+    existing = _existing(session.connection())
+    with _known_lock:
+        _known.update(existing)
+    if not wanted <= set(existing):
+        raise MissingSnapshotPartitions(start, end)
+
+
+def _drop_before(connection: Connection, cutoff: datetime) -> List[str]:
+    """Desengancha y borra las particiones cuyo mes termina antes de ``cutoff``."""
+    dropped: List[str] = []
+    for name, start in sorted(_existing(connection).items(), key=lambda item: item[1]):
+        if add_months(start, 1) > cutoff:
+            continue
+        connection.execute(text(f'ALTER TABLE {PARENT_TABLE} DETACH PARTITION "{name}"'))
+        connection.execute(text(f'DROP TABLE "{name}"'))
+        dropped.append(name)
+    return dropped
+
+
+def _refresh_known(connection: Connection) -> None:
+    existing = _existing(connection)
+    with _known_lock:
+        _known.clear()
+        _known.update(existing)
+
+
+def drop_snapshot_partitions_before(cutoff: datetime) -> List[str]:
+    """Borra las particiones que solo contienen snapshots anteriores a ``cutoff``.
+
+    Es el camino rapido de la compactacion: una particion entera se retira
+    con una operacion de catalogo en lugar de borrar sus filas por lotes.
+    """
+    with get_engine().connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        dropped = _drop_before(connection, cutoff)
+        if dropped:
+            _refresh_known(connection)
+    if dropped:
+        logger.info("Particiones de %s eliminadas: %s", PARENT_TABLE, ", ".join(dropped))
+    return dropped
+
+
+def maintain_snapshot_partitions(
+    months_ahead: int | None = None,
+    retention_months: int | None = None,
+) -> Dict[str, List[str]]:
+    """Crea las particiones de los proximos meses y retira las caducadas.
+
+    Con ``retention_months > 0`` las particiones cuyo mes termina antes del
+    corte se desenganchan y se borran (operacion de catalogo, sin recorrer
+    filas) y se publica el cambio para invalidar las caches de todas las
+    divisas.  Devuelve ``{"created": [...], "dropped": [...]}``.
+    """
+    settings = get_settings()
+    months_ahead = settings.snapshot_partitions_ahead if months_ahead is None else months_ahead
+    retention_months = settings.snapshot_retention_months if retention_months is None else retention_months
+    now = month_start(datetime.now(timezone.utc))
+
+    dropped: List[str] = []
+    with get_engine().connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        created = _create_missing(connection, now, add_months(now, max(0, months_ahead)))
+        if retention_months > 0:
+            dropped = _drop_before(connection, add_months(now, -retention_months))
+        _refresh_known(connection)
+
+    if dropped:
+        # Se ha retirado historico: las caches y ETag que lo incluian dejan de valer.
+        with session_scope() as session:
+            publish_change(session, None)
+    if created or dropped:
+        logger.info("Mantenimiento de %s: creadas %s, eliminadas %s", PARENT_TABLE, created, dropped)
+    return {"created": created, "dropped": dropped}
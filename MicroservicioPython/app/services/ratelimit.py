@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import threading
+import time
+
+
+class TokenBucket:
+    """Limitador token-bucket seguro entre hilos.
+
+    Repone ``rate_per_minute`` fichas por minuto hasta un maximo de ``burst``.
+    Cada peticion saliente consume una ficha; si no quedan, ``acquire``
+    bloquea el hilo hasta que se repone la siguiente.  ``pause`` congela el
+    bucket para todos los consumidores (por ejemplo tras un 429 con
+    ``Retry-After``).
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int = 1) -> None:
+        self.rate = max(rate_per_minute, 0.001) / 60.0
+        self.capacity = float(max(1, burst))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def acquire(self) -> float:
+        """Bloquea hasta obtener una ficha. Devuelve los segundos esperados."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    delay = self._paused_until - now
+                else:
+                    self._refill(now)
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return waited
+                    delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds: float) -> None:
+        """Impide emitir peticiones durante ``seconds`` y vacia el bucket."""
+        if seconds <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = 0.0
+            self._updated = max(now, self._paused_until)
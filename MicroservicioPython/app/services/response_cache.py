@@ -0,0 +1,143 @@
+"""Cache de respuestas JSON ya serializadas para las rutas de lectura.
+
+Las claves combinan los parametros de la ruta con la *generacion de
+sincronizacion*, un contador que las sincronizaciones incrementan tras
+confirmar su transaccion.  Una respuesta cacheada nunca sobrevive a la
+sincronizacion que la deja obsoleta y, en un acierto, la ruta devuelve los
+bytes almacenados sin volver a consultar PostgreSQL ni a validar con Pydantic.
+
+La *generacion historica* solo avanza con cambios que pueden reescribir el
+pasado (series, cargas masivas, compactacion); una sincronizacion de precios,
+que unicamente anade snapshots en el instante actual, no la incrementa.  La
+usan las caches de datos cerrados, como las velas ya terminadas.
+
+Las variantes comprimidas (``gzip``/``br``) se guardan en la misma cache,
+en el espacio ``<namespace>:<codificacion>``, y se generan a partir del
+cuerpo original cacheado.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from functools import lru_cache
+from typing import Awaitable, Callable, Dict, Hashable, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from ..config import get_settings
+from .cache import LRUCache
+from .encoding import compress
+
+_generation = 0
+_history_generation = 0
+_generation_lock = threading.Lock()
+_pending: Dict[Tuple[str, Hashable], "asyncio.Future[bytes]"] = {}
+
+
+def current_generation() -> int:
+    """Generacion de sincronizacion vigente."""
+    return _generation
+
+
+def current_history_generation() -> int:
+    """Generacion de los datos historicos vigente."""
+    return _history_generation
+
+
+def bump_generation(history: bool = True) -> int:
+    """Marca como obsoletas todas las respuestas cacheadas. Llamar tras el commit.
+
+    Con ``history=False`` (el cambio solo anade datos recientes) se conserva
+    la generacion historica.
+    """
+    global _generation, _history_generation
+    with _generation_lock:
+        _generation += 1
+        if history:
+            _history_generation += 1
+        generation = _generation
+    # Las claves antiguas ya no pueden acertar; se liberan sin esperar al LRU.
+    get_response_cache().invalidate()
+    return generation
+
+
+@lru_cache
+def get_response_cache() -> LRUCache:
+    """Cache compartida de cuerpos JSON de ``/api/prices``, ``/api/coin`` y ``/api/analysis``."""
+    settings = get_settings()
+    return LRUCache(
+        max_entries=settings.response_cache_max_entries,
+        max_bytes=settings.response_cache_max_bytes,
+        default_ttl=settings.response_cache_ttl,
+    )
+
+
+def cached_json(namespace: str, params: Hashable, render: Callable[[], bytes], encoding: str | None = None) -> bytes:
+    """Devuelve el cuerpo cacheado para ``params`` o lo genera con ``render``.
+
+    Con ``encoding`` devuelve la variante comprimida del cuerpo.  Las
+    excepciones de ``render`` se propagan y no se cachean.
+    """
+    cache = get_response_cache()
+    key = (current_generation(), params)
+    if encoding is None:
+        return cache.get_or_load(namespace, key, render)
+    # El cuerpo se resuelve despues de fijar la clave: nunca es mas antiguo que ella.
+    return cache.get_or_load(f"{namespace}:{encoding}", key, lambda: compress(cached_json(namespace, params, render), encoding))
+
+
+async def cached_json_async(
+    namespace: str,
+    params: Hashable,
+    render: Callable[[], Awaitable[bytes]],
+    encoding: str | None = None,
+) -> bytes:
+    """Como ``cached_json`` pero con ``render`` asincrono; no bloquea el event loop.
+
+    Las peticiones concurrentes de la misma clave esperan a un unico ``render``.
+    """
+    cache = get_response_cache()
+    key = (current_generation(), params)
+    if encoding is not None:
+        variant = cache.get(f"{namespace}:{encoding}", key)
+        if variant is None:
+            variant = compress(await cached_json_async(namespace, params, render), encoding)
+            cache.set(f"{namespace}:{encoding}", key, variant)
+        return variant
+    body = cache.get(namespace, key)
+    if body is not None:
+        return body
+    pending = _pending.get((namespace, key))
+    if pending is not None:
+        return await asyncio.shield(pending)
+
+    future: "asyncio.Future[bytes]" = asyncio.get_running_loop().create_future()
+    _pending[(namespace, key)] = future
+    try:
+        body = await render()
+        cache.set(namespace, key, body)
+        future.set_result(body)
+        return body
+    except Exception as exc:
+        future.set_exception(exc)
+        # Evita el aviso de excepcion no recuperada si nadie mas esperaba.
+        future.exception()
+        raise
+    finally:
+        _pending.pop((namespace, key), None)
+        if not future.done():
+            future.cancel()
+
+
+async def resolve_json(
+    namespace: str,
+    params: Hashable,
+    render: Callable[[], bytes],
+    render_async: Callable[[], Awaitable[bytes]],
+    encoding: str | None = None,
+) -> bytes:
+    """Sirve la respuesta por la ruta asincrona o por el threadpool segun ``DATABASE_ASYNC``."""
+    if get_settings().database_async:
+        return await cached_json_async(namespace, params, render_async, encoding)
+    return await run_in_threadpool(cached_json, namespace, params, render, encoding)
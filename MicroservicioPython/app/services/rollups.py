@@ -0,0 +1,326 @@
+"""Mantenimiento y consulta de los agregados de precio (``coin_price_rollups``).
+
+Cada bucket almacena conteo, suma, suma de cuadrados, minimo y maximo, por lo
+que se actualiza en O(1) al insertar snapshots y cualquier ventana de N horas
+se resuelve combinando N buckets:
+
+* media = sum(suma) / sum(conteo)
+* varianza poblacional = sum(suma_cuadrados) / n - media^2
+
+Ademas guarda apertura/cierre (con su instante) y sumas de volumen y market
+cap.  La compactacion (``sync.compact_snapshots``) mueve los buckets horarios
+antiguos a ``coin_price_rollups_daily``; como cada muestra vive en un unico
+nivel, las ventanas se calculan sobre la union de ambos (``rollup_source``).
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Sequence, Tuple
+
+from sqlalchemy import case, func, literal, select, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Subquery
+
+from ..models import CoinPriceRollup, CoinPriceRollupDaily
+
+_ROLLUP_COLUMNS = (
+    "coin_id, vs_currency, bucket_start, sample_count, price_sum, price_sq_sum, price_min, price_max, "
+    "open_price, open_at, close_price, close_at, "
+    "market_cap_sum, market_cap_count, total_volume_sum, total_volume_count"
+)
+
+# Fusion de un bucket existente con uno nuevo; ``{table}`` es la tabla destino.
+_MERGE_SET = """
+    sample_count = {table}.sample_count + EXCLUDED.sample_count,
+    price_sum = {table}.price_sum + EXCLUDED.price_sum,
+    price_sq_sum = {table}.price_sq_sum + EXCLUDED.price_sq_sum,
+    price_min = LEAST({table}.price_min, EXCLUDED.price_min),
+    price_max = GREATEST({table}.price_max, EXCLUDED.price_max),
+    open_price = CASE WHEN {table}.open_at IS NULL OR EXCLUDED.open_at < {table}.open_at
+        THEN EXCLUDED.open_price ELSE {table}.open_price END,
+    open_at = LEAST({table}.open_at, EXCLUDED.open_at),
+    close_price = CASE WHEN {table}.close_at IS NULL OR EXCLUDED.close_at >= {table}.close_at
+        THEN EXCLUDED.close_price ELSE {table}.close_price END,
+    close_at = GREATEST({table}.close_at, EXCLUDED.close_at),
+    market_cap_sum = {table}.market_cap_sum + EXCLUDED.market_cap_sum,
+    market_cap_count = {table}.market_cap_count + EXCLUDED.market_cap_count,
+    total_volume_sum = {table}.total_volume_sum + EXCLUDED.total_volume_sum,
+    total_volume_count = {table}.total_volume_count + EXCLUDED.total_volume_count
+"""
+
+# Upsert de buckets a partir de una relacion SQL con columnas de snapshot
+# (coin_id, vs_currency, recorded_at, price, market_cap, total_volume); lo usa
+# la carga masiva con COPY.
+ROLLUP_UPSERT_SQL = (
+    f"INSERT INTO coin_price_rollups ({_ROLLUP_COLUMNS}) "
+    """
+SELECT
+    coin_id,
+    vs_currency,
+    date_trunc('hour', recorded_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+    count(*),
+    sum(price)::float8,
+    sum(price * price)::float8,
+    min(price),
+    max(price),
+    (array_agg(price ORDER BY recorded_at))[1],
+    min(recorded_at),
+    (array_agg(price ORDER BY recorded_at DESC))[1],
+    max(recorded_at),
+    coalesce(sum(market_cap), 0)::float8,
+    count(market_cap),
+    coalesce(sum(total_volume), 0)::float8,
+    count(total_volume)
+FROM {source}
+WHERE price IS NOT NULL
+GROUP BY 1, 2, 3
+ON CONFLICT (coin_id, vs_currency, bucket_start) DO UPDATE SET
+"""
+    + _MERGE_SET.format(table="coin_price_rollups")
+)
+
+# Mueve un lote de buckets horarios anteriores a ``:cutoff`` (los mas antiguos
+# primero) a sus buckets diarios.  Borrado e insercion van en la misma
+# sentencia, asi que una muestra nunca esta en los dos niveles a la vez.
+COMPACT_HOURLY_SQL = (
+    """
+WITH victims AS (
+    SELECT coin_id, vs_currency, bucket_start
+    FROM coin_price_rollups
+    WHERE bucket_start < :cutoff
+    ORDER BY bucket_start
+    LIMIT :batch_size
+),
+moved AS (
+    DELETE FROM coin_price_rollups r
+    USING victims v
+    WHERE r.coin_id = v.coin_id AND r.vs_currency = v.vs_currency AND r.bucket_start = v.bucket_start
+    RETURNING r.*
+),
+merged AS (
+"""
+    + f"INSERT INTO coin_price_rollups_daily ({_ROLLUP_COLUMNS})"
+    + """
+    SELECT
+        coin_id,
+        vs_currency,
+        date_trunc('day', bucket_start AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+        sum(sample_count),
+        sum(price_sum),
+        sum(price_sq_sum),
+        min(price_min),
+        max(price_max),
+        (array_agg(open_price ORDER BY open_at) FILTER (WHERE open_at IS NOT NULL))[1],
+        min(open_at),
+        (array_agg(close_price ORDER BY close_at DESC) FILTER (WHERE close_at IS NOT NULL))[1],
+        max(close_at),
+        sum(market_cap_sum),
+        sum(market_cap_count),
+        sum(total_volume_sum),
+        sum(total_volume_count)
+    FROM moved
+    GROUP BY 1, 2, 3
+    ON CONFLICT (coin_id, vs_currency, bucket_start) DO UPDATE SET
+"""
+    + _MERGE_SET.format(table="coin_price_rollups_daily")
+    + """
+    RETURNING 1
+)
+SELECT count(*) FROM moved
+"""
+)
+
+
+def bucket_start(moment: datetime) -> datetime:
+    """Inicio (UTC) de la hora a la que pertenece ``moment``."""
+    return moment.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def day_start(moment: datetime) -> datetime:
+    """Inicio (UTC) del dia al que pertenece ``moment``."""
+    return bucket_start(moment).replace(hour=0)
+
+
+def window_start(now: datetime, hours: int) -> datetime:
+    """Primer bucket de una ventana de ``hours`` buckets que termina en la hora actual."""
+    return bucket_start(now) - timedelta(hours=max(1, hours) - 1)
+
+
+def _new_bucket(coin_id: int, vs: str, start: datetime) -> Dict[str, Any]:
+    return {
+        "coin_id": coin_id,
+        "vs_currency": vs,
+        "bucket_start": start,
+        "sample_count": 0,
+        "price_sum": 0.0,
+        "price_sq_sum": 0.0,
+        "price_min": None,
+        "price_max": None,
+        "open_price": None,
+        "open_at": None,
+        "close_price": None,
+        "close_at": None,
+        "market_cap_sum": 0.0,
+        "market_cap_count": 0,
+        "total_volume_sum": 0.0,
+        "total_volume_count": 0,
+    }
+
+
+def upsert_rollups(
+    session: Session,
+    samples: Iterable[Tuple[int, str, datetime, Decimal | None, Decimal | None, Decimal | None]],
+) -> None:
+    """Acumula snapshots recien insertados en sus buckets horarios.
+
+    Cada muestra es ``(coin_id, vs, recorded_at, price, market_cap, total_volume)``.
+    """
+    buckets: Dict[Tuple[int, str, datetime], Dict[str, Any]] = {}
+    for coin_id, vs, recorded_at, price, market_cap, total_volume in samples:
+        if price is None:
+            continue
+        key = (coin_id, vs, bucket_start(recorded_at))
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = _new_bucket(coin_id, vs, key[2])
+        value = float(price)
+        bucket["sample_count"] += 1
+        bucket["price_sum"] += value
+        bucket["price_sq_sum"] += value * value
+        bucket["price_min"] = price if bucket["price_min"] is None else min(bucket["price_min"], price)
+        bucket["price_max"] = price if bucket["price_max"] is None else max(bucket["price_max"], price)
+        if bucket["open_at"] is None or recorded_at < bucket["open_at"]:
+            bucket["open_price"], bucket["open_at"] = price, recorded_at
+        if bucket["close_at"] is None or recorded_at >= bucket["close_at"]:
+            bucket["close_price"], bucket["close_at"] = price, recorded_at
+        if market_cap is not None:
+            bucket["market_cap_sum"] += float(market_cap)
+            bucket["market_cap_count"] += 1
+        if total_volume is not None:
+            bucket["total_volume_sum"] += float(total_volume)
+            bucket["total_volume_count"] += 1
+
+    if not buckets:
+        return
+    table = CoinPriceRollup
+    stmt = pg_insert(table).values(list(buckets.values()))
+    excluded = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.coin_id, table.vs_currency, table.bucket_start],
+        set_={
+            "sample_count": table.sample_count + excluded.sample_count,
+            "price_sum": table.price_sum + excluded.price_sum,
+            "price_sq_sum": table.price_sq_sum + excluded.price_sq_sum,
+            "price_min": func.least(table.price_min, excluded.price_min),
+            "price_max": func.greatest(table.price_max, excluded.price_max),
+            "open_price": case(
+                (table.open_at.is_(None) | (excluded.open_at < table.open_at), excluded.open_price),
+                else_=table.open_price,
+            ),
+            "open_at": func.least(table.open_at, excluded.open_at),
+            "close_price": case(
+                (table.close_at.is_(None) | (excluded.close_at >= table.close_at), excluded.close_price),
+                else_=table.close_price,
+            ),
+            "close_at": func.greatest(table.close_at, excluded.close_at),
+            "market_cap_sum": table.market_cap_sum + excluded.market_cap_sum,
+            "market_cap_count": table.market_cap_count + excluded.market_cap_count,
+            "total_volume_sum": table.total_volume_sum + excluded.total_volume_sum,
+            "total_volume_count": table.total_volume_count + excluded.total_volume_count,
+        },
+    )
+    session.execute(stmt)
+
+
+def rollup_source(coin_id: int | Sequence[int], vs: str, since: datetime | None = None) -> Subquery:
+    """Buckets horarios y diarios de una o varias monedas como una sola relacion.
+
+    Con ``since`` se conservan los buckets horarios desde esa hora y los
+    diarios desde ese dia, de modo que el borde de una ventana larga tiene la
+    resolucion del nivel mas antiguo que la cubre.
+    """
+    selects = []
+    for model, floor in ((CoinPriceRollup, bucket_start), (CoinPriceRollupDaily, day_start)):
+        coin_filter = model.coin_id == coin_id if isinstance(coin_id, int) else model.coin_id.in_(coin_id)
+        stmt = select(
+            *(model.__table__.c[name] for name in _ROLLUP_COLUMNS.split(", ")),
+            literal(model is CoinPriceRollupDaily).label("is_daily"),
+        ).where(coin_filter, model.vs_currency == vs)
+        if since is not None:
+            stmt = stmt.where(model.bucket_start >= floor(since))
+        selects.append(stmt)
+    return union_all(*selects).subquery()
+
+
+def _mean_and_stddev(count, total, sq_total):
+    mean = total / func.nullif(count, 0)
+    variance = sq_total / func.nullif(count, 0) - mean * mean
+    return mean, func.sqrt(func.greatest(variance, 0.0))
+
+
+def window_stats_columns(since: datetime | None = None, source: Any = None):
+    """Columnas agregadas (n, media, min, max, desviacion) sobre los buckets seleccionados.
+
+    ``source`` es la relacion de buckets (por defecto ``coin_price_rollups``;
+    ver ``rollup_source``).  Con ``since`` se restringen a los buckets
+    posteriores mediante ``FILTER``, lo que permite calcular varias ventanas
+    en una misma consulta.
+    """
+    columns = (CoinPriceRollup.__table__ if source is None else source).c
+    count = func.sum(columns.sample_count)
+    total = func.sum(columns.price_sum)
+    sq_total = func.sum(columns.price_sq_sum)
+    low = func.min(columns.price_min)
+    high = func.max(columns.price_max)
+    if since is not None:
+        condition = columns.bucket_start >= since
+        count, total, sq_total = count.filter(condition), total.filter(condition), sq_total.filter(condition)
+        low, high = low.filter(condition), high.filter(condition)
+    mean, stddev = _mean_and_stddev(count, total, sq_total)
+    return count, mean, low, high, stddev
+
+
+def window_stats(session: Session, coin_id: int, vs: str, hours: int, now: datetime | None = None) -> Dict[str, Any]:
+    """KPIs de una moneda en las ultimas ``hours`` horas combinando buckets horarios y diarios.
+
+    Incluye ``first_price``, la apertura del bucket mas antiguo de la ventana.
+    """
+    return window_stats_many(session, [coin_id], vs, hours, now)[coin_id]
+
+
+def window_stats_many(
+    session: Session,
+    coin_ids: Sequence[int],
+    vs: str,
+    hours: int,
+    now: datetime | None = None,
+) -> Dict[int, Dict[str, Any]]:
+    """``window_stats`` de varias monedas con dos consultas agrupadas por ``coin_id``."""
+    empty = {"sample_size": 0, "average_price": None, "min_price": None, "max_price": None, "volatility": None}
+    stats: Dict[int, Dict[str, Any]] = {coin_id: dict(empty, first_price=None) for coin_id in coin_ids}
+    if not coin_ids:
+        return stats
+    source = rollup_source(list(coin_ids), vs, since=window_start(now or datetime.now(timezone.utc), hours))
+    count, mean, low, high, stddev = window_stats_columns(source=source)
+    for coin_id, *row in session.execute(
+        select(source.c.coin_id, count, mean, low, high, stddev).group_by(source.c.coin_id)
+    ):
+        stats[coin_id].update(
+            sample_size=int(row[0] or 0),
+            average_price=row[1],
+            min_price=row[2],
+            max_price=row[3],
+            volatility=row[4],
+        )
+    first_prices = session.execute(
+        select(source.c.coin_id, source.c.open_price)
+        .where(source.c.open_at.is_not(None))
+        .distinct(source.c.coin_id)
+        .order_by(source.c.coin_id, source.c.open_at.asc())
+    )
+    for coin_id, first_price in first_prices:
+        stats[coin_id]["first_price"] = first_price
+    return stats
@@ -0,0 +1,67 @@
+"""Codificaciones compactas de ``prices_series`` para las graficas.
+
+``prices_series`` se sirve por defecto como ``[[epoch_ms, precio], ...]``.
+Las alternativas evitan repetir la marca temporal completa en cada punto:
+
+* ``columnar``: ``start`` (epoch en ms) y, si los puntos estan equiespaciados,
+  ``step``; si no, ``deltas`` con la diferencia en ms respecto al punto
+  anterior (la primera es 0).  Los precios van en un array aparte.
+* ``binary``: buffer little-endian con una cabecera de 16 bytes
+  (``uint32`` numero de puntos, ``uint32`` unidad de los deltas en ms,
+  ``float64`` inicio en epoch ms), seguida de ``int32[n]`` deltas y
+  ``float32[n]`` precios.  Los arrays quedan alineados a 4 bytes, asi que en
+  el navegador se leen sin copias con ``Int32Array``/``Float32Array``.  La
+  unidad es 1 ms salvo que algun hueco no quepa en ``int32`` (~24 dias); en
+  ese caso se usan segundos.
+"""
+
+from __future__ import annotations
+
+import struct
+import sys
+from array import array
+from typing import Any, Dict, List, Sequence
+
+SERIES_FORMATS = ("json", "columnar", "binary")
+BINARY_MEDIA_TYPE = "application/octet-stream"
+
+_HEADER = struct.Struct("<IId")
+_INT32_MAX = 2**31 - 1
+
+
+def _deltas(timestamps: Sequence[int], unit: int = 1) -> List[int]:
+    # Diferencias sobre los offsets ya redondeados: el error no se acumula.
+    offsets = [round((timestamp - timestamps[0]) / unit) for timestamp in timestamps]
+    return [0] + [current - previous for previous, current in zip(offsets, offsets[1:])]
+
+
+def columnar_series(points: Sequence[Sequence[float]]) -> Dict[str, Any]:
+    """``[[ts, precio], ...]`` en columnas; ``step`` solo si el espaciado es uniforme."""
+    if not points:
+        return {"start": None, "step": None, "deltas": None, "prices": []}
+    timestamps = [int(timestamp) for timestamp, _ in points]
+    deltas = _deltas(timestamps)
+    step = deltas[1] if len(deltas) > 1 and all(delta == deltas[1] for delta in deltas[2:]) else None
+    return {
+        "start": timestamps[0],
+        "step": step,
+        "deltas": None if step is not None else deltas,
+        "prices": [price for _, price in points],
+    }
+
+
+def binary_series(points: Sequence[Sequence[float]]) -> bytes:
+    """``[[ts, precio], ...]`` como buffer de deltas ``int32`` y precios ``float32``."""
+    timestamps = [int(timestamp) for timestamp, _ in points]
+    unit = 1
+    deltas = _deltas(timestamps) if timestamps else []
+    if deltas and max(deltas) > _INT32_MAX:
+        unit = 1000
+        deltas = _deltas(timestamps, unit)
+    offsets = array("i", deltas)
+    prices = array("f", [price for _, price in points])
+    if sys.byteorder == "big":
+        offsets.byteswap()
+        prices.byteswap()
+    header = _HEADER.pack(len(timestamps), unit, float(timestamps[0]) if timestamps else 0.0)
+    return header + offsets.tobytes() + prices.tobytes()
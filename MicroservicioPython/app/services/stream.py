@@ -0,0 +1,271 @@
+"""Difusion de precios en tiempo real (Server-Sent Events).
+
+``PriceBroadcaster`` guarda por divisa el ultimo precio publicado de cada
+moneda y, con cada sincronizacion, reparte a los suscriptores solo las
+monedas cuyo precio ha cambiado:
+
+* En el proceso que sincroniza, ``sync_market_data`` entrega las filas
+  escritas con ``publish_prices`` y se difunden tras el commit, sin
+  consultas adicionales.
+* En el resto de workers, la notificacion ``NOTIFY`` de la sincronizacion
+  (ver ``app.services.freshness``) dispara ``refresh``, que lee de
+  ``coin_latest`` las filas posteriores a la ultima difundida.
+
+Cada evento se serializa una sola vez y se encola en todos los
+suscriptores.  Las colas estan acotadas: un cliente que no las vacia a
+tiempo se desconecta (``EventSource`` reconecta solo y recibe de nuevo la
+foto completa) en lugar de acumular memoria o perder diferencias en
+silencio.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+from datetime import datetime
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from ..config import get_settings
+from ..db import session_scope
+from ..models import Coin, CoinLatest
+
+logger = logging.getLogger(__name__)
+
+_FIELDS = {
+    "current_price": "price",
+    "market_cap": "market_cap",
+    "total_volume": "total_volume",
+    "price_change_percentage_1h": "change_1h",
+    "price_change_percentage_24h": "change_24h",
+    "price_change_percentage_7d": "change_7d",
+}
+
+
+class StreamUnavailable(Exception):
+    """Se alcanzo el maximo de suscriptores del proceso."""
+
+
+def _number(value: Any) -> Any:
+    return float(value) if isinstance(value, Decimal) else value
+
+
+def stream_item(coingecko_id: str, symbol: str | None, row: Mapping[str, Any]) -> Dict[str, Any]:
+    """Fila de snapshot/``coin_latest`` con los nombres de campo de ``PriceItem``."""
+    item: Dict[str, Any] = {"id": coingecko_id, "symbol": (symbol or "").lower()}
+    item.update({field: _number(row.get(column)) for field, column in _FIELDS.items()})
+    item["last_snapshot_at"] = row["recorded_at"]
+    return item
+
+
+def _frame(event_name: str, event_id: int, payload: Any) -> bytes:
+    data = json.dumps(payload, separators=(",", ":"), default=lambda value: value.isoformat())
+    return f"event: {event_name}\nid: {event_id}\ndata: {data}\n\n".encode("utf-8")
+
+
+class Subscription:
+    """Cola acotada de eventos ya serializados de un cliente."""
+
+    def __init__(self, vs: str, maxsize: int) -> None:
+        self.vs = vs
+        self.queue: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue(maxsize=maxsize)
+        self.closed = False
+
+    async def get(self) -> Optional[bytes]:
+        """Siguiente evento; ``None`` cuando la suscripcion se ha cerrado."""
+        if self.closed and self.queue.empty():
+            return None
+        return await self.queue.get()
+
+    def close(self) -> None:
+        """Descarta lo pendiente y despierta al consumidor con ``None``."""
+        self.closed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class PriceBroadcaster:
+    """Publica diferencias de precio por divisa a suscriptores asincronos."""
+
+    def __init__(self, queue_size: int, max_subscribers: int) -> None:
+        self.queue_size = max(1, queue_size)
+        self.max_subscribers = max(1, max_subscribers)
+        self._prices: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._seen_at: Dict[str, datetime] = {}
+        self._sequence: Dict[str, int] = {}
+        self._snapshots: Dict[str, tuple[int, bytes]] = {}
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock = threading.Lock()
+        self._stats = {"events": 0, "delivered": 0, "dropped_subscribers": 0}
+
+    # -- publicacion (cualquier hilo) ---------------------------------------
+
+    def offer(self, vs: str, items: Iterable[Dict[str, Any]], synced_at: datetime | None = None) -> int:
+        """Incorpora los precios de ``items`` y difunde los que han cambiado. Devuelve cuantos."""
+        with self._lock:
+            known = self._prices.get(vs)
+            if known is None:
+                # Nadie se ha suscrito a esta divisa: no hay estado que mantener.
+                return 0
+            changed: List[Dict[str, Any]] = []
+            for item in items:
+                previous = known.get(item["id"])
+                if previous is not None and previous["last_snapshot_at"] >= item["last_snapshot_at"]:
+                    continue
+                known[item["id"]] = item
+                if previous is None or previous["current_price"] != item["current_price"]:
+                    changed.append(item)
+            if synced_at is not None and (vs not in self._seen_at or synced_at > self._seen_at[vs]):
+                self._seen_at[vs] = synced_at
+            if not changed:
+                return 0
+            sequence = self._sequence[vs] = self._sequence.get(vs, 0) + 1
+            frame = _frame("prices", sequence, changed)
+            self._stats["events"] += 1
+            loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._fanout, vs, frame)
+        return len(changed)
+
+    def refresh(self, vs: str, synced_at: datetime | None = None) -> int:
+        """Difunde las filas de ``coin_latest`` posteriores a la ultima publicada de ``vs``.
+
+        La usa el listener de ``NOTIFY`` para las sincronizaciones de otros
+        procesos; las propias ya se han entregado con ``offer`` y se omiten.
+        """
+        with self._lock:
+            if vs not in self._prices:
+                return 0
+            seen = self._seen_at.get(vs)
+        if synced_at is not None and seen is not None and synced_at <= seen:
+            return 0
+        with session_scope() as session:
+            items = self._load(session, vs, since=seen)
+        return self.offer(vs, items, synced_at)
+
+    @staticmethod
+    def _load(session: Session, vs: str, since: datetime | None = None) -> List[Dict[str, Any]]:
+        stmt = (
+            select(Coin.coingecko_id, Coin.symbol, CoinLatest)
+            .join(CoinLatest, CoinLatest.coin_id == Coin.id)
+            .where(CoinLatest.vs_currency == vs)
+            .order_by(CoinLatest.market_cap.desc().nulls_last(), CoinLatest.market_cap_rank.asc().nulls_last())
+        )
+        if since is not None:
+            stmt = stmt.where(CoinLatest.recorded_at > since)
+        return [
+            stream_item(coingecko_id, symbol, {column: getattr(latest, column) for column in (*_FIELDS.values(), "recorded_at")})
+            for coingecko_id, symbol, latest in session.execute(stmt)
+        ]
+
+    # -- suscripcion (event loop) ------------------------------------------
+
+    def _ensure_loaded(self, vs: str) -> None:
+        with self._lock:
+            if vs in self._prices:
+                return
+        with session_scope() as session:
+            items = self._load(session, vs)
+        with self._lock:
+            if vs not in self._prices:
+                self._prices[vs] = {item["id"]: item for item in items}
+                seen = max((item["last_snapshot_at"] for item in items), default=None)
+                if seen is not None:
+                    self._seen_at[vs] = seen
+
+    async def subscribe(self, vs: str) -> Subscription:
+        """Registra un suscriptor y le encola la foto completa de ``vs`` como primer evento."""
+        if self.subscriber_count() >= self.max_subscribers:
+            raise StreamUnavailable("Se ha alcanzado el maximo de clientes de streaming")
+        await asyncio.get_running_loop().run_in_executor(None, self._ensure_loaded, vs)
+        subscription = Subscription(vs, self.queue_size)
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            # Foto y alta bajo el mismo cerrojo: ninguna diferencia queda entre ambas.
+            subscription.queue.put_nowait(self._snapshot_frame(vs))
+            self._subscribers.setdefault(vs, set()).add(subscription)
+        return subscription
+
+    def _snapshot_frame(self, vs: str) -> bytes:
+        sequence = self._sequence.get(vs, 0)
+        cached = self._snapshots.get(vs)
+        if cached is None or cached[0] != sequence:
+            items = sorted(self._prices[vs].values(), key=lambda item: -(item["market_cap"] or 0))
+            cached = self._snapshots[vs] = (sequence, _frame("snapshot", sequence, items))
+        return cached[1]
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.get(subscription.vs, set()).discard(subscription)
+
+    def _fanout(self, vs: str, frame: bytes) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(vs, ()))
+        dropped = []
+        for subscription in subscribers:
+            try:
+                subscription.queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                dropped.append(subscription)
+        for subscription in dropped:
+            self.unsubscribe(subscription)
+            subscription.close()
+        with self._lock:
+            self._stats["delivered"] += len(subscribers) - len(dropped)
+            self._stats["dropped_subscribers"] += len(dropped)
+        if dropped:
+            logger.info("Desconectados %s clientes lentos del stream de precios (%s)", len(dropped), vs)
+
+    def close_all(self) -> None:
+        """Cierra todas las suscripciones (apagado del servicio)."""
+        with self._lock:
+            subscribers = [sub for subs in self._subscribers.values() for sub in subs]
+            self._subscribers.clear()
+            loop = self._loop
+        for subscription in subscribers:
+            if loop is not None and not loop.is_closed():
+                loop.call_soon_threadsafe(subscription.close)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(subs) for subs in self._subscribers.values())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(
+                self._stats,
+                subscribers={vs: len(subs) for vs, subs in self._subscribers.items()},
+                currencies=sorted(self._prices),
+                queue_size=self.queue_size,
+                max_subscribers=self.max_subscribers,
+            )
+
+
+@lru_cache
+def get_broadcaster() -> PriceBroadcaster:
+    settings = get_settings()
+    return PriceBroadcaster(queue_size=settings.stream_queue_size, max_subscribers=settings.stream_max_subscribers)
+
+
+def publish_prices(session: Session, vs: str, items: List[Dict[str, Any]], synced_at: datetime | None = None) -> None:
+    """Difunde ``items`` cuando se confirme la transaccion de ``session``; si se revierte, nada."""
+    session.info.setdefault("price_updates", []).append((vs, items, synced_at))
+
+
+@event.listens_for(Session, "after_commit")
+def _offer_committed_prices(session: Session) -> None:
+    for vs, items, synced_at in session.info.pop("price_updates", []):
+        get_broadcaster().offer(vs, items, synced_at)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_prices(session: Session) -> None:
+    session.info.pop("price_updates", None)
@@ -2,21 +2,63 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 from typing import Any
 
-from sqlalchemy import func, select, delete
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
 
 from ..config import get_settings
 from ..db import session_scope
-from ..models import Coin, CoinSnapshot, CoinSeries
-from .external import fetch_prices, fetch_coin_detail
+from ..models import Coin, CoinLatest, CoinSnapshot, CoinSeries
+from .bulk_load import copy_series, copy_snapshots
+from .external import fetch_coin_metadata, fetch_market_chart, fetch_prices
+from .freshness import get_registry, publish_change
+from .indicators import update_indicator_states
+from .partitions import drop_snapshot_partitions_before, ensure_snapshot_partitions, maintain_snapshot_partitions
+from .rollups import COMPACT_HOURLY_SQL, day_start, upsert_rollups
+from .stream import publish_prices, stream_item
 
 logger = logging.getLogger(__name__)
 
 _background_task: asyncio.Task | None = None
 
+SERIES_SYNC_MODES = ("incremental", "full")
+_SERIES_INSERT_CHUNK = 5000
+
+# Los KPIs de 7 dias de /api/prices leen solo buckets horarios.
+_MIN_HOURLY_RETENTION_DAYS = 8
+
+# Divisas presentes en coin_snapshots, saltando por ix_snapshots_vs_recorded.
+_SNAPSHOT_CURRENCIES_SQL = """
+WITH RECURSIVE currencies AS (
+    SELECT min(vs_currency) AS vs FROM coin_snapshots
+    UNION ALL
+    SELECT (SELECT min(vs_currency) FROM coin_snapshots WHERE vs_currency > currencies.vs)
+    FROM currencies
+    WHERE currencies.vs IS NOT NULL
+)
+SELECT vs FROM currencies WHERE vs IS NOT NULL
+"""
+
+# Limite superior del siguiente lote de snapshots en bruto de una divisa: el
+# ``batch_size``-esimo instante posterior a ``:lower``.  Recorre
+# ix_snapshots_vs_recorded desde ``:lower``, sin volver a leer lo ya borrado.
+_NEXT_RAW_BOUND_SQL = """
+SELECT recorded_at
+FROM coin_snapshots
+WHERE vs_currency = :vs AND recorded_at > :lower AND recorded_at < :cutoff
+ORDER BY recorded_at
+OFFSET :offset
+LIMIT 1
+"""
+
 
 def _to_decimal(value: Any) -> Decimal | None:
     if value is None:
@@ -27,12 +69,112 @@ def _to_decimal(value: Any) -> Decimal | None:
         return None
 
 
+def _coin_row(entry: dict[str, Any], synced_at: datetime) -> dict[str, Any]:
+    symbol = (entry.get("symbol") or "").upper()
+    return {
+        "coingecko_id": entry.get("id"),
+        "symbol": symbol,
+        "name": entry.get("nombre") or entry.get("id") or symbol,
+        "image_url": entry.get("image"),
+        "market_cap_rank": entry.get("market_cap_rank"),
+        "last_synced_at": synced_at,
+    }
+
+
+def _snapshot_row(entry: dict[str, Any], coin_id: int, vs: str, recorded_at: datetime) -> dict[str, Any]:
+    return {
+        "coin_id": coin_id,
+        "recorded_at": recorded_at,
+        "vs_currency": vs,
+        "price": _to_decimal(entry.get("current_price")),
+        "market_cap": _to_decimal(entry.get("market_cap")),
+        "total_volume": _to_decimal(entry.get("total_volume")),
+        "change_1h": _to_decimal(entry.get("price_change_percentage_1h")),
+        "change_24h": _to_decimal(entry.get("price_change_percentage_24h")),
+        "change_7d": _to_decimal(entry.get("price_change_percentage_7d")),
+        "ath": _to_decimal(entry.get("ath")),
+    }
+
+
+def _upsert_coins(session: Session, rows: list[dict[str, Any]]) -> dict[str, int]:
+    """Inserta o actualiza un lote de monedas en una unica sentencia.
+
+    Devuelve un diccionario ``coingecko_id -> coins.id``.
+    """
+    stmt = pg_insert(Coin).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_coins_coingecko_id",
+        set_={
+            "symbol": stmt.excluded.symbol,
+            "name": stmt.excluded.name,
+            "image_url": func.coalesce(stmt.excluded.image_url, Coin.image_url),
+            "market_cap_rank": stmt.excluded.market_cap_rank,
+            "last_synced_at": stmt.excluded.last_synced_at,
+        },
+    ).returning(Coin.coingecko_id, Coin.id)
+    return {coingecko_id: coin_id for coingecko_id, coin_id in session.execute(stmt)}
+
+
+def _insert_snapshots(session: Session, rows: list[dict[str, Any]]) -> int:
+    """Inserta un lote de snapshots ignorando los ya existentes (uq_snapshots_coin_timestamp).
+
+    Solo las filas realmente insertadas se acumulan en los agregados horarios,
+    asi un reintento del mismo lote no duplica muestras.
+    """
+    stmt = (
+        pg_insert(CoinSnapshot)
+        .values(rows)
+        .on_conflict_do_nothing(constraint="uq_snapshots_coin_timestamp")
+        .returning(
+            CoinSnapshot.coin_id,
+            CoinSnapshot.vs_currency,
+            CoinSnapshot.recorded_at,
+            CoinSnapshot.price,
+            CoinSnapshot.market_cap,
+            CoinSnapshot.total_volume,
+        )
+    )
+    inserted = session.execute(stmt).all()
+    upsert_rollups(session, inserted)
+    return len(inserted)
+
+
+def _upsert_latest(session: Session, rows: list[dict[str, Any]]) -> None:
+    """Actualiza coin_latest con los snapshots del lote si son mas recientes."""
+    stmt = pg_insert(CoinLatest).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CoinLatest.coin_id, CoinLatest.vs_currency],
+        set_={
+            column: stmt.excluded[column]
+            for column in rows[0]
+            if column not in ("coin_id", "vs_currency")
+        },
+        where=CoinLatest.recorded_at <= stmt.excluded.recorded_at,
+    )
+    session.execute(stmt)
+
+
+def _store_snapshots(session: Session, rows: list[dict[str, Any]]) -> int:
+    if len(rows) >= get_settings().bulk_copy_threshold:
+        return copy_snapshots(session, rows)
+    return _insert_snapshots(session, rows)
+
+
 def sync_market_data(
     vs_currency: str | None = None,
     per_page: int | None = None,
     pages: int | None = None,
 ) -> int:
-    """Descarga los datos de CoinGecko y guarda snapshots en PostgreSQL."""
+    """Descarga los datos de CoinGecko y guarda snapshots en PostgreSQL.
+
+    Cada pagina se persiste con sentencias multi-fila: un upsert sobre
+    ``coins``, una insercion sobre ``coin_snapshots`` que delega la deteccion
+    de duplicados en ``uq_snapshots_coin_timestamp``, un upsert sobre
+    ``coin_latest`` y el avance del estado de indicadores
+    (``coin_indicator_state``) dentro de la misma transaccion.  Tras el
+    commit, los precios que han cambiado se difunden a los clientes de
+    ``/api/stream/prices``.
+    """
     settings = get_settings()
     vs = (vs_currency or settings.sync_vs_currency).lower()
     per_page = per_page or settings.sync_per_page
@@ -41,6 +183,8 @@ def sync_market_data(
 
     processed = 0
     now = datetime.now(timezone.utc)
+    # Fuera de la transaccion: crear una particion bloquea brevemente coin_snapshots.
+    ensure_snapshot_partitions(now)
 
     with session_scope() as session:
         for page in range(1, pages + 1):
@@ -48,68 +192,41 @@ def sync_market_data(
             if not batch:
                 break
 
-            for entry in batch:
-                coin = (
-                    session.execute(
-                        select(Coin).where(Coin.coingecko_id == entry.get("id"))
-                    ).scalar_one_or_none()
-                )
-                if coin is None:
-                    coin = Coin(coingecko_id=entry.get("id"))
-
-                coin.symbol = (entry.get("symbol") or "").upper()
-                coin.name = entry.get("nombre") or entry.get("id") or coin.symbol
-                coin.image_url = entry.get("image")
-                coin.market_cap_rank = entry.get("market_cap_rank")
-                coin.last_synced_at = now
-
-                needs_description = not coin.description
-                if needs_description:
-                    try:
-                        details = fetch_coin_detail(entry.get("id"), vs_currency=vs, days="1")
-                        description = (details.get("description") or "").strip()
-                        coin.description = description or coin.description
-                        if not coin.image_url:
-                            coin.image_url = details.get("image")
-                    except Exception as detail_error:
-                        logger.warning(
-                            "No se pudo obtener la descripcion para %s: %s",
-                            entry.get("id"),
-                            detail_error,
-                        )
-
-                session.add(coin)
-                session.flush()  # asegura que coin.id esta disponible
-
-                exists = (
-                    session.execute(
-                        select(CoinSnapshot.id)
-                        .where(CoinSnapshot.coin_id == coin.id)
-                        .where(CoinSnapshot.vs_currency == vs)
-                        .where(CoinSnapshot.recorded_at == now)
-                    ).scalar_one_or_none()
-                )
-                if exists:
-                    continue
-
-                snapshot = CoinSnapshot(
-                    coin_id=coin.id,
-                    recorded_at=now,
-                    vs_currency=vs,
-                    price=_to_decimal(entry.get("current_price")),
-                    market_cap=_to_decimal(entry.get("market_cap")),
-                    total_volume=_to_decimal(entry.get("total_volume")),
-                    change_1h=_to_decimal(entry.get("price_change_percentage_1h")),
-                    change_24h=_to_decimal(entry.get("price_change_percentage_24h")),
-                    change_7d=_to_decimal(entry.get("price_change_percentage_7d")),
-                    ath=_to_decimal(entry.get("ath")),
-                )
-                session.add(snapshot)
-                processed += 1
+            # ON CONFLICT no admite dos filas con la misma clave en una sentencia.
+            entries = {entry.get("id"): entry for entry in batch if entry.get("id")}
+            if entries:
+                coin_ids = _upsert_coins(session, [_coin_row(entry, now) for entry in entries.values()])
+                snapshot_rows = {
+                    coingecko_id: _snapshot_row(entry, coin_ids[coingecko_id], vs, now)
+                    for coingecko_id, entry in entries.items()
+                    if coingecko_id in coin_ids
+                }
+                if snapshot_rows:
+                    processed += _store_snapshots(session, list(snapshot_rows.values()))
+                    _upsert_latest(
+                        session,
+                        [
+                            dict(row, market_cap_rank=entries[coingecko_id].get("market_cap_rank"))
+                            for coingecko_id, row in snapshot_rows.items()
+                        ],
+                    )
+                    update_indicator_states(session, snapshot_rows.values())
+                    publish_prices(
+                        session,
+                        vs,
+                        [
+                            stream_item(coingecko_id, entries[coingecko_id].get("symbol"), row)
+                            for coingecko_id, row in snapshot_rows.items()
+                        ],
+                        synced_at=now,
+                    )
 
             if len(batch) < per_page:
                 break
 
+        if processed:
+            publish_change(session, vs, synced_at=now, history=False)
+
     logger.info(
         "Sincronizacion completada: %s snapshots nuevos (%s, per_page=%s, pages=%s)",
         processed,
@@ -120,17 +237,212 @@ def sync_market_data(
     return processed
 
 
+def _run_in_batches(statement: str, cutoff: datetime, batch_size: int) -> int:
+    """Ejecuta ``statement`` por lotes, cada uno en su propia transaccion corta."""
+    total = 0
+    while True:
+        with session_scope() as session:
+            affected = session.execute(text(statement), {"cutoff": cutoff, "batch_size": batch_size}).scalar_one()
+        total += affected
+        if affected < batch_size:
+            return total
+
+
+def _delete_raw_snapshots(cutoff: datetime, batch_size: int) -> int:
+    """Borra los snapshots anteriores a ``cutoff`` por tramos de ``recorded_at`` consecutivos.
+
+    Cada lote borra el rango ``[inferior, superior)`` de una divisa en su
+    propia transaccion y el limite inferior avanza hasta el superior, asi
+    que ningun lote vuelve a recorrer ni a ordenar el resto del historico.
+    """
+    with session_scope() as session:
+        currencies = list(session.execute(text(_SNAPSHOT_CURRENCIES_SQL)).scalars())
+    total = 0
+    for vs in currencies:
+        with session_scope() as session:
+            lower = session.execute(
+                select(func.min(CoinSnapshot.recorded_at)).where(
+                    CoinSnapshot.vs_currency == vs, CoinSnapshot.recorded_at < cutoff
+                )
+            ).scalar_one_or_none()
+        while lower is not None:
+            with session_scope() as session:
+                upper = session.execute(
+                    text(_NEXT_RAW_BOUND_SQL),
+                    {"vs": vs, "lower": lower, "cutoff": cutoff, "offset": max(batch_size - 1, 0)},
+                ).scalar_one_or_none()
+                deleted = session.execute(
+                    delete(CoinSnapshot).where(
+                        CoinSnapshot.vs_currency == vs,
+                        CoinSnapshot.recorded_at >= lower,
+                        CoinSnapshot.recorded_at < (upper or cutoff),
+                    )
+                )
+                total += deleted.rowcount
+            lower = upper
+    return total
+
+
+def compact_snapshots(
+    raw_retention_days: int | None = None,
+    hourly_retention_days: int | None = None,
+    batch_size: int | None = None,
+) -> dict[str, Any]:
+    """Etapa de compactacion: reduce la resolucion del historico antiguo.
+
+    Los snapshots ya estan acumulados en ``coin_price_rollups`` desde que se
+    insertan, asi que los anteriores a ``raw_retention_days`` se eliminan:
+    primero las particiones mensuales completas y despues el resto por tramos
+    de tiempo.  El borrado de snapshots en bruto es opcional
+    (``SNAPSHOT_RAW_RETENTION_DAYS``, desactivado por defecto).
+    Los buckets horarios anteriores a ``hourly_retention_days`` se fusionan en
+    ``coin_price_rollups_daily``.  Cada lote es una transaccion corta, por lo
+    que no se retienen bloqueos largos.  Un valor ``0`` desactiva el nivel.
+    """
+    settings = get_settings()
+    raw_days = settings.snapshot_raw_retention_days if raw_retention_days is None else raw_retention_days
+    hourly_days = settings.rollup_hourly_retention_days if hourly_retention_days is None else hourly_retention_days
+    batch_size = max(1, batch_size or settings.compaction_batch_size)
+    now = datetime.now(timezone.utc)
+
+    result: dict[str, Any] = {"dropped_partitions": [], "snapshots_deleted": 0, "hourly_compacted": 0}
+    if raw_days > 0:
+        cutoff = day_start(now - timedelta(days=raw_days))
+        result["dropped_partitions"] = drop_snapshot_partitions_before(cutoff)
+        result["snapshots_deleted"] = _delete_raw_snapshots(cutoff, batch_size)
+    if hourly_days > 0:
+        # Nunca se compacta una hora que aun tiene snapshots en bruto.
+        hourly_days = max(hourly_days, raw_days, _MIN_HOURLY_RETENTION_DAYS)
+        cutoff = day_start(now - timedelta(days=hourly_days))
+        result["hourly_compacted"] = _run_in_batches(COMPACT_HOURLY_SQL, cutoff, batch_size)
+
+    if result["dropped_partitions"] or result["snapshots_deleted"] or result["hourly_compacted"]:
+        with session_scope() as session:
+            publish_change(session, None)
+        logger.info(
+            "Compactacion completada: %s particiones eliminadas, %s snapshots borrados, %s buckets horarios compactados",
+            len(result["dropped_partitions"]),
+            result["snapshots_deleted"],
+            result["hourly_compacted"],
+        )
+    return result
+
+
+def backfill_coin_descriptions(limit: int | None = None, batch_size: int | None = None) -> int:
+    """Completa la descripcion de las monedas que aun no la tienen.
+
+    Etapa independiente de la sincronizacion de precios: solo toca monedas con
+    ``description`` a NULL, usa la peticion ligera de metadatos y confirma cada
+    lote por separado, de modo que una ejecucion interrumpida se reanuda donde
+    se quedo. Las monedas sin descripcion en CoinGecko se marcan con cadena
+    vacia para no volver a pedirlas. Devuelve el numero de monedas actualizadas.
+    """
+    settings = get_settings()
+    batch_size = max(1, batch_size or settings.sync_description_batch)
+    updated = 0
+    failed: set[int] = set()
+
+    while limit is None or updated + len(failed) < limit:
+        take = batch_size if limit is None else min(batch_size, limit - updated - len(failed))
+        with session_scope() as session:
+            query = (
+                select(Coin)
+                .where(Coin.description.is_(None))
+                .order_by(Coin.market_cap_rank.asc().nulls_last(), Coin.id.asc())
+                .limit(take)
+            )
+            if failed:
+                query = query.where(Coin.id.not_in(failed))
+            coins = session.execute(query).scalars().all()
+            if not coins:
+                break
+
+            changed = 0
+            for coin in coins:
+                try:
+                    metadata = fetch_coin_metadata(coin.coingecko_id)
+                except Exception as exc:
+                    logger.warning("No se pudo obtener la descripcion para %s: %s", coin.coingecko_id, exc)
+                    failed.add(coin.id)
+                    continue
+                coin.description = (metadata.get("description") or "").strip()
+                if not coin.image_url:
+                    coin.image_url = metadata.get("image")
+                changed += 1
+            updated += changed
+            if changed:
+                # Las descripciones no reescriben precios pasados: se conserva la generacion historica.
+                publish_change(session, None, history=False)
+
+    if updated or failed:
+        logger.info("Descripciones completadas: %s monedas (%s con error)", updated, len(failed))
+    return updated
+
+
+def _series_bounds(session: Session, coin_pks: list[int], vs: str) -> dict[int, tuple[datetime, datetime]]:
+    """Devuelve ``coin_id -> (primer, ultimo recorded_at)`` usando ix_series_coin_vs_time."""
+    stmt = (
+        select(CoinSeries.coin_id, func.min(CoinSeries.recorded_at), func.max(CoinSeries.recorded_at))
+        .where(CoinSeries.vs_currency == vs)
+        .where(CoinSeries.coin_id.in_(coin_pks))
+        .group_by(CoinSeries.coin_id)
+    )
+    return {coin_pk: (first, last) for coin_pk, first, last in session.execute(stmt)}
+
+
+def _missing_days(
+    bounds: tuple[datetime, datetime] | None,
+    window_days: int,
+    now: datetime,
+) -> int:
+    """Calcula cuantos dias hay que pedir a la API para completar la serie."""
+    if bounds is None:
+        return window_days
+    first, last = bounds
+    # Si la historia almacenada no cubre la ventana pedida se descarga entera.
+    if first > now - timedelta(days=window_days - 1):
+        return window_days
+    missing = math.ceil((now - last) / timedelta(days=1)) + 1
+    return max(1, min(window_days, missing))
+
+
+def _insert_series(session: Session, rows: list[dict[str, Any]]) -> int:
+    """Inserta puntos de serie en bloque ignorando los existentes (uq_series_coin_vs_ts)."""
+    inserted = 0
+    for start in range(0, len(rows), _SERIES_INSERT_CHUNK):
+        stmt = (
+            pg_insert(CoinSeries)
+            .values(rows[start:start + _SERIES_INSERT_CHUNK])
+            .on_conflict_do_nothing(constraint="uq_series_coin_vs_ts")
+            .returning(CoinSeries.id)
+        )
+        inserted += len(session.execute(stmt).all())
+    return inserted
+
+
+def _store_series(session: Session, rows: list[dict[str, Any]]) -> int:
+    if len(rows) >= get_settings().bulk_copy_threshold:
+        return copy_series(session, rows)
+    return _insert_series(session, rows)
 
 
 def sync_historical_series(
     vs_currency: str | None = None,
     days: int | None = None,
     coin_ids: list[str] | None = None,
+    mode: str = "incremental",
 ) -> tuple[int, int, list[str]]:
     """Descarga series historicas y las almacena en la tabla coin_series.
 
+    En modo ``incremental`` (por defecto) solo se pide a la API el tramo
+    posterior al ultimo punto guardado de cada moneda; ese tramo sustituye a
+    la cola existente y el resto de la historia no se toca.  El modo ``full``
+    borra y vuelve a descargar la ventana completa.
+
     Devuelve una tupla (entradas_insertadas, monedas_afectadas, lista_moneda_ids).
     """
+    if mode not in SERIES_SYNC_MODES:
+        raise ValueError(f"Modo de sincronizacion no soportado: {mode}")
     settings = get_settings()
     vs = (vs_currency or settings.sync_vs_currency).lower()
     window_days = days or 90
@@ -153,75 +465,118 @@ def sync_historical_series(
         except Exception as exc:  # pragma: no cover - logging de errores
             logger.warning("Fallo creando monedas previas a la serie historica: %s", exc)
 
-    total_entries = 0
-    coins_processed = 0
-    processed_names: list[str] = []
-
     with session_scope() as session:
-        coin_query = select(Coin)
+        coin_query = select(Coin.id, Coin.coingecko_id)
         if normalized_filter:
             coin_query = coin_query.where(Coin.coingecko_id.in_(normalized_filter))
-        coins = session.execute(coin_query).scalars().all()
-        if not coins:
-            logger.warning("No se encontraron monedas con los criterios solicitados: %s", normalized_filter)
-            return 0, 0, []
+        coins = session.execute(coin_query).all()
+        bounds = {}
+        if coins and mode == "incremental":
+            bounds = _series_bounds(session, [coin_pk for coin_pk, _ in coins], vs)
+    if not coins:
+        logger.warning("No se encontraron monedas con los criterios solicitados: %s", normalized_filter)
+        return 0, 0, []
+
+    total_entries = 0
+    coins_processed = 0
+    processed_names: list[str] = []
+    started = time.monotonic()
+    now = datetime.now(timezone.utc)
 
-        for coin in coins:
+    # Las descargas se ejecutan en paralelo (acotadas por el limitador de
+    # external.py); cada serie se persiste en su propia transaccion en cuanto llega.
+    workers = max(1, min(settings.sync_series_concurrency, len(coins)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="series-sync") as executor:
+        futures = {
+            executor.submit(
+                fetch_market_chart,
+                coingecko_id,
+                vs_currency=vs,
+                days=str(_missing_days(bounds.get(coin_pk), window_days, now)),
+                interval=interval,
+            ): (coin_pk, coingecko_id)
+            for coin_pk, coingecko_id in coins
+        }
+        for future in as_completed(futures):
+            coin_pk, coingecko_id = futures[future]
             try:
-                details = fetch_coin_detail(
-                    coin.coingecko_id,
-                    vs_currency=vs,
-                    days=str(window_days),
-                    interval=interval,
-                )
+                series = future.result() or []
             except Exception as exc:  # pragma: no cover - logging de errores
-                logger.warning("No se pudo obtener la serie historica para %s: %s", coin.coingecko_id, exc)
+                logger.warning("No se pudo obtener la serie historica para %s: %s", coingecko_id, exc)
                 continue
 
-            series = details.get('prices_series') or []
-            session.execute(
-                delete(CoinSeries).where(
-                    CoinSeries.coin_id == coin.id,
-                    CoinSeries.vs_currency == vs,
-                )
-            )
-
-            entries_added = 0
+            rows = []
             for timestamp_ms, price in series:
-                recorded_at = datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc)
                 price_decimal = _to_decimal(price)
                 if price_decimal is None:
                     continue
-                session.add(
-                    CoinSeries(
-                        coin_id=coin.id,
-                        vs_currency=vs,
-                        recorded_at=recorded_at,
-                        price=price_decimal,
-                    )
+                rows.append(
+                    {
+                        "coin_id": coin_pk,
+                        "vs_currency": vs,
+                        "recorded_at": datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc),
+                        "price": price_decimal,
+                    }
                 )
-                entries_added += 1
 
-            if entries_added:
+            if mode == "incremental" and not rows:
+                continue
+
+            with session_scope() as session:
+                stale = delete(CoinSeries).where(
+                    CoinSeries.coin_id == coin_pk,
+                    CoinSeries.vs_currency == vs,
+                )
+                if mode == "incremental":
+                    # El ultimo punto de CoinGecko es el precio "actual"; se
+                    # reemplaza la cola solapada para no acumular uno por ejecucion.
+                    stale = stale.where(CoinSeries.recorded_at >= min(row["recorded_at"] for row in rows))
+                session.execute(stale)
+                inserted = _store_series(session, rows) if rows else 0
+                publish_change(session, vs)
+
+            if inserted:
                 coins_processed += 1
-                total_entries += entries_added
-                processed_names.append(coin.coingecko_id)
+                total_entries += inserted
+                processed_names.append(coingecko_id)
 
     logger.info(
-        "Series historicas sincronizadas: %s puntos en %s monedas (%s, window=%s dias)",
+        "Series historicas sincronizadas: %s puntos en %s monedas (%s, window=%s dias, modo=%s) en %.1f s",
         total_entries,
         coins_processed,
         vs,
         window_days,
+        mode,
+        time.monotonic() - started,
     )
     return total_entries, coins_processed, processed_names
 
+
+async def ensure_recent_market_data_async(
+    vs_currency: str | None = None,
+    max_age_minutes: int | None = None,
+) -> bool:
+    """Variante para el event loop de ``ensure_recent_market_data``.
+
+    El camino habitual solo lee el registro en memoria; si todavia hay que
+    calentarlo con una consulta, esta se ejecuta en el threadpool para no
+    bloquear el resto de peticiones.
+    """
+    registry = get_registry()
+    vs = (vs_currency or get_settings().sync_vs_currency).lower()
+    if registry.synced_at(vs) is None and not registry.warmed:
+        return await run_in_threadpool(ensure_recent_market_data, vs_currency, max_age_minutes)
+    return ensure_recent_market_data(vs_currency, max_age_minutes)
+
+
 def ensure_recent_market_data(
     vs_currency: str | None = None,
     max_age_minutes: int | None = None,
 ) -> bool:
     """Comprueba si existen datos recientes en la base de datos.
 
+    Consulta el registro de frescura en memoria (ver ``freshness``), sin ir
+    a la base en el camino habitual.
     Devuelve ``True`` cuando los datos estan disponibles y frescos.
     Si no hay snapshots o estan desactualizados devuelve ``False`` sin lanzar sincronizacion.
     """
@@ -229,13 +584,13 @@ def ensure_recent_market_data(
     vs = (vs_currency or settings.sync_vs_currency).lower()
     freshness = max_age_minutes or settings.data_freshness_minutes
 
-    with session_scope() as session:
-        last_snapshot_at = (
-            session.execute(
-                select(func.max(CoinSnapshot.recorded_at))
-                .where(CoinSnapshot.vs_currency == vs)
-            ).scalar_one_or_none()
-        )
+    registry = get_registry()
+    last_snapshot_at = registry.synced_at(vs)
+    if last_snapshot_at is None and not registry.warmed:
+        # Sin registro caliente (p. ej. fuera del lifespan) se consulta una vez.
+        with session_scope() as session:
+            registry.warm(session)
+        last_snapshot_at = registry.synced_at(vs)
 
     if last_snapshot_at is None:
         logger.warning("No hay snapshots almacenados para %s.", vs)
@@ -270,6 +625,11 @@ async def _periodic_sync_loop() -> None:
             await asyncio.get_running_loop().run_in_executor(
                 None, sync_market_data, vs, per_page, pages
             )
+            await asyncio.get_running_loop().run_in_executor(
+                None, backfill_coin_descriptions, settings.sync_description_limit
+            )
+            await asyncio.get_running_loop().run_in_executor(None, maintain_snapshot_partitions)
+            await asyncio.get_running_loop().run_in_executor(None, compact_snapshots)
         except Exception as exc:  # pragma: no cover - logging de errores
             logger.exception("Error en la sincronizacion periodica: %s", exc)
         await asyncio.sleep(interval)
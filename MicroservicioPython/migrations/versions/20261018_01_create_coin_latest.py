@@ -0,0 +1,62 @@
+"""create coin_latest table
+
+Revision ID: 20261018_01
+Revises: 20250210_02
+Create Date: 2026-10-18 00:00:00
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_01'
+down_revision = '20250210_02'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'coin_latest',
+        sa.Column('coin_id', sa.Integer(), nullable=False),
+        sa.Column('vs_currency', sa.String(length=16), nullable=False),
+        sa.Column('recorded_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('market_cap_rank', sa.Integer(), nullable=True),
+        sa.Column('price', sa.Numeric(20, 8), nullable=True),
+        sa.Column('market_cap', sa.Numeric(24, 2), nullable=True),
+        sa.Column('total_volume', sa.Numeric(24, 2), nullable=True),
+        sa.Column('change_1h', sa.Numeric(10, 4), nullable=True),
+        sa.Column('change_24h', sa.Numeric(10, 4), nullable=True),
+        sa.Column('change_7d', sa.Numeric(10, 4), nullable=True),
+        sa.Column('ath', sa.Numeric(20, 8), nullable=True),
+        sa.ForeignKeyConstraint(['coin_id'], ['coins.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('coin_id', 'vs_currency'),
+    )
+    op.create_index(
+        'ix_coin_latest_ranking',
+        'coin_latest',
+        ['vs_currency', 'market_cap', 'market_cap_rank'],
+        postgresql_ops={'market_cap': 'DESC NULLS LAST', 'market_cap_rank': 'ASC NULLS LAST'},
+    )
+    op.execute(
+        """
+        INSERT INTO coin_latest (
+            coin_id, vs_currency, recorded_at, market_cap_rank, price, market_cap,
+            total_volume, change_1h, change_24h, change_7d, ath
+        )
+        SELECT DISTINCT ON (s.coin_id, s.vs_currency)
+            s.coin_id, s.vs_currency, s.recorded_at, c.market_cap_rank, s.price, s.market_cap,
+            s.total_volume, s.change_1h, s.change_24h, s.change_7d, s.ath
+        FROM coin_snapshots s
+        JOIN coins c ON c.id = s.coin_id
+        ORDER BY s.coin_id, s.vs_currency, s.recorded_at DESC
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_coin_latest_ranking', table_name='coin_latest')
+    op.drop_table('coin_latest')
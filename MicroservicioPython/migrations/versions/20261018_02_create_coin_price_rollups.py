@@ -0,0 +1,57 @@
+"""create coin_price_rollups table
+
+Revision ID: 20261018_02
+Revises: 20261018_01
+Create Date: 2026-10-18 00:00:00
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_02'
+down_revision = '20261018_01'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'coin_price_rollups',
+        sa.Column('coin_id', sa.Integer(), nullable=False),
+        sa.Column('vs_currency', sa.String(length=16), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('sample_count', sa.Integer(), nullable=False),
+        sa.Column('price_sum', sa.Float(), nullable=False),
+        sa.Column('price_sq_sum', sa.Float(), nullable=False),
+        sa.Column('price_min', sa.Numeric(20, 8), nullable=False),
+        sa.Column('price_max', sa.Numeric(20, 8), nullable=False),
+        sa.ForeignKeyConstraint(['coin_id'], ['coins.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('coin_id', 'vs_currency', 'bucket_start'),
+    )
+    op.execute(
+        """
+        INSERT INTO coin_price_rollups (
+            coin_id, vs_currency, bucket_start, sample_count, price_sum, price_sq_sum, price_min, price_max
+        )
+        SELECT
+            coin_id,
+            vs_currency,
+            date_trunc('hour', recorded_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+            count(*),
+            sum(price)::float8,
+            sum(price * price)::float8,
+            min(price),
+            max(price)
+        FROM coin_snapshots
+        WHERE price IS NOT NULL
+        GROUP BY 1, 2, 3
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('coin_price_rollups')
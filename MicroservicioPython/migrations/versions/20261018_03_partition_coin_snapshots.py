@@ -0,0 +1,98 @@
+"""partition coin_snapshots by month
+
+Revision ID: 20261018_03
+Revises: 20261018_02
+Create Date: 2026-10-18 00:00:00
+
+"""
+from __future__ import annotations
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_03'
+down_revision = '20261018_02'
+branch_labels = None
+depends_on = None
+
+_COLUMNS = (
+    "id, coin_id, recorded_at, vs_currency, price, market_cap, total_volume, "
+    "change_1h, change_24h, change_7d, ath"
+)
+
+# Crea una particion mensual (UTC) por cada mes entre el primer snapshot y
+# dos meses por delante de la fecha actual.
+_CREATE_PARTITIONS = """
+DO $$
+DECLARE
+    month_start timestamp;
+    last_month timestamp;
+BEGIN
+    SELECT date_trunc('month', coalesce(min(recorded_at), now()) AT TIME ZONE 'UTC')
+      INTO month_start
+      FROM coin_snapshots_legacy;
+    last_month := date_trunc('month', now() AT TIME ZONE 'UTC') + interval '2 months';
+    WHILE month_start <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF coin_snapshots FOR VALUES FROM (%L) TO (%L)',
+            'coin_snapshots_p' || to_char(month_start, 'YYYYMM'),
+            month_start AT TIME ZONE 'UTC',
+            (month_start + interval '1 month') AT TIME ZONE 'UTC'
+        );
+        month_start := month_start + interval '1 month';
+    END LOOP;
+END $$;
+"""
+
+
+def _rename_legacy() -> None:
+    op.execute("ALTER TABLE coin_snapshots RENAME TO coin_snapshots_legacy")
+    op.execute("ALTER TABLE coin_snapshots_legacy RENAME CONSTRAINT coin_snapshots_pkey TO coin_snapshots_legacy_pkey")
+    op.execute(
+        "ALTER TABLE coin_snapshots_legacy "
+        "RENAME CONSTRAINT uq_snapshots_coin_timestamp TO uq_snapshots_legacy_coin_timestamp"
+    )
+    op.execute("ALTER INDEX ix_snapshots_vs_recorded RENAME TO ix_snapshots_legacy_vs_recorded")
+    op.execute("ALTER INDEX ix_coin_snapshots_coin_id RENAME TO ix_coin_snapshots_legacy_coin_id")
+
+
+def _create_table(partitioned: bool) -> None:
+    primary_key = "PRIMARY KEY (id, recorded_at)" if partitioned else "PRIMARY KEY (id)"
+    op.execute(
+        f"""
+        CREATE TABLE coin_snapshots (
+            id integer NOT NULL DEFAULT nextval('coin_snapshots_id_seq'),
+            coin_id integer NOT NULL REFERENCES coins (id) ON DELETE CASCADE,
+            recorded_at timestamp with time zone NOT NULL,
+            vs_currency varchar(16) NOT NULL,
+            price numeric(20, 8),
+            market_cap numeric(24, 2),
+            total_volume numeric(24, 2),
+            change_1h numeric(10, 4),
+            change_24h numeric(10, 4),
+            change_7d numeric(10, 4),
+            ath numeric(20, 8),
+            CONSTRAINT coin_snapshots_pkey {primary_key},
+            CONSTRAINT uq_snapshots_coin_timestamp UNIQUE (coin_id, vs_currency, recorded_at)
+        ) {"PARTITION BY RANGE (recorded_at)" if partitioned else ""}
+        """
+    )
+    op.execute("ALTER SEQUENCE coin_snapshots_id_seq OWNED BY coin_snapshots.id")
+    op.create_index('ix_snapshots_vs_recorded', 'coin_snapshots', ['vs_currency', 'recorded_at'])
+    op.create_index('ix_coin_snapshots_coin_id', 'coin_snapshots', ['coin_id'])
+
+
+def upgrade() -> None:
+    _rename_legacy()
+    _create_table(partitioned=True)
+    op.execute(_CREATE_PARTITIONS)
+    op.execute(f"INSERT INTO coin_snapshots ({_COLUMNS}) SELECT {_COLUMNS} FROM coin_snapshots_legacy")
+    op.execute("DROP TABLE coin_snapshots_legacy")
+
+
+def downgrade() -> None:
+    _rename_legacy()
+    _create_table(partitioned=False)
+    op.execute(f"INSERT INTO coin_snapshots ({_COLUMNS}) SELECT {_COLUMNS} FROM coin_snapshots_legacy")
+    op.execute("DROP TABLE coin_snapshots_legacy")
@@ -0,0 +1,92 @@
+"""add OHLC/volume to price rollups and create coin_price_rollups_daily
+
+Revision ID: 20261018_04
+Revises: 20261018_03
+Create Date: 2026-10-18 00:00:00
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_04'
+down_revision = '20261018_03'
+branch_labels = None
+depends_on = None
+
+
+def _ohlc_columns() -> list[sa.Column]:
+    return [
+        sa.Column('open_price', sa.Numeric(20, 8), nullable=True),
+        sa.Column('open_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('close_price', sa.Numeric(20, 8), nullable=True),
+        sa.Column('close_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('market_cap_sum', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('market_cap_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_volume_sum', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('total_volume_count', sa.Integer(), nullable=False, server_default='0'),
+    ]
+
+
+def upgrade() -> None:
+    for column in _ohlc_columns():
+        op.add_column('coin_price_rollups', column)
+    op.create_index('ix_rollups_bucket_start', 'coin_price_rollups', ['bucket_start'])
+
+    op.create_table(
+        'coin_price_rollups_daily',
+        sa.Column('coin_id', sa.Integer(), nullable=False),
+        sa.Column('vs_currency', sa.String(length=16), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('sample_count', sa.Integer(), nullable=False),
+        sa.Column('price_sum', sa.Float(), nullable=False),
+        sa.Column('price_sq_sum', sa.Float(), nullable=False),
+        sa.Column('price_min', sa.Numeric(20, 8), nullable=False),
+        sa.Column('price_max', sa.Numeric(20, 8), nullable=False),
+        *_ohlc_columns(),
+        sa.ForeignKeyConstraint(['coin_id'], ['coins.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('coin_id', 'vs_currency', 'bucket_start'),
+    )
+
+    # Completa apertura/cierre y volumen de los buckets existentes con los snapshots disponibles.
+    op.execute(
+        """
+        UPDATE coin_price_rollups r
+        SET open_price = s.open_price,
+            open_at = s.open_at,
+            close_price = s.close_price,
+            close_at = s.close_at,
+            market_cap_sum = s.market_cap_sum,
+            market_cap_count = s.market_cap_count,
+            total_volume_sum = s.total_volume_sum,
+            total_volume_count = s.total_volume_count
+        FROM (
+            SELECT
+                coin_id,
+                vs_currency,
+                date_trunc('hour', recorded_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC' AS bucket_start,
+                (array_agg(price ORDER BY recorded_at))[1] AS open_price,
+                min(recorded_at) AS open_at,
+                (array_agg(price ORDER BY recorded_at DESC))[1] AS close_price,
+                max(recorded_at) AS close_at,
+                coalesce(sum(market_cap), 0)::float8 AS market_cap_sum,
+                count(market_cap) AS market_cap_count,
+                coalesce(sum(total_volume), 0)::float8 AS total_volume_sum,
+                count(total_volume) AS total_volume_count
+            FROM coin_snapshots
+            WHERE price IS NOT NULL
+            GROUP BY 1, 2, 3
+        ) s
+        WHERE r.coin_id = s.coin_id AND r.vs_currency = s.vs_currency AND r.bucket_start = s.bucket_start
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('coin_price_rollups_daily')
+    op.drop_index('ix_rollups_bucket_start', table_name='coin_price_rollups')
+    for column in _ohlc_columns():
+        op.drop_column('coin_price_rollups', column.name)
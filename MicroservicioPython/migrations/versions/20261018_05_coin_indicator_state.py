@@ -0,0 +1,44 @@
+"""create coin_indicator_state
+
+Revision ID: 20261018_05
+Revises: 20261018_04
+Create Date: 2026-10-18 00:00:00
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_05'
+down_revision = '20261018_04'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'coin_indicator_state',
+        sa.Column('coin_id', sa.Integer(), nullable=False),
+        sa.Column('vs_currency', sa.String(length=16), nullable=False),
+        sa.Column('last_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('last_price', sa.Float(), nullable=False),
+        sa.Column('sample_count', sa.Integer(), nullable=False),
+        sa.Column('ema_fast', sa.Float(), nullable=False),
+        sa.Column('ema_slow', sa.Float(), nullable=False),
+        sa.Column('macd_signal', sa.Float(), nullable=False),
+        sa.Column('avg_gain', sa.Float(), nullable=False),
+        sa.Column('avg_loss', sa.Float(), nullable=False),
+        sa.Column('avg_range', sa.Float(), nullable=False),
+        sa.Column('recent_prices', postgresql.ARRAY(sa.Float()), nullable=False),
+        sa.ForeignKeyConstraint(['coin_id'], ['coins.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('coin_id', 'vs_currency'),
+    )
+    # El estado se inicializa desde el historico con POST /api/admin/maintenance/indicators.
+
+
+def downgrade() -> None:
+    op.drop_table('coin_indicator_state')
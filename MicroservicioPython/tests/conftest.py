@@ -0,0 +1,96 @@
+"""Configuracion comun de las pruebas.
+
+La mayoria de las pruebas no necesitan base de datos.  Las que usan el
+fixture ``database`` requieren PostgreSQL y solo se ejecutan si
+``TEST_DATABASE_URL`` apunta a una base desechable: sus tablas se vacian
+antes de cada prueba.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+from typing import Any, Dict, List
+
+import pytest
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+if TEST_DATABASE_URL:
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+os.environ["SYNC_ENABLE_SCHEDULER"] = "false"
+os.environ["FRESHNESS_LISTEN"] = "false"
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    """Cambia variables de entorno y recarga ``get_settings`` (se restaura al terminar)."""
+    from app.config import get_settings
+
+    def apply(**values: str):
+        for name, value in values.items():
+            monkeypatch.setenv(name, value)
+        get_settings.cache_clear()
+        return get_settings()
+
+    yield apply
+    get_settings.cache_clear()
+
+
+@pytest.fixture(scope="session")
+def database_engine():
+    if not TEST_DATABASE_URL:
+        pytest.skip("Define TEST_DATABASE_URL para ejecutar las pruebas con PostgreSQL")
+    from app.db import get_engine
+
+    return get_engine()
+
+
+@pytest.fixture
+def database(database_engine):
+    """Base vacia, sin estado en memoria de pruebas anteriores."""
+    from sqlalchemy import text
+
+    from app.db import Base
+    from app.services.freshness import get_registry
+    from app.services.response_cache import bump_generation
+
+    tables = ", ".join(f'"{name}"' for name in sorted(Base.metadata.tables))
+    with database_engine.begin() as connection:
+        connection.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+    get_registry.cache_clear()
+    bump_generation()
+    return database_engine
+
+
+def fake_markets(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Pagina de ``/coins/markets`` con el formato que devuelve ``fetch_prices``."""
+    rnd = random.Random(seed)
+    return [
+        {
+            "id": f"coin-{index}",
+            "symbol": f"c{index}",
+            "nombre": f"Coin {index}",
+            "image": None,
+            "current_price": round(rnd.uniform(0.01, 60000), 6),
+            "market_cap": rnd.randint(1, 10**12),
+            "market_cap_rank": index + 1,
+            "total_volume": rnd.randint(1, 10**10),
+            "ath": 1.0,
+            "price_change_percentage_1h": 0.1,
+            "price_change_percentage_24h": -1.2,
+            "price_change_percentage_7d": 3.3,
+        }
+        for index in range(count)
+    ]
+
+
+@pytest.fixture
+def synced_market(database, monkeypatch):
+    """Sincroniza una pagina de mercado falsa sin llamar a CoinGecko."""
+    from app.services import sync
+
+    def run(entries: List[Dict[str, Any]], vs_currency: str = "usd") -> int:
+        monkeypatch.setattr(sync, "fetch_prices", lambda vs_currency, per_page, page: entries if page == 1 else [])
+        return sync.sync_market_data(vs_currency, len(entries), 1)
+
+    return run
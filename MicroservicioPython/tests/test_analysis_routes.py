@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import create_app
+
+from conftest import fake_markets
+
+
+@pytest.fixture
+def client():
+    # Sin ``with``: no se ejecuta el lifespan (planificador ni listener).
+    return TestClient(create_app())
+
+
+@pytest.mark.parametrize(
+    ("method", "path", "body"),
+    [
+        ("get", "/api/analysis/C0", None),
+        ("get", "/api/analysis/C0/indicators", None),
+        ("post", "/api/analysis/batch", {"symbols": ["C0", "C1"]}),
+    ],
+)
+def test_cached_analysis_is_not_served_once_data_is_stale(synced_market, settings, client, method, path, body):
+    synced_market(fake_markets(3))
+    kwargs = {"json": body} if body is not None else {}
+    assert getattr(client, method)(path, **kwargs).status_code == 200
+
+    # La respuesta ya esta cacheada; con los snapshots caducados debe responderse 503, no el cuerpo guardado.
+    settings(DATA_FRESHNESS_MINUTES="0")
+    assert getattr(client, method)(path, **kwargs).status_code == 503
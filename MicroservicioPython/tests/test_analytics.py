@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import time
+
+from app.services import analyse_symbol, analyse_symbols, symbol_indicators
+
+from conftest import fake_markets
+
+
+def _market_with_shared_symbol():
+    entries = fake_markets(6, seed=1)
+    # coin-4 (rank 5) y coin-1 (rank 2) comparten simbolo: debe ganar la de mayor capitalizacion.
+    entries[4] = dict(entries[4], symbol="c1")
+    return entries
+
+
+def test_single_and_batch_analysis_match(synced_market):
+    for seed in range(3):
+        entries = _market_with_shared_symbol()
+        for entry in entries:
+            entry["current_price"] *= 1 + seed / 10
+        synced_market(entries)
+        time.sleep(0.01)
+
+    symbols = ["C0", "C1", "C2", "C5"]
+    batch = analyse_symbols(symbols, days=7)
+    assert batch["errors"] == {}
+    assert batch["results"] == [analyse_symbol(symbol, days=7) for symbol in symbols]
+
+
+def test_shared_symbol_resolves_to_highest_market_cap(synced_market):
+    synced_market(_market_with_shared_symbol())
+
+    single = analyse_symbol("c1", days=7)
+    expected = _market_with_shared_symbol()[1]["current_price"]
+    assert single["last_price"] == expected
+    assert analyse_symbols(["c1"], days=7)["results"] == [single]
+    assert symbol_indicators("c1")["last_price"] == expected
+
+
+def test_batch_reports_unknown_symbols(synced_market):
+    synced_market(fake_markets(3))
+
+    result = analyse_symbols(["C0", "NOPE"], days=7)
+    assert [item["symbol"] for item in result["results"]] == ["C0"]
+    assert set(result["errors"]) == {"NOPE"}
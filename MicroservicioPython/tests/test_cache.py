@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from app.services.cache import LRUCache
+
+
+def _cache(**kwargs) -> LRUCache:
+    kwargs.setdefault("max_entries", 100)
+    kwargs.setdefault("max_bytes", 1000)
+    return LRUCache(sizeof=len, **kwargs)
+
+
+def _wait_for(condition, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condicion no alcanzada"
+        time.sleep(0.001)
+
+
+def _concurrent(cache: LRUCache, loader, threads: int = 8):
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(cache.get_or_load("ns", "key", loader))
+        except Exception as exc:
+            errors.append(exc)
+
+    workers = [threading.Thread(target=call) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    return workers, results, errors
+
+
+def test_get_or_load_loads_once_for_concurrent_misses():
+    cache = _cache()
+    release = threading.Event()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        release.wait(2)
+        return "value"
+
+    workers, results, errors = _concurrent(cache, loader)
+    _wait_for(lambda: cache.stats()["coalesced"] == 7)
+    release.set()
+    for worker in workers:
+        worker.join()
+
+    assert calls == [1]
+    assert results == ["value"] * 8 and errors == []
+    assert cache.get_or_load("ns", "key", lambda: pytest.fail("no deberia recargar")) == "value"
+
+
+def test_get_or_load_shares_the_error_and_does_not_cache_it():
+    cache = _cache()
+    release = threading.Event()
+    error = RuntimeError("fallo")
+
+    def loader():
+        release.wait(2)
+        raise error
+
+    workers, results, errors = _concurrent(cache, loader, threads=4)
+    _wait_for(lambda: cache.stats()["coalesced"] == 3)
+    release.set()
+    for worker in workers:
+        worker.join()
+
+    assert results == [] and errors == [error] * 4
+    assert cache.get_or_load("ns", "key", lambda: "retry") == "retry"
+
+
+def test_byte_limit_evicts_least_recently_used():
+    cache = _cache(max_bytes=10)
+    cache.set("ns", "a", "aaaa")
+    cache.set("ns", "b", "bbbb")
+    assert cache.get("ns", "a") == "aaaa"
+    cache.set("ns", "c", "cccc")
+
+    assert cache.get("ns", "b") is None
+    assert cache.get("ns", "a") == "aaaa" and cache.get("ns", "c") == "cccc"
+    stats = cache.stats()
+    assert stats["bytes"] == 8 and stats["evictions"] == 1
+
+
+def test_value_larger_than_limit_is_not_stored():
+    cache = _cache(max_bytes=10)
+    cache.set("ns", "a", "aaaa")
+    cache.set("ns", "big", "x" * 11)
+    assert cache.get("ns", "big") is None
+    assert cache.get("ns", "a") == "aaaa"
+
+
+def test_replacing_a_key_updates_the_byte_count():
+    cache = _cache(max_bytes=10)
+    cache.set("ns", "a", "aaaaaaaa")
+    cache.set("ns", "a", "aa")
+    cache.set("ns", "b", "bbbbbbbb")
+    assert cache.stats()["bytes"] == 10
+    assert cache.get("ns", "a") == "aa"
+
+
+def test_entry_limit_and_namespace_ttl():
+    cache = _cache(max_entries=2, ttls={"short": 0.01})
+    cache.set("short", 1, "x")
+    cache.set("long", 1, "y")
+    time.sleep(0.02)
+    assert cache.get("short", 1) is None
+    assert cache.stats()["expirations"] == 1
+
+    cache.set("long", 2, "z")
+    cache.set("long", 3, "w")
+    assert cache.get("long", 1) is None
+    assert cache.stats()["entries"] == 2
+
+    cache.invalidate("long")
+    assert cache.stats()["entries"] == 0
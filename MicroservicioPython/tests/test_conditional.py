@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import Request
+
+from app.services import conditional
+from app.services.conditional import entity_tag, is_not_modified
+from app.services.freshness import FreshnessRegistry
+
+ETAG = '"abc123"'
+
+
+def _request(if_none_match: str | None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match is not None else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+@pytest.mark.parametrize(
+    ("if_none_match", "expected"),
+    [
+        (None, False),
+        ("", False),
+        (ETAG, True),
+        (f"W/{ETAG}", True),
+        ('"otro"', False),
+        (f'"otro", {ETAG}', True),
+        (f'"otro",W/{ETAG} , "mas"', True),
+        ("*", True),
+        (" * ", True),
+        ('"abc"', False),
+    ],
+)
+def test_if_none_match(if_none_match, expected):
+    assert is_not_modified(_request(if_none_match), {"ETag": ETAG}) is expected
+
+
+def test_without_etag_is_always_modified():
+    assert is_not_modified(_request("*"), {}) is False
+
+
+def test_entity_tag_follows_changes_and_encoding(monkeypatch):
+    registry = FreshnessRegistry()
+    monkeypatch.setattr(conditional, "get_registry", lambda: registry)
+    assert entity_tag("prices", ("usd", 10), "usd") is None
+
+    moment = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    registry.record("usd", synced_at=moment, changed_at=moment)
+    tag = entity_tag("prices", ("usd", 10), "usd")
+    assert tag == entity_tag("prices", ("usd", 10), "usd")
+    assert tag.startswith('"') and tag.endswith('"')
+    assert tag != entity_tag("prices", ("usd", 10), "usd", encoding="gzip")
+    assert tag != entity_tag("prices", ("usd", 20), "usd")
+
+    registry.record("usd", changed_at=moment + timedelta(seconds=1))
+    assert tag != entity_tag("prices", ("usd", 10), "usd")
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import gzip
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+from app.services import encoding
+from app.services.encoding import compress, dumps, negotiate_encoding
+
+
+@pytest.fixture
+def compression(settings):
+    settings(RESPONSE_COMPRESSION="true")
+
+
+def test_no_encoding_when_compression_is_disabled(settings):
+    settings(RESPONSE_COMPRESSION="false")
+    assert negotiate_encoding("gzip, br") is None
+
+
+@pytest.mark.parametrize(
+    ("header", "expected"),
+    [
+        (None, None),
+        ("", None),
+        ("identity", None),
+        ("gzip", "gzip"),
+        ("GZIP;q=0.5", "gzip"),
+        ("gzip, br", "br"),
+        ("br;q=0, gzip", "gzip"),
+        ("br;q=0, gzip;q=0", None),
+        ("*", "br"),
+        ("*;q=0, gzip", "gzip"),
+        ("gzip;q=bad", None),
+    ],
+)
+def test_negotiation(compression, monkeypatch, header, expected):
+    # ``brotli`` es opcional: se simula instalado para que el resultado no dependa del entorno.
+    monkeypatch.setattr(encoding, "_brotli", lambda: object())
+    assert negotiate_encoding(header) == expected
+
+
+def test_negotiation_falls_back_to_gzip_without_brotli(compression, monkeypatch):
+    monkeypatch.setattr(encoding, "_brotli", lambda: None)
+    assert negotiate_encoding("br, gzip") == "gzip"
+    assert negotiate_encoding("br") is None
+
+
+def test_gzip_is_deterministic():
+    body = dumps({"prices": [[1, 2.5]] * 100})
+    first = compress(body, "gzip")
+    assert compress(body, "gzip") == first
+    assert gzip.decompress(first) == body
+
+
+def test_unknown_encoding_is_rejected():
+    with pytest.raises(ValueError):
+        compress(b"{}", "zstd")
+
+
+def test_dumps_converts_decimals_and_utc_dates():
+    moment = datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    assert dumps({"price": Decimal("1.5"), "at": moment}) == b'{"price":1.5,"at":"2024-01-02T03:04:05Z"}'
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pytest
+
+from app.services import freshness, sync
+from app.services.freshness import FreshnessRegistry
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = FreshnessRegistry()
+    monkeypatch.setattr(sync, "get_registry", lambda: registry)
+    return registry
+
+
+def test_async_check_warms_registry_off_the_event_loop(registry, monkeypatch):
+    threads = []
+
+    @contextmanager
+    def fake_scope():
+        yield None
+
+    def fake_warm(session):
+        threads.append(threading.get_ident())
+        registry.record("usd", synced_at=datetime.now(timezone.utc))
+        registry.warmed = True
+        return True
+
+    monkeypatch.setattr(sync, "session_scope", fake_scope)
+    monkeypatch.setattr(registry, "warm", fake_warm)
+
+    async def check():
+        return threading.get_ident(), await sync.ensure_recent_market_data_async("usd")
+
+    loop_thread, fresh = asyncio.run(check())
+    assert fresh is True
+    assert threads and threads[0] != loop_thread
+
+
+def test_async_check_reads_warm_registry_without_querying(registry, monkeypatch):
+    registry.record("usd", synced_at=datetime.now(timezone.utc))
+    registry.warmed = True
+    monkeypatch.setattr(sync, "session_scope", None)
+
+    assert asyncio.run(sync.ensure_recent_market_data_async("usd")) is True
+    assert asyncio.run(sync.ensure_recent_market_data_async("eur")) is False
+
+
+def _payload(origin: str) -> str:
+    moment = datetime.now(timezone.utc).isoformat()
+    return json.dumps({"vs": "usd", "synced_at": moment, "changed_at": moment, "history": False, "origin": origin})
+
+
+def test_own_notification_is_not_applied_twice(monkeypatch):
+    bumps = []
+    monkeypatch.setattr(freshness, "bump_generation", lambda history=True: bumps.append(history))
+    monkeypatch.setattr(freshness, "get_registry", lambda: FreshnessRegistry())
+    monkeypatch.setattr(freshness, "get_broadcaster", lambda: type("Idle", (), {"refresh": lambda self, vs, at: 0})())
+
+    freshness._handle_notification(_payload(freshness.PROCESS_ID))
+    assert bumps == []
+
+    freshness._handle_notification(_payload("otro-proceso"))
+    assert bumps == [False]
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+import requests
+
+from app.services.http_client import CircuitBreaker, CoinGeckoClient, CoinGeckoUnavailable
+from app.services.ratelimit import TokenBucket
+
+
+def _response(status: int, retry_after: str = "0") -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response.headers["Retry-After"] = retry_after
+    response._content = b"{}"
+    response.url = "https://api.example/test"
+    return response
+
+
+class _FakeSession:
+    """Devuelve en orden las respuestas indicadas: un codigo, una respuesta o una excepcion a lanzar."""
+
+    def __init__(self, *outcomes) -> None:
+        self.outcomes = list(outcomes)
+
+    def get(self, url, params=None, timeout=None):
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome if isinstance(outcome, requests.Response) else _response(outcome)
+
+
+def _client(breaker: CircuitBreaker, *outcomes) -> CoinGeckoClient:
+    client = CoinGeckoClient(
+        timeout=1.0,
+        pool_size=1,
+        max_retries=1,
+        backoff_seconds=0.0,
+        backoff_max_seconds=0.0,
+        limiter=TokenBucket(60_000, burst=100),
+        breaker=breaker,
+    )
+    client.session = _FakeSession(*outcomes)
+    return client
+
+
+def test_breaker_opens_after_threshold_and_half_opens_after_timeout():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CoinGeckoUnavailable):
+        breaker.before_call()
+
+    time.sleep(0.06)
+    assert breaker.state == "half-open"
+    breaker.before_call()
+    # Solo una llamada de prueba a la vez.
+    with pytest.raises(CoinGeckoUnavailable):
+        breaker.before_call()
+
+
+def test_failed_probe_reopens_and_successful_probe_closes():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.before_call()
+
+
+def test_exhausted_rate_limit_does_not_reset_failures():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    client = _client(breaker, 429, 429)
+    with pytest.raises(requests.HTTPError):
+        client.get_json("https://api.example/test")
+    assert client.stats()["rate_limited"] == 2
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_rate_limited_probe_keeps_the_circuit_half_open():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    client = _client(breaker, 429, 429, 200)
+    with pytest.raises(requests.HTTPError):
+        client.get_json("https://api.example/test")
+    assert breaker.state == "half-open"
+
+    assert client.get_json("https://api.example/test") == {}
+    assert breaker.state == "closed"
+
+
+@pytest.mark.parametrize(
+    "error",
+    [requests.exceptions.ChunkedEncodingError("cortado"), requests.exceptions.InvalidURL("url"), ValueError("otro")],
+)
+def test_unexpected_error_on_probe_does_not_block_the_circuit(error):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    client = _client(breaker, error, 200)
+    with pytest.raises(type(error)):
+        client.get_json("https://api.example/test")
+
+    time.sleep(0.06)
+    assert client.get_json("https://api.example/test") == {}
+    assert breaker.state == "closed"
+
+
+def test_retry_after_is_capped_at_backoff_max(monkeypatch):
+    client = _client(CircuitBreaker(failure_threshold=5, reset_timeout=60), _response(429, retry_after="3600"), 200)
+    client.backoff_max_seconds = 0.01
+    pauses = []
+    monkeypatch.setattr(client.limiter, "pause", pauses.append)
+    assert client.get_json("https://api.example/test") == {}
+    assert pauses == [0.01]
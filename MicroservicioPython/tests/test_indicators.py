@@ -0,0 +1,89 @@
+import math
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.services.indicators import (
+    ATR_PERIOD,
+    BOLLINGER_K,
+    BOLLINGER_PERIOD,
+    EMA_FAST,
+    EMA_SLOW,
+    MACD_SIGNAL,
+    RSI_PERIOD,
+    advance,
+    indicators_from_state,
+)
+
+
+def _ema_series(values, period):
+    alpha = 2.0 / (period + 1)
+    result = [values[0]]
+    for value in values[1:]:
+        result.append(result[-1] + alpha * (value - result[-1]))
+    return result
+
+
+def _wilder_last(values, period):
+    average = sum(values[:period]) / period
+    for value in values[period:]:
+        average = (average * (period - 1) + value) / period
+    return average
+
+
+def _batch(prices):
+    """Indicadores calculados de golpe sobre la serie completa."""
+    result = {}
+    count = len(prices)
+    ema_fast = _ema_series(prices, EMA_FAST)
+    ema_slow = _ema_series(prices, EMA_SLOW)
+    if count >= EMA_FAST:
+        result["ema_fast"] = ema_fast[-1]
+    if count >= EMA_SLOW:
+        macd = [fast - slow for fast, slow in zip(ema_fast, ema_slow)][EMA_SLOW - 1:]
+        result["macd"] = macd[-1]
+        if len(macd) >= MACD_SIGNAL:
+            result["macd_signal"] = _ema_series(macd, MACD_SIGNAL)[-1]
+    changes = [current - previous for previous, current in zip(prices, prices[1:])]
+    if len(changes) >= RSI_PERIOD:
+        gain = _wilder_last([max(change, 0.0) for change in changes], RSI_PERIOD)
+        loss = _wilder_last([max(-change, 0.0) for change in changes], RSI_PERIOD)
+        result["rsi"] = 100.0 - 100.0 / (1.0 + gain / loss)
+    if len(changes) >= ATR_PERIOD:
+        result["atr"] = _wilder_last([abs(change) for change in changes], ATR_PERIOD)
+    if count >= BOLLINGER_PERIOD:
+        window = prices[-BOLLINGER_PERIOD:]
+        mean = sum(window) / BOLLINGER_PERIOD
+        std = math.sqrt(sum((value - mean) ** 2 for value in window) / BOLLINGER_PERIOD)
+        result["bollinger_upper"] = mean + BOLLINGER_K * std
+        result["bollinger_lower"] = mean - BOLLINGER_K * std
+    return result
+
+
+def test_advance_matches_batch_computation():
+    rng = random.Random(7)
+    prices = [100.0]
+    for _ in range(79):
+        prices.append(prices[-1] * (1 + rng.uniform(-0.03, 0.03)))
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    state = None
+    for index, price in enumerate(prices):
+        state = advance(state, price, start + timedelta(hours=index))
+        values = indicators_from_state(state)
+        expected = _batch(prices[:index + 1])
+        for name in ("ema_fast", "macd", "macd_signal", "rsi", "atr", "bollinger_upper", "bollinger_lower"):
+            if name in expected:
+                assert values[name] == pytest.approx(expected[name], rel=1e-9, abs=1e-12), (index, name)
+            else:
+                assert values[name] is None, (index, name)
+
+
+def test_macd_signal_starts_at_first_macd():
+    prices = [100.0 + index for index in range(EMA_SLOW + MACD_SIGNAL)]
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    state = None
+    for index, price in enumerate(prices[:EMA_SLOW]):
+        state = advance(state, price, start + timedelta(hours=index))
+    assert state["macd_signal"] == pytest.approx(state["ema_fast"] - state["ema_slow"])
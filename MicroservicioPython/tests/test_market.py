@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import DateTime, Numeric, column, values
+from sqlalchemy.orm import Session
+
+from app.services.market import _load_points
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def load(database_engine):
+    """Aplica ``_load_points`` a una serie ``[(minuto, precio), ...]`` sin tocar tablas."""
+
+    def run(points, max_points, downsample="m4"):
+        source = values(
+            column("recorded_at", DateTime(timezone=True)),
+            column("price", Numeric),
+            name="points",
+        ).data([(START + timedelta(minutes=minute), Decimal(str(price))) for minute, price in points])
+        with Session(database_engine) as session:
+            result = _load_points(session, source, max_points, downsample)
+        return [(int((timestamp / 1000 - START.timestamp()) // 60), price) for timestamp, price in result]
+
+    return run
+
+
+def test_small_series_is_returned_whole(load):
+    points = [(0, 3.0), (1, 1.0), (2, 2.0)]
+    assert load(points, max_points=8) == points
+
+
+def test_latest_keeps_the_last_points(load):
+    points = [(minute, float(minute)) for minute in range(10)]
+    assert load(points, max_points=4, downsample="latest") == points[-4:]
+
+
+def test_m4_keeps_first_last_min_and_max_of_each_bucket(load):
+    # max_points=8: dos intervalos de 4,5 minutos, [0, 4] y [5, 9].
+    points = [
+        (0, 5.0), (1, 7.0), (2, 9.0), (3, 1.0), (4, 6.0),
+        (5, 4.0), (6, 0.5), (7, 3.0), (8, 8.0), (9, 2.0),
+    ]
+    assert load(points, max_points=8) == [
+        (0, 5.0), (2, 9.0), (3, 1.0), (4, 6.0),
+        (5, 4.0), (6, 0.5), (8, 8.0), (9, 2.0),
+    ]
+
+
+def test_m4_ties_keep_the_earliest_point(load):
+    points = [
+        (0, 5.0), (1, 1.0), (2, 9.0), (3, 1.0), (4, 9.0),
+        (5, 2.0), (6, 8.0), (7, 2.0), (8, 8.0), (9, 4.0),
+    ]
+    # En cada intervalo el minimo y el maximo se repiten: se queda el primero de cada uno.
+    # En el segundo el minimo coincide con el primer punto y no se duplica.
+    assert load(points, max_points=8) == [
+        (0, 5.0), (1, 1.0), (2, 9.0), (4, 9.0),
+        (5, 2.0), (6, 8.0), (9, 4.0),
+    ]
+
+
+def test_m4_single_point_bucket_is_returned_once(load):
+    # max_points=12: tres intervalos de 20 minutos; el segundo queda vacio y el tercero
+    # solo tiene un punto, que es a la vez primero, ultimo, minimo y maximo.
+    points = [(minute, float(10 + minute % 3)) for minute in range(12)] + [(60, 42.0)]
+    assert load(points, max_points=12) == [(0, 10.0), (2, 12.0), (11, 12.0), (60, 42.0)]
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import struct
+from array import array
+
+import pytest
+
+from app.services.series_format import binary_series, columnar_series
+
+DAY_MS = 86_400_000
+
+
+def _decode_binary(buffer: bytes):
+    count, unit, start = struct.unpack_from("<IId", buffer)
+    deltas = array("i", buffer[16:16 + 4 * count])
+    prices = array("f", buffer[16 + 4 * count:])
+    assert len(prices) == count
+    timestamps, current = [], start
+    for delta in deltas:
+        current += delta * unit
+        timestamps.append(current)
+    return unit, list(zip(timestamps, prices))
+
+
+def _decode_columnar(series):
+    if series["step"] is not None:
+        offsets = [index * series["step"] for index in range(len(series["prices"]))]
+    else:
+        offsets, total = [], 0
+        for delta in series["deltas"]:
+            total += delta
+            offsets.append(total)
+    return [[series["start"] + offset, price] for offset, price in zip(offsets, series["prices"])]
+
+
+def test_columnar_uniform_series_uses_step():
+    points = [[1_700_000_000_000 + index * 60_000, 100.0 + index] for index in range(5)]
+    series = columnar_series(points)
+    assert series["step"] == 60_000
+    assert series["deltas"] is None
+    assert _decode_columnar(series) == points
+
+
+def test_columnar_irregular_series_uses_deltas():
+    points = [[1_700_000_000_000, 1.5], [1_700_000_060_000, 2.5], [1_700_000_300_000, 3.5]]
+    series = columnar_series(points)
+    assert series["step"] is None
+    assert series["deltas"] == [0, 60_000, 240_000]
+    assert _decode_columnar(series) == points
+
+
+def test_columnar_empty_series():
+    assert columnar_series([]) == {"start": None, "step": None, "deltas": None, "prices": []}
+
+
+def test_binary_round_trip_in_milliseconds():
+    points = [[1_700_000_000_000, 0.5], [1_700_000_000_250, 1.25], [1_700_000_060_000, 2.0]]
+    unit, decoded = _decode_binary(binary_series(points))
+    assert unit == 1
+    assert decoded == [(timestamp, price) for timestamp, price in points]
+
+
+def test_binary_switches_to_seconds_when_a_gap_overflows_int32():
+    start = 1_600_000_000_000
+    points = [[start, 1.0], [start + 30 * DAY_MS + 1_400, 2.0], [start + 30 * DAY_MS + 2_600, 3.0]]
+    unit, decoded = _decode_binary(binary_series(points))
+    assert unit == 1000
+    # Los offsets se redondean al segundo respecto al inicio: el error no se acumula.
+    assert [timestamp for timestamp, _ in decoded] == [start, start + 30 * DAY_MS + 1_000, start + 30 * DAY_MS + 3_000]
+    assert [price for _, price in decoded] == [1.0, 2.0, 3.0]
+
+
+def test_binary_prices_are_float32():
+    _, decoded = _decode_binary(binary_series([[0, 0.1]]))
+    assert decoded[0][1] == pytest.approx(0.1, rel=1e-7)
+
+
+def test_binary_empty_series():
+    assert binary_series([]) == struct.pack("<IId", 0, 1, 0.0)
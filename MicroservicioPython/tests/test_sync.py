@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from app.services import sync
+from app.services.freshness import ALL_CURRENCIES, get_registry
+
+from conftest import fake_markets
+
+
+def test_description_backfill_only_publishes_changed_batches(synced_market, monkeypatch):
+    synced_market(fake_markets(4))
+    published = []
+    real_publish = sync.publish_change
+
+    def record_publish(session, vs, synced_at=None, history=True):
+        published.append((vs, history))
+        real_publish(session, vs, synced_at=synced_at, history=history)
+
+    def unavailable(coin_id):
+        raise RuntimeError("CoinGecko no disponible")
+
+    monkeypatch.setattr(sync, "publish_change", record_publish)
+    monkeypatch.setattr(sync, "fetch_coin_metadata", unavailable)
+    assert sync.backfill_coin_descriptions(batch_size=2) == 0
+    assert published == []
+    assert get_registry().changed_at(ALL_CURRENCIES) is None
+
+    monkeypatch.setattr(sync, "fetch_coin_metadata", lambda coin_id: {"description": f"about {coin_id}"})
+    assert sync.backfill_coin_descriptions(batch_size=2) == 4
+    assert published == [(None, False), (None, False)]
+    assert get_registry().changed_at(ALL_CURRENCIES) is not None
+
+
+def test_raw_snapshot_delete_walks_ranges_up_to_cutoff(synced_market):
+    from datetime import datetime, timedelta, timezone
+
+    from sqlalchemy import func, insert, select
+
+    from app.db import session_scope
+    from app.models import CoinSnapshot
+    from app.services.partitions import ensure_snapshot_partitions
+
+    synced_market(fake_markets(5))
+    now = datetime.now(timezone.utc)
+    instants = [now - timedelta(days=40, hours=hour) for hour in range(30)]
+    ensure_snapshot_partitions(min(instants), now)
+    with session_scope() as session:
+        # Cinco monedas por instante: mas filas por instante que el tamano de lote.
+        session.execute(
+            insert(CoinSnapshot),
+            [
+                {"coin_id": coin_id, "vs_currency": vs, "recorded_at": moment, "price": 1}
+                for moment in instants
+                for coin_id in range(1, 6)
+                for vs in ("usd", "eur")
+            ],
+        )
+
+    cutoff = now - timedelta(days=40, hours=10)
+    assert sync._delete_raw_snapshots(cutoff, batch_size=3) == 19 * 5 * 2
+    with session_scope() as session:
+        oldest, remaining = session.execute(select(func.min(CoinSnapshot.recorded_at), func.count())).one()
+    assert oldest == cutoff
+    assert remaining == 11 * 5 * 2 + 5
+
+
+def test_bulk_snapshot_load_creates_partitions_outside_the_load(synced_market, tmp_path, monkeypatch):
+    import json
+    from datetime import datetime, timezone
+
+    from sqlalchemy import func, select
+
+    from app.db import session_scope
+    from app.models import CoinSnapshot
+    from app.services import bulk_load
+    from app.services.partitions import drop_snapshot_partitions_before
+
+    synced_market(fake_markets(2))
+    drop_snapshot_partitions_before(datetime(2020, 1, 1, tzinfo=timezone.utc))
+    moments = [datetime(2019, month, 15, tzinfo=timezone.utc) for month in (1, 2, 3)]
+    dump = tmp_path / "snapshots.ndjson"
+    dump.write_text(
+        "\n".join(
+            json.dumps({"coin": "coin-0", "vs_currency": "usd", "recorded_at": moment.isoformat(), "price": 1.5})
+            for moment in moments
+        )
+    )
+    created = []
+    real_ensure = bulk_load.ensure_snapshot_partitions
+
+    def record_ensure(start, end=None):
+        created.append((start, end))
+        return real_ensure(start, end)
+
+    monkeypatch.setattr(bulk_load, "ensure_snapshot_partitions", record_ensure)
+    assert bulk_load.load_dump(str(dump), "snapshots") == 3
+    assert created == [(moments[0], moments[-1])]
+    with session_scope() as session:
+        assert session.execute(select(func.count()).where(CoinSnapshot.recorded_at < datetime(2020, 1, 1, tzinfo=timezone.utc))).scalar_one() == 3
+
+    # Con las particiones ya creadas no se repite el lote.
+    assert bulk_load.load_dump(str(dump), "snapshots") == 0
+    assert len(created) == 1
+
+
+def test_dropping_expired_partitions_publishes_a_change(synced_market):
+    from datetime import datetime, timezone
+
+    from app.services.partitions import ensure_snapshot_partitions, maintain_snapshot_partitions
+
+    synced_market(fake_markets(2))
+    assert maintain_snapshot_partitions(months_ahead=0, retention_months=0)["dropped"] == []
+    assert get_registry().changed_at(ALL_CURRENCIES) is None
+
+    ensure_snapshot_partitions(datetime(2019, 1, 1, tzinfo=timezone.utc))
+    result = maintain_snapshot_partitions(months_ahead=0, retention_months=1)
+    assert "coin_snapshots_p201901" in result["dropped"]
+    assert get_registry().changed_at(ALL_CURRENCIES) is not None